@@ -3,6 +3,14 @@
     from a WhisperX JSON output file. Handles files with or without speaker
     information.
 
+    Every speaker gets a pair of styles: "Spk_<speaker>" for the line and
+    "Spk_<speaker>_hl" for the highlighted word, in a color picked for that
+    speaker label (SPEAKER_00 to SPEAKER_02 keep their old colors). Events
+    reference them by name and switch with a bare {\\r<style>_hl}...{\\r}.
+    With --inline-colors the old output is written instead: everything under
+    "Default", with the color and underline tags inlined around every word
+    and three fixed speaker colors.
+
     Args:
         json_path (str): Path to the WhisperX JSON file.
         ass_path (str): Path to save the generated ASS file.
@@ -10,32 +18,32 @@
 
 import json
 import os
+import re
+import zlib
+import colorsys
 import argparse
 
-def create_ass_from_json(json_path, ass_path):
-    speaker_colors = {
-        "SPEAKER_00": "&H128F07&",  # Green
-        "SPEAKER_01": "&H702618&",  # Red
-        "SPEAKER_02": "&H161691&",  # Blue
-        "Extra": "&C9C967&"       # Yellow for extra speakers
-    }
+from timing_repair import repair_word_timings
 
-    try:
-        with open(json_path, "r", encoding="utf-8") as json_file:
-            data = json.load(json_file)  # Load the entire JSON object
-            segments = data["segments"]   # Access the list of segments
-    except FileNotFoundError:
-        print(f"Error: The file {json_path} was not found.")
-        raise
-    except json.JSONDecodeError as e:
-        print(f"Error decoding JSON: {e}")
-        raise
+# Colors of the --inline-colors output
+SPEAKER_COLORS = {
+    "SPEAKER_00": "&H128F07&",  # Green
+    "SPEAKER_01": "&H702618&",  # Red
+    "SPEAKER_02": "&H161691&",  # Blue
+    "Extra": "&C9C967&"       # Yellow for extra speakers
+}
+# Highlight color of segments without speaker information
+NO_SPEAKER_COLOR = "&H34495E&"
 
-    try:
-        with open(ass_path, "w", encoding="utf-8") as ass_file:
-            # Write ASS header
-            ass_file.write(
-                """[Script Info]
+# Prefix of speaker style names, so no label can collide with "Default"
+SPEAKER_STYLE_PREFIX = "Spk_"
+
+# Hue step between speaker numbers; the golden ratio keeps any number of hues apart
+GOLDEN_RATIO_CONJUGATE = 0.618033988749895
+PALETTE_SATURATION = 0.75
+PALETTE_VALUE = 0.85
+
+ASS_SCRIPT_INFO = """[Script Info]
 Title: Word-Level Dynamic Highlighting
 ScriptType: v4.00+
 Collisions: Normal
@@ -43,91 +51,184 @@ PlayDepth: 0
 
 [V4+ Styles]
 Format: Name, Fontname, Fontsize, PrimaryColour, SecondaryColour, OutlineColour, BackColour, Bold, Italic, Underline, StrikeOut, ScaleX, ScaleY, Spacing, Angle, BorderStyle, Outline, Shadow, Alignment, MarginL, MarginR, MarginV, Encoding
-Style: Default,Montserrat,18,&H00FFFFFF,&H000000FF,&H00000000,&H64000000,-1,0,0,0,100,100,0,0,1,1,0,2,10,10,10,1
-
+"""
+ASS_EVENTS_FORMAT = """
 [Events]
 Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text
 """
-            )
-
-            # Process each segment
-            for segment in segments:
-                full_text = segment["text"].strip()
-                words = segment["words"]
-
-                # Handle missing speaker information
-                if "speaker" in segment:
-                    speaker = segment["speaker"]
-
-                    # Get speaker color
-                    if speaker not in speaker_colors:
-                        speaker = "Extra"  # Label any additional speaker as 'Extra'
-                    color = speaker_colors[speaker]
-                else:
-                    color = "&H34495E&"  # Default color if no speaker information
-
-                # Normalize spaces in full_text
-                full_text = full_text.replace("\u00A0", " ")
-                
-                # Generate individual ASS dialogue lines for each word
-                prev_word_end = None  # Keep track of the previous word's end time
-                word_start_index = 0  # Keep track of the starting index for searching
-
-                for i, word_info in enumerate(words):
-                    # Skip words with missing timing information
-                    if "start" not in word_info or "end" not in word_info:
-                        print(f"Skipping word with missing timing information: {word_info['word']}")
-                        continue
-
-                    current_word = word_info["word"]
-                    word_start = word_info["start"]
-                    word_end = word_info["end"]
-
-                    # Align start time with the end time of the previous word
-                    if prev_word_end is not None:
-                        word_start = prev_word_end  # Directly use the previous word's end time
-
-                    # Normalize spaces in current_word
-                    current_word = current_word.replace("\u00A0", " ")
-
-                    # Find the index of the current word in the full text
-                    try:
-                        current_word_index = full_text.index(current_word, word_start_index)
-                    except ValueError:
-                        print(f"Warning: Word '{current_word}' not found in the segment.")
-                        continue  # Skip this word
-
-                    # Create the ASS dialogue line with the current word highlighted
-                    ass_text = f"{full_text[:current_word_index]}{{\\1c{color}}}{{\\u1}}{current_word}{{\\u0}}{{\\1c&HFFFFFF&}}{full_text[current_word_index + len(current_word):]}"
-                    
-                    # Create ASS timestamps
-                    start_ass = f"{int(word_start // 3600)}:{int((word_start % 3600) // 60):02}:{int(word_start % 60):02}.{int((word_start % 1) * 100):02}"
-                    end_ass = f"{int(word_end // 3600)}:{int((word_end % 3600) // 60):02}:{int(word_end % 60):02}.{int((word_end % 1) * 100):02}"
-
-                    # Write the dialogue line
-                    ass_file.write(
-                        f"Dialogue: 0,{start_ass},{end_ass},Default,,0,0,0,,{ass_text}\n"
-                    )
-
-                    # Update prev_word_end to the current word's end time
-                    prev_word_end = word_end
-
-                    # Update the starting index for the next word search
-                    word_start_index = current_word_index + len(current_word)
+# Everything but the name, primary colour and underline flag of the Default style
+STYLE_LINE = "Style: {name},Montserrat,18,{colour},&H000000FF,&H00000000,&H64000000,-1,0,{underline},0,100,100,0,0,1,1,0,2,10,10,10,1\n"
+
+# Header of the --inline-colors output: a single style, colors come from override tags
+ASS_HEADER = (ASS_SCRIPT_INFO + STYLE_LINE.format(name="Default", colour="&H00FFFFFF", underline=0)
+              + ASS_EVENTS_FORMAT)
+
+
+def ass_timestamp(seconds):
+    return f"{int(seconds // 3600)}:{int((seconds % 3600) // 60):02}:{int(seconds % 60):02}.{int((seconds % 1) * 100):02}"
+
+
+def speaker_style(speaker):
+    """Style name for a speaker label; commas would end the Style field."""
+    return "Default" if speaker is None else SPEAKER_STYLE_PREFIX + re.sub(r"[,\s]", "_", speaker)
+
+
+def speaker_colour(speaker):
+    """
+    ASS colour (&H00BBGGRR) for a speaker label. The first three speakers
+    keep the colors of the --inline-colors output; other numbered labels
+    step through the hue circle by the golden ratio, the rest by a hash of
+    the label, so a speaker keeps its color whatever other speakers there are.
+    """
+    if speaker is None:
+        return "&H00" + NO_SPEAKER_COLOR[2:-1]
+    if speaker in SPEAKER_COLORS and speaker != "Extra":
+        return "&H00" + SPEAKER_COLORS[speaker][2:-1]
+    match = re.search(r"(\d+)$", speaker)
+    number = int(match.group(1)) if match else zlib.crc32(speaker.encode("utf-8"))
+    red, green, blue = colorsys.hsv_to_rgb((number * GOLDEN_RATIO_CONJUGATE) % 1.0, PALETTE_SATURATION, PALETTE_VALUE)
+    return f"&H00{round(blue * 255):02X}{round(green * 255):02X}{round(red * 255):02X}"
+
+
+def ass_header(segments):
+    """Script header with a line style and a highlight style per speaker in `segments`."""
+    speakers = sorted({segment.get("speaker") for segment in segments}, key=lambda speaker: (speaker is not None, speaker or ""))
+    lines = [STYLE_LINE.format(name="Default", colour="&H00FFFFFF", underline=0)]
+    for speaker in speakers:
+        style = speaker_style(speaker)
+        if speaker is not None:
+            lines.append(STYLE_LINE.format(name=style, colour="&H00FFFFFF", underline=0))
+        lines.append(STYLE_LINE.format(name=f"{style}_hl", colour=speaker_colour(speaker), underline=-1))
+    return ASS_SCRIPT_INFO + "".join(lines) + ASS_EVENTS_FORMAT
+
+
+def ass_events(segment, inline_colors=False):
+    """
+    Yields (start, end, dialogue_line) for every word of one segment.
+    """
+    full_text = segment["text"].strip()
+    words = segment["words"]
+
+    style = speaker_style(segment.get("speaker"))
+    if not inline_colors:
+        # The styles from ass_header carry color and underline
+        open_tag, close_tag = f"{{\\r{style}_hl}}", "{\\r}"
+    else:
+        style = "Default"
+        # Handle missing speaker information
+        if "speaker" in segment:
+            speaker = segment["speaker"]
+
+            # Get speaker color
+            if speaker not in SPEAKER_COLORS:
+                speaker = "Extra"  # Label any additional speaker as 'Extra'
+            color = SPEAKER_COLORS[speaker]
+        else:
+            color = NO_SPEAKER_COLOR  # Default color if no speaker information
+        open_tag, close_tag = f"{{\\1c{color}}}{{\\u1}}", "{\\u0}{\\1c&HFFFFFF&}"
+
+    # Normalize spaces in full_text
+    full_text = full_text.replace("\u00A0", " ")
+
+    # Generate individual ASS dialogue lines for each word
+    prev_word_end = None  # Keep track of the previous word's end time
+    word_start_index = 0  # Keep track of the starting index for searching
+
+    for i, word_info in enumerate(words):
+        # Only left after repair_word_timings if the segment has no bounds either
+        if "start" not in word_info or "end" not in word_info:
+            continue
+
+        current_word = word_info["word"]
+        word_start = word_info["start"]
+        word_end = word_info["end"]
+
+        # Align start time with the end time of the previous word
+        if prev_word_end is not None:
+            word_start = prev_word_end  # Directly use the previous word's end time
+
+        # Normalize spaces in current_word
+        current_word = current_word.replace("\u00A0", " ")
+
+        # Find the index of the current word in the full text
+        try:
+            current_word_index = full_text.index(current_word, word_start_index)
+        except ValueError:
+            print(f"Warning: Word '{current_word}' not found in the segment.")
+            continue  # Skip this word
+
+        # Create the ASS dialogue line with the current word highlighted
+        ass_text = f"{full_text[:current_word_index]}{open_tag}{current_word}{close_tag}{full_text[current_word_index + len(current_word):]}"
+
+        yield (
+            word_start,
+            word_end,
+            f"Dialogue: 0,{ass_timestamp(word_start)},{ass_timestamp(word_end)},{style},,0,0,0,,{ass_text}\n"
+        )
+
+        # Update prev_word_end to the current word's end time
+        prev_word_end = word_end
+
+        # Update the starting index for the next word search
+        word_start_index = current_word_index + len(current_word)
+
+
+def write_ass(segments, ass_path, inline_colors=False):
+    """
+    Writes the ASS file for a list of WhisperX segments. Missing word
+    timings are interpolated first (in place); returns how many were.
+    """
+    repaired = repair_word_timings(segments)
+    with open(ass_path, "w", encoding="utf-8") as ass_file:
+        ass_file.write(ASS_HEADER if inline_colors else ass_header(segments))
+        for segment in segments:
+            for _, _, line in ass_events(segment, inline_colors):
+                ass_file.write(line)
+    return repaired
+
+
+def create_ass_from_json(json_path, ass_path, inline_colors=False):
+    try:
+        if json_path.endswith(".wxt"):
+            # Binary transcript written by transcript_store
+            from transcript_store import read_transcript
+            segments = read_transcript(json_path)["segments"]
+        else:
+            with open(json_path, "r", encoding="utf-8") as json_file:
+                data = json.load(json_file)  # Load the entire JSON object
+                segments = data["segments"]   # Access the list of segments
+    except FileNotFoundError:
+        print(f"Error: The file {json_path} was not found.")
+        raise
+    except json.JSONDecodeError as e:
+        print(f"Error decoding JSON: {e}")
+        raise
 
+    try:
+        repaired = write_ass(segments, ass_path, inline_colors)
+        if repaired:
+            print(f"Interpolated timings for {repaired} words with missing timing information.")
         print(f"ASS file created: {ass_path}")
+        return repaired
 
     except Exception as e:
         print(f"Error creating ASS file: {e}")
+        raise
 
-if __name__ == "__main__":
+def main(argv=None):
     parser = argparse.ArgumentParser()
     parser.add_argument("--input", type=str, required=True, help="Path to the input JSON file")
     parser.add_argument("--output", type=str, required=True, help="Path to the output ASS file")
-    args = parser.parse_args()
+    parser.add_argument("--inline-colors", action="store_true",
+                        help="Old output: one style, color tags inlined around every word, three speaker colors")
+    args = parser.parse_args(argv)
 
     # Access file paths from command-line arguments
     input_json_path = args.input
     output_ass_path = args.output
 
-    create_ass_from_json(input_json_path, output_ass_path)
\ No newline at end of file
+    create_ass_from_json(input_json_path, output_ass_path, args.inline_colors)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,223 @@
+"""
+Regenerates ASS and SRT subtitles for many WhisperX JSON transcripts at once.
+
+Inputs may be files, directories (searched recursively for `--pattern`) or
+glob patterns. Files are converted in a process pool; outputs that are
+already newer than their transcript and the writer modules are skipped, so
+a styling change in ass_from_json.py only triggers the ASS files again.
+With --output-dir the directory layout below the transcripts' common parent
+is mirrored there. Errors are collected per file and reported at the end
+instead of aborting the batch.
+
+Usage:
+    python batch_convert.py D:/archive --formats ass,srt --workers 8
+"""
+
+import os
+import io
+import sys
+import glob
+import time
+import argparse
+import contextlib
+
+import ass_from_json
+import srt_from_json
+import timing_repair
+
+FORMATS = ("ass", "srt")
+# Modules whose changes make the outputs of a format stale
+WRITER_MODULES = {
+    "ass": (ass_from_json.__file__, timing_repair.__file__),
+    "srt": (srt_from_json.__file__, timing_repair.__file__),
+}
+
+
+def find_transcripts(inputs, pattern="*_final.json"):
+    """
+    Expands files, directories and glob patterns into a sorted list of
+    unique JSON paths.
+    """
+    found = set()
+    for item in inputs:
+        if os.path.isdir(item):
+            found.update(glob.glob(os.path.join(item, "**", pattern), recursive=True))
+        elif os.path.isfile(item):
+            found.add(item)
+        else:
+            found.update(path for path in glob.glob(item, recursive=True) if os.path.isfile(path))
+    return sorted(os.path.abspath(path) for path in found)
+
+
+def output_root(json_paths):
+    """The directory below which the layout is mirrored into --output-dir, or None across drives."""
+    try:
+        return os.path.commonpath([os.path.dirname(path) for path in json_paths])
+    except ValueError:
+        return None
+
+
+def target_paths(json_path, output_dir=None, root=None):
+    """
+    Returns the ASS and SRT paths the pipeline would write for `json_path`,
+    or their mirror below `output_dir` of its directory relative to `root`.
+    """
+    json_dir = os.path.dirname(json_path)
+    if not output_dir:
+        out_dir = json_dir
+    elif root is not None:
+        out_dir = os.path.normpath(os.path.join(output_dir, os.path.relpath(json_dir, root)))
+    else:
+        # No common parent (different drives): mirror the whole path, the drive as a directory
+        drive, rest = os.path.splitdrive(json_dir)
+        out_dir = os.path.join(output_dir, drive.rstrip(":"), rest.lstrip("\\/"))
+    stem = os.path.splitext(os.path.basename(json_path))[0]
+    # video_processor names the ASS file after the media file, without "_final"
+    ass_stem = stem[:-len("_final")] if stem.endswith("_final") else stem
+    return {
+        "ass": os.path.join(out_dir, f"{ass_stem}.ass"),
+        # create_srt_from_json derives this name itself
+        "srt": os.path.join(out_dir, f"{stem}_word_lvl.srt"),
+    }
+
+
+def is_fresh(output_path, *dependencies):
+    """
+    True if `output_path` exists and is newer than every dependency.
+    """
+    try:
+        output_mtime = os.path.getmtime(output_path)
+    except OSError:
+        return False
+    return all(output_mtime >= os.path.getmtime(dependency) for dependency in dependencies)
+
+
+def duplicate_targets(json_paths, formats, output_dir=None, root=None):
+    """Output paths that more than one transcript would write, mapped to those transcripts."""
+    writers_of = {}
+    for json_path in json_paths:
+        targets = target_paths(json_path, output_dir, root)
+        for fmt in formats:
+            writers_of.setdefault(os.path.normcase(targets[fmt]), []).append(json_path)
+    return {target: paths for target, paths in writers_of.items() if len(paths) > 1}
+
+
+def convert_one(json_path, formats, output_dir=None, force=False, root=None):
+    """
+    Converts a single transcript. Runs in a worker process and never raises;
+    returns (json_path, written formats, skipped formats, error, seconds).
+    """
+    started = time.perf_counter()
+    targets = target_paths(json_path, output_dir, root)
+    written, skipped = [], []
+    # The writers print a line per file; keep the batch output readable
+    captured = io.StringIO()
+    try:
+        with contextlib.redirect_stdout(captured):
+            for fmt in formats:
+                if not force and is_fresh(targets[fmt], json_path, *WRITER_MODULES[fmt]):
+                    skipped.append(fmt)
+                    continue
+                if fmt == "ass":
+                    ass_from_json.create_ass_from_json(json_path, targets["ass"])
+                else:
+                    srt_from_json.create_srt_from_json(json_path, os.path.dirname(targets["srt"]))
+                written.append(fmt)
+    except Exception as e:
+        return json_path, written, skipped, f"{type(e).__name__}: {e}", time.perf_counter() - started
+    return json_path, written, skipped, None, time.perf_counter() - started
+
+
+def convert_batch(json_paths, formats=FORMATS, workers=None, output_dir=None, force=False, progress=True):
+    """
+    Fans the transcripts out over a process pool and returns a summary dict
+    with counts, throughput and the per-file errors. Raises ValueError if
+    two transcripts would write the same output file.
+    """
+    # Imported here: multiprocessing alone costs tens of ms at startup
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+
+    root = output_root(json_paths) if output_dir and json_paths else None
+    duplicates = duplicate_targets(json_paths, formats, output_dir, root)
+    if duplicates:
+        target, paths = sorted(duplicates.items())[0]
+        raise ValueError(f"{len(duplicates)} output file(s) would be written by several transcripts, "
+                         f"e.g. {target} by {', '.join(paths)}")
+    if output_dir:
+        for out_dir in {os.path.dirname(target_paths(path, output_dir, root)["ass"]) for path in json_paths}:
+            os.makedirs(out_dir, exist_ok=True)
+
+    started = time.perf_counter()
+    converted = skipped = 0
+    input_bytes = 0
+    errors = {}
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(convert_one, path, formats, output_dir, force, root) for path in json_paths]
+        for done_count, future in enumerate(as_completed(futures), start=1):
+            json_path, written, skipped_formats, error, _ = future.result()
+            if error:
+                errors[json_path] = error
+            elif written:
+                converted += 1
+                input_bytes += os.path.getsize(json_path)
+            elif skipped_formats:
+                skipped += 1
+            if progress and (done_count % 100 == 0 or done_count == len(futures)):
+                print(f"  {done_count}/{len(futures)} files processed", file=sys.stderr)
+
+    elapsed = time.perf_counter() - started
+    return {
+        "files": len(json_paths),
+        "converted": converted,
+        "skipped": skipped,
+        "failed": len(errors),
+        "errors": errors,
+        "seconds": elapsed,
+        "files_per_second": converted / elapsed if elapsed > 0 else 0.0,
+        "mb_per_second": input_bytes / 1e6 / elapsed if elapsed > 0 else 0.0,
+    }
+
+
+def print_summary(summary):
+    print(
+        f"Converted {summary['converted']} of {summary['files']} transcripts "
+        f"({summary['skipped']} up to date, {summary['failed']} failed) in {summary['seconds']:.1f}s: "
+        f"{summary['files_per_second']:.1f} files/s, {summary['mb_per_second']:.2f} MB/s of JSON."
+    )
+    for path, error in sorted(summary["errors"].items()):
+        print(f"FAILED {path}: {error}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Convert WhisperX JSON transcripts to ASS/SRT in parallel.")
+    parser.add_argument("inputs", nargs="+", help="JSON files, directories or glob patterns")
+    parser.add_argument("--pattern", default="*_final.json", help="File pattern used inside directories")
+    parser.add_argument("--formats", default="ass,srt", help="Comma-separated subset of: ass, srt")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--output-dir", help="Write the outputs here, in the transcripts' directory layout")
+    parser.add_argument("--force", action="store_true", help="Regenerate even when outputs are up to date")
+    args = parser.parse_args(argv)
+
+    formats = [fmt.strip() for fmt in args.formats.split(",") if fmt.strip()]
+    unknown = set(formats) - set(FORMATS)
+    if unknown:
+        parser.error(f"Unknown format(s): {', '.join(sorted(unknown))}")
+
+    json_paths = find_transcripts(args.inputs, args.pattern)
+    if not json_paths:
+        print("No transcripts found.")
+        return 1
+
+    print(f"Converting {len(json_paths)} transcripts to {', '.join(formats)}...")
+    try:
+        summary = convert_batch(json_paths, formats, args.workers, args.output_dir, args.force)
+    except ValueError as e:
+        print(f"ERROR: {e}")
+        return 1
+    print_summary(summary)
+    return 1 if summary["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,208 @@
+"""
+Cross-file batched transcription for many short media files.
+
+WhisperX batches the VAD chunks of one file, so a 40-second clip with three
+chunks fills three of sixteen batch slots. Here every file is cut into
+speech chunks of at most 30 seconds with the energy pre-pass from
+speech_prepass.py, the chunks of all queued files are pooled per language,
+and the model only ever sees full batches (except for the last one per
+language). Results are routed back to their files and shifted by each
+chunk's offset, and every file gets the usual `<name>_initial.json`.
+
+Usage:
+    python batch_transcribe.py D:/clips --batch-size 16
+
+benchmarks/bench_batch_transcribe.py compares pooled and per-file batch
+occupancy with the stub model from benchmarks/stub_model.py.
+"""
+
+import os
+import sys
+import json
+import math
+import time
+import logging
+import argparse
+from collections import defaultdict
+
+import numpy as np
+
+from speech_prepass import SAMPLE_RATE, detect_speech
+
+MAX_CHUNK_SECONDS = 30.0
+# Peak amplitude above which a clip without detected regions is treated as all speech
+SPEECH_PEAK = 0.02
+
+
+def chunk_audio(audio, max_seconds=MAX_CHUNK_SECONDS, sample_rate=SAMPLE_RATE):
+    """
+    Groups the speech regions of `audio` into (start, end) sample ranges of
+    at most `max_seconds`. Neighbouring regions share a chunk while they
+    fit; longer regions are split into equal parts.
+    """
+    max_samples = int(max_seconds * sample_rate)
+    regions = detect_speech(audio, sample_rate)
+    if len(regions) == 0 and len(audio) and np.abs(audio).max() > SPEECH_PEAK:
+        # The adaptive threshold finds nothing in clips that are speech almost throughout
+        regions = [(0, len(audio))]
+    chunks = []
+    for start, end in regions:
+        if chunks and end - chunks[-1][0] <= max_samples:
+            chunks[-1] = (chunks[-1][0], end)
+            continue
+        parts = math.ceil((end - start) / max_samples)
+        bounds = np.linspace(start, end, parts + 1).astype(np.int64)
+        chunks.extend((int(a), int(b)) for a, b in zip(bounds[:-1], bounds[1:]))
+    return chunks
+
+
+class WhisperBatchAdapter:
+    """
+    Runs a list of audio chunks as one batch through a WhisperX
+    FasterWhisperPipeline, bypassing its per-file `transcribe`.
+    """
+
+    def __init__(self, pipeline, task="transcribe"):
+        self.pipeline = pipeline
+        self.task = task
+        self._tokenizer_language = None
+
+    def detect_language(self, audio):
+        return self.pipeline.detect_language(audio)
+
+    def transcribe_batch(self, chunks, language):
+        # The pipeline decodes with whatever tokenizer is set; it fixes the language
+        if language != self._tokenizer_language:
+            from faster_whisper.tokenizer import Tokenizer
+            self.pipeline.tokenizer = Tokenizer(self.pipeline.model.hf_tokenizer, self.pipeline.model.model.is_multilingual,
+                                                task=self.task, language=language)
+            self._tokenizer_language = language
+        outputs = self.pipeline(({"inputs": chunk} for chunk in chunks), batch_size=len(chunks), num_workers=0)
+        texts = []
+        for output in outputs:
+            text = output["text"]
+            # A batch of one comes back as a one-element list
+            texts.append(text[0] if isinstance(text, list) else text)
+        return texts
+
+
+class BatchTranscriber:
+    """
+    Pools chunks of many files and runs them in full, same-language batches.
+
+    `add(key, audio)` queues a file; `finish()` flushes the partial
+    batches. `on_result(key, result)` is called as soon as the last chunk
+    of a file is back, with a WhisperX-shaped result dict.
+    """
+
+    def __init__(self, model, batch_size=16, language=None, on_result=None):
+        self.model = model
+        self.batch_size = batch_size
+        self.language = language
+        self.on_result = on_result
+        self.pools = defaultdict(list)  # language -> [(key, start, end, samples)]
+        self.pending = {}  # key -> {"language", "remaining", "segments"}
+        self.results = {}
+        self.batch_sizes = []
+        self.chunk_counts = []
+
+    def add(self, key, audio):
+        language = self.language or self.model.detect_language(audio)
+        chunks = chunk_audio(audio)
+        self.chunk_counts.append(len(chunks))
+        self.pending[key] = {"language": language, "remaining": len(chunks), "segments": []}
+        if not chunks:
+            self._complete(key)
+        for start, end in chunks:
+            self.pools[language].append((key, start, end, audio[start:end]))
+        while len(self.pools[language]) >= self.batch_size:
+            self._run(language, self.batch_size)
+
+    def finish(self):
+        for language in list(self.pools):
+            while self.pools[language]:
+                self._run(language, min(self.batch_size, len(self.pools[language])))
+        return self.results
+
+    def _run(self, language, count):
+        batch, self.pools[language] = self.pools[language][:count], self.pools[language][count:]
+        texts = self.model.transcribe_batch([samples for _, _, _, samples in batch], language)
+        self.batch_sizes.append(len(batch))
+        # Demultiplex: chunk offsets put each text back on its own file's timeline
+        for (key, start, end, _), text in zip(batch, texts):
+            state = self.pending[key]
+            state["segments"].append({"text": text, "start": round(start / SAMPLE_RATE, 3), "end": round(end / SAMPLE_RATE, 3)})
+            state["remaining"] -= 1
+            if state["remaining"] == 0:
+                self._complete(key)
+
+    def _complete(self, key):
+        state = self.pending.pop(key)
+        result = {"segments": sorted(state["segments"], key=lambda segment: segment["start"]), "language": state["language"]}
+        self.results[key] = result
+        if self.on_result:
+            self.on_result(key, result)
+
+    def stats(self):
+        """Batch occupancy of this run and of batching every file on its own."""
+        chunks = sum(self.batch_sizes)
+        per_file_batches = sum(math.ceil(count / self.batch_size) for count in self.chunk_counts)
+        return {
+            "files": len(self.chunk_counts),
+            "chunks": chunks,
+            "batches": len(self.batch_sizes),
+            "occupancy": chunks / (len(self.batch_sizes) * self.batch_size) if self.batch_sizes else 0.0,
+            "per_file_batches": per_file_batches,
+            "per_file_occupancy": chunks / (per_file_batches * self.batch_size) if per_file_batches else 0.0,
+        }
+
+
+def print_stats(stats, batch_size):
+    print(f"{stats['files']} files, {stats['chunks']} chunks, batch size {batch_size}")
+    print(f"  pooled:   {stats['batches']:5d} batches, {stats['occupancy'] * 100:5.1f}% occupancy")
+    print(f"  per file: {stats['per_file_batches']:5d} batches, {stats['per_file_occupancy'] * 100:5.1f}% occupancy")
+
+
+def save_initial_transcript(video_file, result):
+    from video_processor import output_paths
+
+    initial_json_output = output_paths(video_file)["initial_json"]
+    with open(initial_json_output, "w", encoding="utf-8") as f:
+        json.dump(result, f, ensure_ascii=False, indent=2)
+    logging.info(f"Initial transcript saved to {initial_json_output}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Transcribe many files with batches shared across files.")
+    parser.add_argument("inputs", nargs="*", help="Media files or directories")
+    parser.add_argument("--batch-size", type=int, help="Default: from the execution profile")
+    parser.add_argument("--language", help="Skip detection and transcribe every file in this language")
+    parser.add_argument("--device", choices=["cuda", "cpu"], help="Default: CUDA if available, else CPU")
+    args = parser.parse_args(argv)
+
+    if not args.inputs:
+        parser.print_help()
+        return 1
+
+    logging.basicConfig(stream=sys.stderr, level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    import whisperx
+    from video_processor import ModelCache
+    from device_profile import detect_profile
+    from worker_pool import find_media
+
+    models = ModelCache.from_profile(detect_profile(args.device), os.environ.get("HF_TOKEN"))
+    batch_size = args.batch_size or models.batch_size
+    transcriber = BatchTranscriber(WhisperBatchAdapter(models.asr_model()), batch_size=batch_size,
+                                   language=args.language, on_result=save_initial_transcript)
+    started = time.perf_counter()
+    for video_file in find_media(args.inputs):
+        logging.info(f"Queueing {video_file}")
+        transcriber.add(video_file, whisperx.load_audio(video_file))
+    transcriber.finish()
+    print_stats(transcriber.stats(), batch_size)
+    print(f"  finished in {time.perf_counter() - started:.1f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,61 @@
+"""
+Compares the file size and write time of the per-speaker style output and
+the --inline-colors output for a synthetic transcript, and the libass render
+time of each file through FFmpeg if it is installed.
+
+Usage:
+    python benchmarks/bench_ass_from_json.py [--speakers 8] [--segments 2000]
+"""
+
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+from subprocess import run
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ass_from_json import write_ass
+from synthetic import synthetic_result
+from video_processor import subtitles_filter
+
+
+def benchmark(directory, speakers=8, segment_count=2000):
+    result = synthetic_result(segment_count, speakers=speakers)
+    duration = result["segments"][-1]["end"]
+    for name, inline_colors in (("style table", False), ("inline colors", True)):
+        ass_path = os.path.join(directory, f"{name.replace(' ', '_')}.ass")
+        started = time.perf_counter()
+        write_ass([dict(segment) for segment in result["segments"]], ass_path, inline_colors)
+        write_seconds = time.perf_counter() - started
+        with open(ass_path, "r", encoding="utf-8") as f:
+            lines = [line for line in f if line.startswith("Dialogue:")]
+        report = (f"{name:<14} {os.path.getsize(ass_path) / 1024:8.0f} KiB, "
+                  f"{sum(map(len, lines)) / len(lines):5.1f} chars per event, written in {write_seconds * 1000:.0f} ms")
+        if shutil.which("ffmpeg"):
+            # Render onto a small blank video and discard the frames: parse plus rasterization
+            command = ["ffmpeg", "-v", "error", "-f", "lavfi", "-i", f"color=c=black:s=640x360:r=5:d={duration:.0f}",
+                       "-vf", subtitles_filter(ass_path), "-f", "null", "-"]
+            started = time.perf_counter()
+            run(command, check=True, capture_output=True)
+            report += f", rendered in {time.perf_counter() - started:.1f}s"
+        print(report)
+    if not shutil.which("ffmpeg"):
+        print("FFmpeg not found; render times skipped.")
+    print(f"{speakers} speakers, {sum(len(segment['words']) for segment in result['segments'])} word events, "
+          f"{duration / 3600:.1f} h")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the two ASS outputs.")
+    parser.add_argument("--speakers", type=int, default=8)
+    parser.add_argument("--segments", type=int, default=2000)
+    args = parser.parse_args(argv)
+    with tempfile.TemporaryDirectory(prefix="ass_bench_") as directory:
+        benchmark(directory, args.speakers, args.segments)
+
+
+if __name__ == "__main__":
+    main()
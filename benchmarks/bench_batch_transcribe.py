@@ -0,0 +1,61 @@
+"""
+Runs short synthetic clips in two languages through BatchTranscriber with
+the stub model and compares the batch occupancy of pooling chunks across
+files with batching every file on its own.
+
+Usage:
+    python benchmarks/bench_batch_transcribe.py [--files 200] [--batch-size 16]
+"""
+
+import os
+import sys
+import time
+import argparse
+from collections import defaultdict
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from batch_transcribe import BatchTranscriber, print_stats
+from stub_model import StubBatchModel
+from synthetic import synthetic_recording
+
+
+def synthetic_clip(rng, seed):
+    """A 20-60 s clip of 2-12 s utterances with 1-3 s pauses."""
+    seconds = rng.uniform(20.0, 60.0)
+    spans, position = [], 0.5
+    while position < seconds - 4.0:
+        length = rng.uniform(2.0, 12.0)
+        spans.append((position, min(position + length, seconds - 0.5)))
+        position += length + rng.uniform(1.0, 3.0)
+    return synthetic_recording(spans, seconds, seed=seed)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure cross-file batch occupancy with a stub model.")
+    parser.add_argument("--files", type=int, default=200)
+    parser.add_argument("--batch-size", type=int, default=16)
+    args = parser.parse_args(argv)
+
+    rng = np.random.default_rng(0)
+    clips = [synthetic_clip(rng, seed) for seed in range(args.files)]
+    model = StubBatchModel(languages=("en", "de"))
+    transcriber = BatchTranscriber(model, batch_size=args.batch_size)
+    started = time.perf_counter()
+    for key, audio in enumerate(clips):
+        transcriber.add(key, audio)
+    transcriber.finish()
+    elapsed = time.perf_counter() - started
+
+    print_stats(transcriber.stats(), args.batch_size)
+    chunks_by_language = defaultdict(int)
+    for language, size in model.batches:
+        chunks_by_language[language] += size
+    print("  chunks by language: " + ", ".join(f"{language}: {count}" for language, count in sorted(chunks_by_language.items())))
+    print(f"  chunking and scheduling took {elapsed:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Checks the CPU profile of device_profile.detect_profile() against a stub
+model: measures the throughput for thread counts from 1 to the core count
+and batch sizes from 1 to MAX_BATCH_SIZE, and reports whether the chosen
+pair is within 10% of the best one.
+
+Usage:
+    python benchmarks/bench_device_profile.py [--seconds 1.0]
+"""
+
+import os
+import sys
+import time
+import argparse
+
+# One BLAS thread per worker thread, so only our pool decides the parallelism; before numpy is imported
+for variable in ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS"):
+    os.environ[variable] = "1"
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from device_profile import MAX_BATCH_SIZE, detect_profile
+from stub_model import stub_inference, stub_items
+
+
+def throughput(items, threads, batch_size, seconds):
+    """Stub items per second with `threads` workers each running batches of `batch_size`."""
+    from concurrent.futures import ThreadPoolExecutor
+
+    batches = [items[i:i + batch_size] for i in range(0, len(items), batch_size)]
+    done, started = 0, time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        while time.perf_counter() - started < seconds:
+            done += sum(pool.map(stub_inference, batches))
+    return done / (time.perf_counter() - started)
+
+
+def benchmark(profile, seconds_per_setting=1.0):
+    """Returns True if the profile's (threads, batch size) reaches 90% of the best throughput."""
+    items = stub_items(256)
+    cores = profile["cores"]
+    thread_counts = sorted({1, 2, 4, 8, 16, 32, 64, cores, profile["threads"]} & set(range(1, cores + 1)))
+    batch_sizes = sorted({1 << i for i in range(MAX_BATCH_SIZE.bit_length())} | {profile["batch_size"]})
+    chosen_setting = (profile["threads"], profile["batch_size"])
+
+    results = {}
+    for threads in thread_counts:
+        for batch_size in batch_sizes:
+            rate = results[threads, batch_size] = throughput(items, threads, batch_size, seconds_per_setting)
+            marker = "  <- chosen" if (threads, batch_size) == chosen_setting else ""
+            print(f"  threads={threads:3d} batch={batch_size:2d}: {rate:8.1f} items/s{marker}")
+
+    best_setting = max(results, key=results.get)
+    best, chosen = results[best_setting], results[chosen_setting]
+    verdict = "OK" if chosen >= 0.9 * best else "SUBOPTIMAL"
+    print(f"{verdict}: threads={chosen_setting[0]} batch={chosen_setting[1]} reaches {100 * chosen / best:.0f}% "
+          f"of the best throughput (threads={best_setting[0]} batch={best_setting[1]})")
+    return chosen >= 0.9 * best
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Verify the CPU profile's thread and batch choice with a stub model.")
+    parser.add_argument("--seconds", type=float, default=1.0, help="Measuring time per setting")
+    args = parser.parse_args(argv)
+
+    profile = detect_profile(device="cpu")
+    for key, value in profile.items():
+        print(f"{key}: {value}")
+    return 0 if benchmark(profile, args.seconds) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,71 @@
+"""
+Measures the fingerprint indexing speed on synthetic audio and how an
+exact, a re-encoded, a trimmed and an unrelated recording are matched.
+
+Usage:
+    python benchmarks/bench_fingerprint.py [--files 30] [--seconds 180]
+"""
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fingerprint import SAMPLE_RATE, FingerprintIndex
+from synthetic import synthetic_program
+
+
+def benchmark(directory, file_count=30, seconds=180.0):
+    with FingerprintIndex(os.path.join(directory, "fp.db")) as index:
+        originals = {}
+        fingerprint_seconds = 0.0
+        for i in range(file_count):
+            path = os.path.join(directory, f"recording{i:03d}.wav")
+            open(path, "wb").close()  # The index only stats the file
+            originals[path] = synthetic_program(seconds, seed=i)
+            started = time.perf_counter()
+            index.add_file(path, originals[path])
+            fingerprint_seconds += time.perf_counter() - started
+        stats = index.stats()
+        print(f"Indexed {stats['files']} files ({file_count * seconds / 60:.0f} min of audio, {stats['hashes']:,} hashes) "
+              f"at {file_count * seconds / fingerprint_seconds:.0f}x real time")
+
+        rng = np.random.default_rng(1)
+        source = originals[os.path.join(directory, f"recording{min(7, file_count - 1):03d}.wav")]
+        trim_start, trim_end = seconds * 0.2, seconds * 0.1
+        cases = {
+            "exact copy": (source, 0.0),
+            # Level change plus added noise, as after a lossy re-encode
+            "re-encoded copy": ((source * 0.7 + rng.normal(0.0, 0.01, len(source))).astype(np.float32), 0.0),
+            "trimmed copy": (source[int(trim_start * SAMPLE_RATE):-int(trim_end * SAMPLE_RATE)], trim_start),
+            "unrelated": (synthetic_program(seconds, seed=999), None),
+        }
+        for name, (audio, expected_offset) in cases.items():
+            started = time.perf_counter()
+            matches = index.match(audio)
+            elapsed = (time.perf_counter() - started) * 1000
+            if matches:
+                best = matches[0]
+                print(f"  {name:<16} -> {os.path.basename(best['path'])} at {best['offset']:+.2f}s "
+                      f"(expected {'none' if expected_offset is None else f'{expected_offset:+.2f}s'}), "
+                      f"score {best['score']:.2f}, {elapsed:.0f} ms")
+            else:
+                print(f"  {name:<16} -> no match (expected {'none' if expected_offset is None else 'a match'}), {elapsed:.0f} ms")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark audio fingerprint indexing and matching.")
+    parser.add_argument("--files", type=int, default=30)
+    parser.add_argument("--seconds", type=float, default=180.0, help="Length of each synthetic recording")
+    args = parser.parse_args(argv)
+    with tempfile.TemporaryDirectory(prefix="fingerprint_bench_") as directory:
+        benchmark(directory, args.files, args.seconds)
+
+
+if __name__ == "__main__":
+    main()
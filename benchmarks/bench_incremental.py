@@ -0,0 +1,106 @@
+"""
+Compares a full re-burn with incremental regeneration after a one-word
+edit of the transcript.
+
+Without FFmpeg only the share of the video that would be re-encoded is
+reported, for a GOP length of --gop seconds. With FFmpeg a test video of
+--minutes minutes is encoded with that GOP length, subtitled once, and
+then both a full re-burn and incremental.regenerate are timed.
+
+Usage:
+    python benchmarks/bench_incremental.py [--minutes 10] [--gop 2]
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+from subprocess import run
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ass_from_json import ass_events, write_ass
+from incremental import collect_cues, diff_cues, gop_ranges, load_segments, probe_keyframes, regenerate, save_rendered
+from synthetic import synthetic_result
+from video_processor import burn_subtitles, output_paths
+
+
+def one_word_edit(result):
+    """Changes one word in the middle of the transcript, in place."""
+    segment = result["segments"][len(result["segments"]) // 2]
+    word = next(word for word in segment["words"] if "start" in word)
+    segment["text"] = segment["text"].replace(word["word"], word["word"].upper(), 1)
+    word["word"] = word["word"].upper()
+
+
+def transcript_for(minutes, seed=0):
+    """A synthetic transcript cut to `minutes` of speech."""
+    result = synthetic_result(segment_count=max(1, int(minutes * 12)), seed=seed)
+    result["segments"] = [segment for segment in result["segments"] if segment["end"] < minutes * 60]
+    return result
+
+
+def estimate(directory, minutes, gop):
+    result = transcript_for(minutes)
+    json_path = os.path.join(directory, "talk_final.json")
+    with open(json_path, "w", encoding="utf-8") as f:
+        json.dump(result, f)
+    old = load_segments(json_path)
+    one_word_edit(result)
+    with open(json_path, "w", encoding="utf-8") as f:
+        json.dump(result, f)
+    new = load_segments(json_path)
+
+    duration = minutes * 60.0
+    keyframes = [i * gop for i in range(int(duration // gop) + 1)]
+    changed = diff_cues(collect_cues(old, ass_events), collect_cues(new, ass_events))
+    reencoded = sum(end - start for start, end in gop_ranges(changed, keyframes, duration))
+    print(f"One-word edit: {len(changed)} changed range(s), {reencoded:.1f}s of {duration:.0f}s to re-encode "
+          f"({reencoded / duration * 100:.2f}% of a full re-burn) with {gop:g}s GOPs")
+
+
+def measure(directory, minutes, gop):
+    video = os.path.join(directory, "talk.mp4")
+    run(["ffmpeg", "-v", "error", "-f", "lavfi", "-i", f"testsrc=s=1280x720:r=25:d={minutes * 60}",
+         "-f", "lavfi", "-i", f"sine=f=440:d={minutes * 60}", "-c:v", "libx264", "-g", str(int(gop * 25)),
+         "-c:a", "aac", "-shortest", "-y", video], check=True)
+    paths = output_paths(video)
+    result = transcript_for(minutes)
+    with open(paths["final_json"], "w", encoding="utf-8") as f:
+        json.dump(result, f)
+    write_ass(load_segments(paths["final_json"]), paths["ass"])
+    started = time.perf_counter()
+    burn_subtitles(video, paths["ass"], paths["video"])
+    full_seconds = time.perf_counter() - started
+    save_rendered(paths["final_json"], paths["rendered_json"], "final_json", False)
+    keyframes, duration = probe_keyframes(paths["video"])
+
+    one_word_edit(result)
+    with open(paths["final_json"], "w", encoding="utf-8") as f:
+        json.dump(result, f)
+    started = time.perf_counter()
+    summary = regenerate(video)
+    incremental_seconds = time.perf_counter() - started
+    print(f"{duration / 60:.0f} min video, {len(keyframes)} keyframes: full re-burn {full_seconds:.1f}s, "
+          f"one-word fix {incremental_seconds:.1f}s ({summary['mode']}, "
+          f"{summary.get('reencoded_seconds', 0.0):.1f}s re-encoded)")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark incremental regeneration against a full re-burn.")
+    parser.add_argument("--minutes", type=float, default=10.0, help="Length of the test video")
+    parser.add_argument("--gop", type=float, default=2.0, help="Seconds between keyframes")
+    args = parser.parse_args(argv)
+    with tempfile.TemporaryDirectory(prefix="incremental_bench_") as directory:
+        estimate(directory, args.minutes, args.gop)
+        if shutil.which("ffmpeg") and shutil.which("ffprobe"):
+            measure(directory, args.minutes, args.gop)
+        else:
+            print("FFmpeg not found; encoding times skipped.")
+
+
+if __name__ == "__main__":
+    main()
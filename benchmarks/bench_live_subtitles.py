@@ -0,0 +1,42 @@
+"""
+Replays a generated speech-like recording in real time through the live
+transcriber with the stub model and reports the speech-to-cue latency.
+
+Usage:
+    python benchmarks/bench_live_subtitles.py [--seconds 120] [--max-latency 6]
+"""
+
+import os
+import sys
+import queue
+import argparse
+import tempfile
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from live_subtitles import CueWriter, LiveTranscriber, latency_report, replay_wav, run_live
+from stub_model import StubModel
+from synthetic import write_synthetic_wav
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure live subtitle latency on a generated recording.")
+    parser.add_argument("--seconds", type=float, default=120.0, help="Length of the generated recording")
+    parser.add_argument("--step", type=float, default=1.0)
+    parser.add_argument("--stability-margin", type=float, default=1.5)
+    parser.add_argument("--max-latency", type=float, default=6.0)
+    args = parser.parse_args(argv)
+
+    transcriber = LiveTranscriber(StubModel(), step_seconds=args.step, stability_margin=args.stability_margin,
+                                  max_latency=args.max_latency, batch_size=1)
+    chunks = queue.Queue()
+    with tempfile.TemporaryDirectory(prefix="live_") as directory, open(os.devnull, "w") as cues:
+        wav_path = write_synthetic_wav(os.path.join(directory, "synthetic.wav"), args.seconds)
+        threading.Thread(target=replay_wav, args=(wav_path, chunks), daemon=True).start()
+        latencies = run_live(transcriber, chunks, CueWriter(cues))
+    print(latency_report(latencies, args.max_latency))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Measures the build throughput, the no-change update time and the query
+latency of the transcript search index on synthetic transcripts.
+
+Usage:
+    python benchmarks/bench_search_index.py [--files 100] [--segments 400]
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from search_index import SearchIndex
+from synthetic import synthetic_result
+
+VOCABULARY = ["the", "subtitle", "pipeline", "und", "größer", "speaker", "twenty", "okay", "über", "meeting"]
+
+
+def benchmark(directory, file_count=100, segments_per_file=400, queries=200):
+    for i in range(file_count):
+        result = synthetic_result(segment_count=segments_per_file, seed=i)
+        with open(os.path.join(directory, f"talk{i:04d}_final.json"), "w", encoding="utf-8") as f:
+            json.dump(result, f, ensure_ascii=False)
+
+    with SearchIndex(os.path.join(directory, "index.db")) as index:
+        started = time.perf_counter()
+        indexed, postings = index.update([directory])
+        build = time.perf_counter() - started
+        print(f"Indexed {indexed} files, {postings:,} postings in {build:.2f}s "
+              f"({indexed / build:.1f} files/s, {postings / build:,.0f} postings/s)")
+
+        started = time.perf_counter()
+        index.update([directory])
+        print(f"Incremental update with no changes: {(time.perf_counter() - started) * 1000:.1f} ms")
+
+        rng = random.Random(0)
+        for kind, make_query in (
+            ("term", lambda: rng.choice(VOCABULARY)),
+            ("two terms", lambda: f"{rng.choice(VOCABULARY)} {rng.choice(VOCABULARY)}"),
+            ("phrase", lambda: f'"{rng.choice(VOCABULARY)} {rng.choice(VOCABULARY)} {rng.choice(VOCABULARY)}"'),
+        ):
+            latencies = []
+            for _ in range(queries):
+                query = make_query()
+                started = time.perf_counter()
+                index.search(query, limit=20)
+                latencies.append((time.perf_counter() - started) * 1000)
+            latencies.sort()
+            print(f"{kind:<10} p50 {latencies[len(latencies) // 2]:6.2f} ms   "
+                  f"p95 {latencies[int(len(latencies) * 0.95)]:6.2f} ms   max {latencies[-1]:6.2f} ms")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the transcript search index.")
+    parser.add_argument("--files", type=int, default=100)
+    parser.add_argument("--segments", type=int, default=400, help="Segments per transcript")
+    parser.add_argument("--queries", type=int, default=200, help="Queries per kind")
+    args = parser.parse_args(argv)
+    with tempfile.TemporaryDirectory(prefix="search_bench_") as directory:
+        benchmark(directory, args.files, args.segments, args.queries)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Measures the build time, point and range query latency and clip export
+time of TranscriptQuery against transcript length, next to a linear scan
+over the nested segment dicts.
+
+Usage:
+    python benchmarks/bench_transcript_query.py [--sizes 500 5000 50000]
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from transcript_query import TranscriptQuery
+from synthetic import synthetic_result
+
+
+def benchmark(directory, sizes=(500, 5000, 50000), queries=2000, seed=0):
+    rng = random.Random(seed)
+    for segment_count in sizes:
+        result = synthetic_result(segment_count, seed=seed)
+        started = time.perf_counter()
+        query = TranscriptQuery(result)
+        build_ms = (time.perf_counter() - started) * 1000
+        duration = query.duration
+
+        points = [rng.uniform(0.0, duration) for _ in range(queries)]
+        started = time.perf_counter()
+        for t in points:
+            query.at(t)
+        point_us = (time.perf_counter() - started) / queries * 1e6
+
+        started = time.perf_counter()
+        for t in points:
+            query.words_between(t, t + 30.0)
+        range_us = (time.perf_counter() - started) / queries * 1e6
+
+        # Linear scan over the nested dicts, which is what callers did before
+        started = time.perf_counter()
+        for t in points[:100]:
+            next((word for segment in result["segments"] for word in segment["words"]
+                  if word["start"] <= t < word["end"]), None)
+        scan_us = (time.perf_counter() - started) / 100 * 1e6
+
+        clip_start = duration / 2
+        export_ms = {}
+        for extension in ("ass", "srt"):
+            started = time.perf_counter()
+            query.export_clip(clip_start, clip_start + 60.0, os.path.join(directory, f"clip.{extension}"))
+            export_ms[extension] = (time.perf_counter() - started) * 1000
+        print(f"{segment_count:6d} segments ({duration / 3600:5.1f} h): built in {build_ms:6.1f} ms, "
+              f"at() {point_us:5.1f} us (linear scan {scan_us:8.1f} us), 30 s range {range_us:5.1f} us, "
+              f"60 s clip export ASS {export_ms['ass']:.2f} ms / SRT {export_ms['srt']:.2f} ms")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark time-indexed transcript queries.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[500, 5000, 50000], help="Segments per transcript")
+    parser.add_argument("--queries", type=int, default=2000)
+    args = parser.parse_args(argv)
+    with tempfile.TemporaryDirectory(prefix="query_bench_") as directory:
+        benchmark(directory, args.sizes, args.queries)
+
+
+if __name__ == "__main__":
+    main()
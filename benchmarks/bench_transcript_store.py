@@ -0,0 +1,67 @@
+"""
+Compares the size and load time of the binary .wxt transcript format, with
+each available compression, against pretty-printed JSON: a full load, and
+a read of ten segments from the middle.
+
+Usage:
+    python benchmarks/bench_transcript_store.py [--segments 2000]
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from transcript_store import BINARY_EXTENSION, BinaryTranscript, _zstd, read_transcript, write_transcript
+from synthetic import synthetic_result
+
+
+def timed(function, repeats=5):
+    """Best of `repeats` wall times in ms."""
+    best = float("inf")
+    for _ in range(repeats):
+        started = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - started)
+    return best * 1000
+
+
+def benchmark(directory, segment_count=2000):
+    result = synthetic_result(segment_count)
+    json_path = os.path.join(directory, "bench_final.json")
+    with open(json_path, "w", encoding="utf-8") as f:
+        json.dump(result, f, ensure_ascii=False, indent=2)
+
+    json_size = os.path.getsize(json_path)
+    json_full = timed(lambda: read_transcript(json_path))
+    print(f"{'format':<14}{'size':>12}{'ratio':>8}{'full load':>12}{'10 segments':>14}")
+    print(f"{'json indent=2':<14}{json_size:>12,}{1.0:>8.2f}{json_full:>10.1f}ms{json_full:>12.1f}ms")
+
+    middle = segment_count // 2
+    for compression in ["none", "gzip"] + (["zstd"] if _zstd() else []):
+        path = os.path.join(directory, f"bench_{compression}{BINARY_EXTENSION}")
+        write_transcript(result, path, compression)
+        size = os.path.getsize(path)
+        full = timed(lambda: read_transcript(path))
+
+        def range_read():
+            with BinaryTranscript(path) as transcript:
+                transcript.segments(middle, middle + 10)
+        ranged = timed(range_read)
+        print(f"{'wxt ' + compression:<14}{size:>12,}{json_size / size:>8.2f}{full:>10.1f}ms{ranged:>12.1f}ms")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare .wxt and JSON transcripts.")
+    parser.add_argument("--segments", type=int, default=2000, help="Segments in the synthetic transcript")
+    args = parser.parse_args(argv)
+    with tempfile.TemporaryDirectory(prefix="wxt_bench_") as directory:
+        benchmark(directory, args.segments)
+
+
+if __name__ == "__main__":
+    main()
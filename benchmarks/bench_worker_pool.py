@@ -0,0 +1,62 @@
+"""
+Runs the worker pool's core-count sweep with a CPU-bound stand-in for the
+pipeline: each "file" costs matmuls in proportion to its media length, so
+the real-time factor per core count shows how well the pool scales without
+models or media files.
+
+Usage:
+    python benchmarks/bench_worker_pool.py [--files 24] [--core-counts 1,2,4]
+"""
+
+import os
+import sys
+import random
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from device_profile import available_memory_gb, usable_cores
+from worker_pool import default_workers, lpt_makespan, print_summary, run_pool
+from stub_model import stub_inference, stub_items
+
+# Stub work per second of media; about 20 ms of single-core CPU time
+STUB_ITEMS_PER_MEDIA_SECOND = 16
+
+
+def stub_process(path, duration):
+    """Stand-in for the pipeline run of one file."""
+    items = stub_items(STUB_ITEMS_PER_MEDIA_SECOND)
+    for _ in range(int(duration)):
+        stub_inference(items)
+    return True
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the worker pool with a stand-in for the pipeline.")
+    parser.add_argument("--files", type=int, default=24)
+    parser.add_argument("--min-seconds", type=float, default=20.0, help="Shortest media length")
+    parser.add_argument("--max-seconds", type=float, default=60.0, help="Longest media length")
+    parser.add_argument("--core-counts", help="Comma-separated core counts (default: 1, 2, 4, ... up to all cores)")
+    parser.add_argument("--threads-per-worker", type=int, default=2)
+    args = parser.parse_args(argv)
+
+    rng = random.Random(0)
+    durations = {f"clip{i:03d}.wav": rng.uniform(args.min_seconds, args.max_seconds) for i in range(args.files)}
+    total_cores = usable_cores()
+    if args.core_counts:
+        core_counts = sorted({min(int(n), total_cores) for n in args.core_counts.split(",")})
+    else:
+        core_counts = sorted({1 << i for i in range(total_cores.bit_length())} | {total_cores})
+
+    summaries = []
+    for cores in core_counts:
+        workers = min(default_workers(cores, available_memory_gb(), args.threads_per_worker), cores, len(durations))
+        print(f"{cores} cores, {workers} workers (LPT bound: {lpt_makespan(durations, workers):.0f}s of media on the busiest worker)")
+        summaries.append(run_pool(durations, workers, cores, batch_size=1, process=stub_process))
+    print()
+    for summary in summaries:
+        print_summary(summary)
+
+
+if __name__ == "__main__":
+    main()
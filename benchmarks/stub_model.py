@@ -0,0 +1,93 @@
+"""
+Stand-ins for the Whisper model, shared by the tests and the benchmarks:
+a CPU-bound batched pass for measuring thread, batch and worker choices,
+an energy-based transcriber for the live subtitle latency, and a batch
+model that records how full the cross-file batches were.
+"""
+
+import time
+import functools
+
+import numpy as np
+
+from speech_prepass import SAMPLE_RATE, frame_energy_db, _runs
+
+STUB_DIM = 192
+
+
+@functools.lru_cache(maxsize=None)
+def stub_weights():
+    return (np.random.default_rng(1).standard_normal((STUB_DIM, STUB_DIM)) / STUB_DIM ** 0.5).astype(np.float32)
+
+
+def stub_items(count, seed=0):
+    """Inputs for stub_inference: speech chunks of 75-100% of the maximum length, as VAD merging yields."""
+    rng = np.random.default_rng(seed)
+    return [rng.standard_normal((int(rng.integers(STUB_DIM * 3 // 4, STUB_DIM + 1)), STUB_DIM)).astype(np.float32)
+            for _ in range(count)]
+
+
+def stub_inference(batch, decode_steps=24):
+    """
+    Stand-in for one batched Whisper pass (BLAS releases the GIL). The
+    encoder runs over the batch padded to its longest item; each decoding
+    step then handles the whole batch in one small matmul, so the per-step
+    overhead is paid once per batch and the padding once per item.
+    """
+    weights = stub_weights()
+    hidden = np.zeros((len(batch), max(len(item) for item in batch), STUB_DIM), np.float32)
+    for i, item in enumerate(batch):
+        hidden[i, :len(item)] = item
+    for _ in range(3):
+        hidden = np.tanh(hidden @ weights)
+    state = hidden.mean(axis=1)
+    for _ in range(decode_steps):
+        state = np.tanh(state @ weights)
+    return len(batch)
+
+
+class StubModel:
+    """
+    Stands in for the Whisper model when measuring latency: every stretch of
+    audio above `threshold_db` becomes one segment, and decoding takes
+    `rtf` seconds per second of audio.
+    """
+
+    def __init__(self, rtf=0.15, threshold_db=-40.0):
+        self.rtf = rtf
+        self.threshold_db = threshold_db
+
+    def transcribe(self, audio, batch_size=None, language=None):
+        time.sleep(len(audio) / SAMPLE_RATE * self.rtf)
+        frame_length = SAMPLE_RATE * 30 // 1000
+        frame_seconds = frame_length / SAMPLE_RATE
+        segments = []
+        if len(audio) >= frame_length:
+            starts, ends = _runs(frame_energy_db(audio, frame_length) > self.threshold_db)
+            segments = [
+                {"start": start * frame_seconds, "end": end * frame_seconds,
+                 "text": f" speech {start * frame_seconds:.1f}-{end * frame_seconds:.1f}"}
+                for start, end in zip(starts, ends)
+            ]
+        return {"segments": segments, "language": language or "en"}
+
+
+class StubBatchModel:
+    """
+    Stand-in with the adapter's interface that records how full each batch
+    was. Files are "detected" as the language in `languages` (cycled by call).
+    """
+
+    def __init__(self, languages=("en",)):
+        self.languages = languages
+        self.batches = []  # (language, chunks in batch)
+        self._calls = 0
+
+    def detect_language(self, audio):
+        language = self.languages[self._calls % len(self.languages)]
+        self._calls += 1
+        return language
+
+    def transcribe_batch(self, chunks, language):
+        self.batches.append((language, len(chunks)))
+        return [f" [{language} {len(chunk) / SAMPLE_RATE:.1f}s]" for chunk in chunks]
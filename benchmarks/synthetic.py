@@ -0,0 +1,82 @@
+"""
+Synthetic audio and transcripts for the tests and the benchmarks, so they
+run without recordings.
+"""
+
+import wave
+
+import numpy as np
+
+from speech_prepass import SAMPLE_RATE
+
+BYTES_PER_SAMPLE = 2
+
+
+def synthetic_recording(speech_spans, total_seconds, sample_rate=SAMPLE_RATE, seed=0):
+    """
+    Builds a test signal: low background noise plus amplitude-modulated
+    harmonic bursts ("speech") at the given (start, end) spans in seconds.
+    """
+    rng = np.random.default_rng(seed)
+    audio = rng.normal(0.0, 0.002, int(total_seconds * sample_rate)).astype(np.float32)
+    for start, end in speech_spans:
+        t = np.arange(int((end - start) * sample_rate)) / sample_rate
+        syllables = 0.5 + 0.5 * np.sin(2 * np.pi * 4.0 * t) ** 2
+        voice = sum(np.sin(2 * np.pi * f * t) / k for k, f in enumerate((140.0, 280.0, 420.0, 560.0), start=1))
+        first = int(start * sample_rate)
+        audio[first:first + len(t)] += (0.2 * syllables * voice).astype(np.float32)
+    return audio
+
+
+def write_synthetic_wav(path, seconds=120.0, seed=0):
+    """Writes speech-like bursts separated by pauses, for replay tests without a recording."""
+    rng = np.random.default_rng(seed)
+    spans, position = [], 0.5
+    while position < seconds - 10.0:
+        length = rng.uniform(1.5, 9.0)
+        spans.append((position, position + length))
+        position += length + rng.uniform(0.3, 2.5)
+    audio = synthetic_recording(spans, seconds, seed=seed)
+    with wave.open(path, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(BYTES_PER_SAMPLE)
+        wav.setframerate(SAMPLE_RATE)
+        wav.writeframes((np.clip(audio, -1.0, 1.0) * 32767).astype("<i2").tobytes())
+    return path
+
+
+def synthetic_result(segment_count=2000, words_per_segment=12, seed=0, speakers=3):
+    """A transcript shaped like a two-hour WhisperX result with `speakers` speakers."""
+    rng = np.random.default_rng(seed)
+    vocabulary = ["the", "subtitle", "pipeline", "und", "größer", "speaker", "twenty", "okay", "über", "meeting"]
+    segments, position = [], 0.0
+    for _ in range(segment_count):
+        speaker = f"SPEAKER_{rng.integers(0, speakers):02d}"
+        words = []
+        for _ in range(words_per_segment):
+            start = round(position, 3)
+            position += float(rng.uniform(0.15, 0.6))
+            word = {"word": vocabulary[rng.integers(0, len(vocabulary))], "start": start,
+                    "end": round(position, 3), "score": round(float(rng.uniform(0.3, 1.0)), 3), "speaker": speaker}
+            if rng.random() < 0.02:  # Numerals and symbols often come back untimed
+                del word["start"], word["end"], word["score"]
+            words.append(word)
+        segments.append({"start": words[0].get("start", position), "end": round(position, 3),
+                         "text": " " + " ".join(word["word"] for word in words), "words": words, "speaker": speaker})
+        position += float(rng.uniform(0.2, 2.0))
+    return {"segments": segments, "language": "en"}
+
+
+def synthetic_program(seconds, seed=0):
+    """Test signal for fingerprinting: random harmonic notes over low noise, distinct per seed."""
+    rng = np.random.default_rng(seed)
+    audio = rng.normal(0.0, 0.002, int(seconds * SAMPLE_RATE)).astype(np.float32)
+    position = 0
+    while position < len(audio):
+        length = int(rng.uniform(0.08, 0.4) * SAMPLE_RATE)
+        t = np.arange(min(length, len(audio) - position)) / SAMPLE_RATE
+        base = rng.uniform(150.0, 1500.0)
+        note = sum(np.sin(2 * np.pi * base * k * t) / k for k in (1, 2, 3))
+        audio[position:position + len(t)] += (0.1 * note * np.hanning(len(t))).astype(np.float32)
+        position += length
+    return audio
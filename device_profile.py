@@ -0,0 +1,143 @@
+"""
+Runtime selection of device, compute type, batch size and thread counts.
+
+`detect_profile()` checks for a usable CUDA device and falls back to a CPU
+profile with int8 weights. Batch size and thread counts are derived from
+the GPU memory or from the usable cores and free RAM. Any value can be
+pinned by the caller or with the WHISPERX_DEVICE, WHISPERX_COMPUTE_TYPE,
+WHISPERX_BATCH_SIZE and WHISPERX_THREADS environment variables.
+
+With `concurrent_stages` the thread budget is divided among model stages
+that run at the same time (pipeline.py --parallel), so together they do
+not use more threads than there are cores.
+
+Run `python device_profile.py` to print the profile for this machine;
+benchmarks/bench_device_profile.py checks the CPU thread and batch choice
+against a stub model.
+"""
+
+import os
+import logging
+import argparse
+
+# Rough working-set sizes for large-v3, in GiB
+GPU_BASE_GB = 5.0          # float16 weights, alignment and diarization models
+GPU_PER_BATCH_ITEM_GB = 0.35
+CPU_BASE_GB = 3.0          # int8 weights, alignment and diarization models
+CPU_PER_BATCH_ITEM_GB = 0.25
+MAX_BATCH_SIZE = 16
+
+
+def usable_cores():
+    """Cores this process may run on (respects affinity masks and cgroups cpusets)."""
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:  # Not available on Windows or macOS
+        return os.cpu_count() or 1
+
+
+def available_memory_gb():
+    """Free physical memory in GiB, or None if it cannot be determined."""
+    try:
+        import psutil
+        return psutil.virtual_memory().available / 2 ** 30
+    except ImportError:
+        pass
+    try:
+        return os.sysconf("SC_AVPHYS_PAGES") * os.sysconf("SC_PAGE_SIZE") / 2 ** 30
+    except (AttributeError, ValueError, OSError):
+        return None
+
+
+def _cuda_info():
+    """Returns (name, total memory in GiB, compute capability) or None."""
+    try:
+        import torch
+    except ImportError:
+        return None
+    if not torch.cuda.is_available():
+        return None
+    properties = torch.cuda.get_device_properties(0)
+    return properties.name, properties.total_memory / 2 ** 30, (properties.major, properties.minor)
+
+
+def _power_of_two_at_most(value):
+    value = max(1, int(value))
+    return 1 << (value.bit_length() - 1)
+
+
+def cpu_batch_size(cores, memory_gb):
+    """Batch size for CPU inference, limited by both cores and free RAM."""
+    by_cores = max(1, cores // 2)
+    by_memory = MAX_BATCH_SIZE if memory_gb is None else (memory_gb - CPU_BASE_GB) / CPU_PER_BATCH_ITEM_GB
+    return _power_of_two_at_most(min(by_cores, by_memory, MAX_BATCH_SIZE))
+
+
+def detect_profile(device=None, compute_type=None, batch_size=None, threads=None, concurrent_stages=1):
+    """
+    Returns a dict describing how to run the models on this machine.
+    Arguments that are not None override the detected values.
+    `concurrent_stages` is how many model stages share the cores.
+    """
+    device = device or os.environ.get("WHISPERX_DEVICE")
+    compute_type = compute_type or os.environ.get("WHISPERX_COMPUTE_TYPE")
+    batch_size = batch_size or (int(os.environ["WHISPERX_BATCH_SIZE"]) if os.environ.get("WHISPERX_BATCH_SIZE") else None)
+    threads = threads or (int(os.environ["WHISPERX_THREADS"]) if os.environ.get("WHISPERX_THREADS") else None)
+
+    cores = usable_cores()
+    stage_cores = max(1, cores // concurrent_stages)
+    memory_gb = available_memory_gb()
+    cuda = _cuda_info() if device in (None, "cuda") else None
+    if device == "cuda" and cuda is None:
+        logging.warning("CUDA was requested but is not available; falling back to CPU.")
+
+    profile = {"cores": cores, "memory_gb": round(memory_gb, 1) if memory_gb is not None else None}
+    if cuda:
+        name, gpu_memory_gb, capability = cuda
+        profile.update(
+            device="cuda",
+            gpu=name,
+            gpu_memory_gb=round(gpu_memory_gb, 1),
+            # Pascal and older have no fast float16 path
+            compute_type=compute_type or ("float16" if capability >= (7, 0) else "int8_float16" if capability >= (6, 1) else "float32"),
+            batch_size=batch_size or _power_of_two_at_most(
+                min(MAX_BATCH_SIZE, (gpu_memory_gb - GPU_BASE_GB) / GPU_PER_BATCH_ITEM_GB)),
+            # The CPU only feeds the GPU and runs feature extraction
+            threads=threads or min(stage_cores, 4),
+        )
+    else:
+        profile.update(
+            device="cpu",
+            compute_type=compute_type or "int8",
+            batch_size=batch_size or cpu_batch_size(cores, memory_gb),
+            threads=threads or stage_cores,
+        )
+    return profile
+
+
+def apply_thread_limits(threads):
+    """
+    Caps the intra-op thread pools of torch and the BLAS libraries so the
+    alignment and diarization models do not oversubscribe the CPU.
+    """
+    for variable in ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS"):
+        os.environ.setdefault(variable, str(threads))
+    try:
+        import torch
+        torch.set_num_threads(threads)
+    except ImportError:
+        pass
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Show the automatically selected execution profile.")
+    parser.add_argument("--device", choices=["cuda", "cpu"], help="Force a device")
+    args = parser.parse_args(argv)
+
+    profile = detect_profile(device=args.device)
+    for key, value in profile.items():
+        print(f"{key}: {value}")
+
+
+if __name__ == "__main__":
+    main()
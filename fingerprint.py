@@ -0,0 +1,400 @@
+"""
+Audio fingerprints for finding repeated recordings before transcription.
+
+The decoded 16 kHz audio is turned into a log spectrogram, the strongest
+local maxima ("peaks") are kept, and every peak is paired with the next few
+peaks after it. Each pair becomes a hash of (anchor frequency, target
+frequency, frame distance) plus the anchor's frame. Peaks survive
+re-encoding, container changes and level changes, and pair hashes do not
+depend on where the recording starts, so a trimmed copy shares most hashes
+with the original.
+
+An SQLite index maps hashes to (file, frame). To match a recording, its
+hashes are looked up and the hits are counted per (file, frame difference);
+a real match piles up in one difference bin, which is also the time offset
+of the copy inside the original. The pipeline uses a match to reuse the
+original's transcripts, shifted by that offset, instead of transcribing.
+
+Usage:
+    python fingerprint.py add archive_fp.db D:/archive
+    python fingerprint.py match archive_fp.db upload.mp4
+
+benchmarks/bench_fingerprint.py measures indexing speed and matching on
+synthetic audio.
+"""
+
+import os
+import json
+import bisect
+import sqlite3
+import logging
+import argparse
+
+SAMPLE_RATE = 16000
+N_FFT = 1024
+HOP = 256
+# Peaks must be the maximum of this many frequency bins x frames around them
+PEAK_BINS = 15
+PEAK_FRAMES = 15
+PEAKS_PER_SECOND = 30
+# Each peak is paired with up to FAN_OUT later peaks at most MAX_PAIR_FRAMES away
+FAN_OUT = 5
+MAX_PAIR_FRAMES = 63
+# Frames per spectrogram block, to bound memory on long recordings
+BLOCK_FRAMES = 4096
+# A match needs this many hashes in one offset bin and this share of the query's hashes
+MIN_MATCHED = 20
+MIN_SCORE = 0.1
+# Slack in seconds when checking that the original covers the whole copy
+COVERAGE_SLACK = 1.0
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    id INTEGER PRIMARY KEY,
+    path TEXT UNIQUE NOT NULL,
+    mtime REAL NOT NULL,
+    size INTEGER NOT NULL,
+    duration REAL NOT NULL,
+    hash_count INTEGER NOT NULL
+);
+-- Clustered by hash: a lookup is one range scan
+CREATE TABLE IF NOT EXISTS hashes (
+    hash INTEGER NOT NULL,
+    file_id INTEGER NOT NULL,
+    frame INTEGER NOT NULL,
+    PRIMARY KEY (hash, file_id, frame)
+) WITHOUT ROWID;
+"""
+
+
+def frames_to_seconds(frames):
+    return frames * HOP / SAMPLE_RATE
+
+
+def _peaks(audio):
+    """(frame, bin) arrays of spectral peaks, sorted by frame, then bin."""
+    import numpy as np
+    from numpy.lib.stride_tricks import sliding_window_view
+
+    window = np.hanning(N_FFT).astype(np.float32)
+    frame_count = max(0, 1 + (len(audio) - N_FFT) // HOP)
+    margin = PEAK_FRAMES // 2
+    peaks_per_block = max(1, int(PEAKS_PER_SECOND * frames_to_seconds(BLOCK_FRAMES)))
+    frames, bins = [], []
+    for block_start in range(0, frame_count, BLOCK_FRAMES):
+        # Extra frames on both sides, so the neighbourhood test works at the block edges
+        first = max(0, block_start - margin)
+        last = min(frame_count, block_start + BLOCK_FRAMES + margin)
+        samples = audio[first * HOP:(last - 1) * HOP + N_FFT]
+        spectrum = np.abs(np.fft.rfft(sliding_window_view(samples, N_FFT)[::HOP] * window, axis=1))
+        log_spectrum = np.log10(spectrum + 1e-6)
+
+        # Separable maximum filter: along frequency, then along time
+        local_max = sliding_window_view(
+            np.pad(log_spectrum, ((0, 0), (PEAK_BINS // 2, PEAK_BINS // 2)), constant_values=-np.inf),
+            PEAK_BINS, axis=1).max(axis=2)
+        local_max = sliding_window_view(
+            np.pad(local_max, ((margin, margin), (0, 0)), constant_values=-np.inf),
+            PEAK_FRAMES, axis=0).max(axis=2)
+        # At least 20 dB above the block's median level, so background noise yields no peaks
+        is_peak = (log_spectrum == local_max) & (log_spectrum > np.median(log_spectrum) + 1.0)
+        is_peak[:, 0] = False  # DC
+
+        peak_frames, peak_bins = np.nonzero(is_peak)
+        peak_frames = peak_frames + first
+        inside = (peak_frames >= block_start) & (peak_frames < block_start + BLOCK_FRAMES)
+        peak_frames, peak_bins = peak_frames[inside], peak_bins[inside]
+        if len(peak_frames) > peaks_per_block:
+            strongest = np.argsort(log_spectrum[peak_frames - first, peak_bins])[-peaks_per_block:]
+            peak_frames, peak_bins = peak_frames[strongest], peak_bins[strongest]
+        frames.append(peak_frames)
+        bins.append(peak_bins)
+
+    if not frames:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+    frames, bins = np.concatenate(frames).astype(np.int64), np.concatenate(bins).astype(np.int64)
+    order = np.lexsort((bins, frames))
+    return frames[order], bins[order]
+
+
+def fingerprint(audio):
+    """
+    Pair hashes of 16 kHz mono `audio`. Returns (hashes, anchor frames),
+    two int64 numpy arrays of equal length.
+    """
+    import numpy as np
+
+    frames, bins = _peaks(audio)
+    hashes, anchors = [], []
+    # Peaks are sorted by frame, so the k-th following peak is a pair candidate
+    for k in range(1, FAN_OUT + 1):
+        distance = frames[k:] - frames[:-k]
+        valid = (distance > 0) & (distance <= MAX_PAIR_FRAMES)
+        # 10 bits per frequency bin (N_FFT // 2 + 1 bins), 6 bits for the distance
+        hashes.append((bins[:-k][valid] << 16) | (bins[k:][valid] << 6) | distance[valid])
+        anchors.append(frames[:-k][valid])
+    if not hashes:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+    return np.concatenate(hashes), np.concatenate(anchors)
+
+
+def load_audio(path):
+    import whisperx
+    return whisperx.load_audio(path)
+
+
+class FingerprintIndex:
+    """
+    Persistent hash index over media files. Use as a context manager or
+    call close().
+    """
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self.connection = sqlite3.connect(db_path)
+        self.connection.executescript(SCHEMA)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self.connection.commit()
+        self.connection.close()
+
+    def is_current(self, path):
+        """True if `path` is indexed with its current size and mtime."""
+        path = os.path.abspath(path)
+        stat = os.stat(path)
+        row = self.connection.execute("SELECT mtime, size FROM files WHERE path = ?", (path,)).fetchone()
+        return row is not None and row[0] == stat.st_mtime and row[1] == stat.st_size
+
+    def add_file(self, path, audio=None, force=False):
+        """
+        Indexes one media file (decoding it unless `audio` is given). Returns
+        the number of hashes stored, or 0 if the file was already current.
+        """
+        path = os.path.abspath(path)
+        if not force and self.is_current(path):
+            return 0
+        if audio is None:
+            audio = load_audio(path)
+        hashes, frames = fingerprint(audio)
+        # Sorted inserts append to the clustered index instead of splitting pages
+        rows = sorted(set(zip(hashes.tolist(), frames.tolist())))
+        stat = os.stat(path)
+        with self.connection:
+            self._delete(path)
+            cursor = self.connection.execute(
+                "INSERT INTO files (path, mtime, size, duration, hash_count) VALUES (?, ?, ?, ?, ?)",
+                (path, stat.st_mtime, stat.st_size, len(audio) / SAMPLE_RATE, len(rows)))
+            file_id = cursor.lastrowid
+            self.connection.executemany("INSERT INTO hashes (hash, file_id, frame) VALUES (?, ?, ?)",
+                                        ((h, file_id, frame) for h, frame in rows))
+        return len(rows)
+
+    def rename(self, old_path, new_path):
+        """Points the entry of a moved file at its new path (the mtime survives a move)."""
+        with self.connection:
+            self._delete(os.path.abspath(new_path))
+            self.connection.execute("UPDATE files SET path = ? WHERE path = ?",
+                                    (os.path.abspath(new_path), os.path.abspath(old_path)))
+
+    def remove_file(self, path):
+        with self.connection:
+            self._delete(os.path.abspath(path))
+
+    def _delete(self, path):
+        row = self.connection.execute("SELECT id FROM files WHERE path = ?", (path,)).fetchone()
+        if row:
+            self.connection.execute("DELETE FROM hashes WHERE file_id = ?", row)
+            self.connection.execute("DELETE FROM files WHERE id = ?", row)
+
+    def match(self, audio, exclude=None, limit=5):
+        """
+        Indexed files that share a time-aligned run of hashes with `audio`,
+        best first. Each match is a dict with "path", "offset" (seconds from
+        the original's start to where `audio` begins), "matched" hashes in
+        the offset bin, "score" (matched / hashes of `audio`), "duration"
+        of the original, and "covers" (the original contains all of `audio`).
+        """
+        hashes, frames = fingerprint(audio)
+        if len(hashes) == 0:
+            return []
+        exclude = os.path.abspath(exclude) if exclude else None
+        connection = self.connection
+        connection.execute("CREATE TEMP TABLE IF NOT EXISTS query (hash INTEGER NOT NULL, frame INTEGER NOT NULL)")
+        connection.execute("DELETE FROM query")
+        connection.executemany("INSERT INTO query (hash, frame) VALUES (?, ?)", zip(hashes.tolist(), frames.tolist()))
+        rows = connection.execute("""
+            SELECT h.file_id, h.frame - q.frame AS delta, COUNT(*)
+            FROM query q JOIN hashes h ON h.hash = q.hash
+            GROUP BY h.file_id, delta HAVING COUNT(*) > 1
+        """).fetchall()
+
+        # Peaks of a copy that is not trimmed on a hop boundary can land one frame off
+        bins = {(file_id, delta): count for file_id, delta, count in rows}
+        best = {}
+        for (file_id, delta), count in bins.items():
+            total = count + bins.get((file_id, delta - 1), 0) + bins.get((file_id, delta + 1), 0)
+            if total > best.get(file_id, (0, 0))[0]:
+                best[file_id] = (total, delta)
+
+        duration = len(audio) / SAMPLE_RATE
+        matches = []
+        for file_id, (matched, delta) in best.items():
+            score = matched / len(hashes)
+            if matched < MIN_MATCHED or score < MIN_SCORE:
+                continue
+            path, original_duration = connection.execute(
+                "SELECT path, duration FROM files WHERE id = ?", (file_id,)).fetchone()
+            if path == exclude:
+                continue
+            offset = round(frames_to_seconds(delta), 3)
+            matches.append({
+                "path": path,
+                "offset": offset,
+                "matched": matched,
+                "score": round(min(score, 1.0), 3),
+                "duration": original_duration,
+                "covers": offset >= -COVERAGE_SLACK and offset + duration <= original_duration + COVERAGE_SLACK,
+            })
+        matches.sort(key=lambda match: match["matched"], reverse=True)
+        return matches[:limit]
+
+    def stats(self):
+        files, hashes = self.connection.execute("SELECT COUNT(*), COALESCE(SUM(hash_count), 0) FROM files").fetchone()
+        return {"files": files, "hashes": hashes}
+
+
+# --- Transcript reuse ---
+
+def _shift_span(item, offset, duration):
+    """Moves a dict with "start"/"end" by -offset; None if it ends up outside [0, duration]."""
+    if "start" not in item or "end" not in item:
+        return dict(item)
+    start, end = item["start"] - offset, item["end"] - offset
+    if end <= 0 or start >= duration:
+        return None
+    shifted = dict(item)
+    shifted["start"] = round(max(start, 0.0), 3)
+    shifted["end"] = round(min(end, duration), 3)
+    return shifted
+
+
+def shift_transcript(result, offset, duration):
+    """
+    Copy of a WhisperX result moved onto the timeline of a copy that starts
+    `offset` seconds into the original and lasts `duration` seconds.
+    Segments and words outside the copy are dropped, and so are untimed
+    segments unless the timed segments around them are inside the copy.
+    """
+    timed = [i for i, segment in enumerate(result["segments"]) if "start" in segment and "end" in segment]
+    inside = {i for i in timed if _shift_span(result["segments"][i], offset, duration) is not None}
+    segments = []
+    for i, segment in enumerate(result["segments"]):
+        if "start" not in segment or "end" not in segment:
+            position = bisect.bisect_left(timed, i)
+            neighbours = timed[max(position - 1, 0):position + 1]
+            if not neighbours or not inside.issuperset(neighbours):
+                continue
+        shifted = _shift_span(segment, offset, duration)
+        if shifted is None:
+            continue
+        if "words" in segment:
+            words = [_shift_span(word, offset, duration) for word in segment["words"]]
+            # Untimed words stay with their segment
+            shifted["words"] = [word for word in words if word is not None]
+        segments.append(shifted)
+    shifted_result = dict(result, segments=segments)
+    shifted_result.pop("word_segments", None)
+    return shifted_result
+
+
+def shift_turns(turns, offset, duration):
+    shifted = (_shift_span(turn, offset, duration) for turn in turns)
+    return [turn for turn in shifted if turn is not None]
+
+
+def reuse_transcripts(match, paths, original_paths, duration):
+    """
+    Writes the matched original's transcripts, shifted onto the copy's
+    timeline, to the copy's `paths` (see video_processor.output_paths).
+    Intermediate files the original lacks are derived from its final
+    transcript. Files are written in pipeline order so their mtimes keep
+    the later stages fresh. Returns the artifacts written.
+    """
+    with open(original_paths["final_json"], "r", encoding="utf-8") as f:
+        final = json.load(f)
+    offset = match["offset"]
+    written = {}
+    for artifact in ("initial_json", "aligned_json", "diarization"):
+        if os.path.exists(original_paths[artifact]):
+            with open(original_paths[artifact], "r", encoding="utf-8") as f:
+                data = json.load(f)
+        elif artifact == "diarization":
+            data = [{"start": s["start"], "end": s["end"], "speaker": s["speaker"]}
+                    for s in final["segments"] if "speaker" in s and "start" in s and "end" in s]
+        else:
+            data = final
+        written[artifact] = shift_turns(data, offset, duration) if artifact == "diarization" \
+            else shift_transcript(data, offset, duration)
+    written["final_json"] = shift_transcript(final, offset, duration)
+    for artifact, data in written.items():
+        with open(paths[artifact], "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+    return list(written)
+
+
+def find_reusable(index, video_file, audio):
+    """
+    The best match for `audio` whose original covers it and has a final
+    transcript, or None.
+    """
+    from video_processor import output_paths
+
+    for match in index.match(audio, exclude=video_file):
+        if match["covers"] and os.path.exists(output_paths(match["path"])["final_json"]):
+            return match
+    return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Find repeated recordings with audio fingerprints.")
+    subparsers = parser.add_subparsers(dest="command")
+
+    add = subparsers.add_parser("add", help="Fingerprint new and changed media files")
+    add.add_argument("db")
+    add.add_argument("inputs", nargs="+", help="Media files or directories")
+
+    match = subparsers.add_parser("match", help="List indexed recordings that a media file is a copy of")
+    match.add_argument("db")
+    match.add_argument("files", nargs="+")
+    args = parser.parse_args(argv)
+
+    if args.command == "add":
+        from worker_pool import find_media
+
+        logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+        with FingerprintIndex(args.db) as index:
+            for path in find_media(args.inputs):
+                stored = index.add_file(path)
+                logging.info(f"{path}: {stored} hashes" if stored else f"{path}: up to date")
+            stats = index.stats()
+        print(f"Index holds {stats['files']} files ({stats['hashes']:,} hashes).")
+    elif args.command == "match":
+        with FingerprintIndex(args.db) as index:
+            for path in args.files:
+                matches = index.match(load_audio(path), exclude=path)
+                print(f"{path}: {len(matches)} match(es)")
+                for match in matches:
+                    print(f"  {match['path']}  offset {match['offset']:+.2f}s  score {match['score']:.2f}"
+                          f"{'' if match['covers'] else '  (partial overlap)'}")
+    else:
+        parser.print_help()
+
+
+if __name__ == "__main__":
+    main()
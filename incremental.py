@@ -0,0 +1,345 @@
+"""
+Incremental regeneration after `_final.json` was edited by hand.
+
+The pipeline keeps a copy of the transcript it last rendered
+(`<name>_final.rendered.json`), together with the options it was rendered
+with: which transcript the subtitles come from (`_final.json`, or the
+resegmented one of the stprocessor preset) and the ASS layout. This script
+diffs that copy against the current transcript at cue level, rewrites the
+ASS/SRT files only if their cues changed, and re-encodes only the GOPs of
+the subtitled video that contain changed cues. The re-encoded pieces are spliced into the previous
+output with FFmpeg's concat demuxer in stream-copy mode, so a one-word fix
+costs a few seconds of encoding instead of a full re-burn
+(benchmarks/bench_incremental.py compares the two).
+
+Usage:
+    python incremental.py D:/videos/talk.mp4
+"""
+
+import os
+import sys
+import json
+import shutil
+import logging
+import bisect
+import argparse
+import difflib
+from subprocess import run, CalledProcessError
+
+from ass_from_json import ASS_HEADER, ass_events, ass_header
+from srt_from_json import srt_cues, srt_path_for, write_srt
+from timing_repair import repair_word_timings
+from video_processor import AUDIO_EXTENSIONS, burn_subtitles, output_paths, subtitles_filter
+
+# Re-encode everything when more than this share of the video changed
+DEFAULT_MAX_FRACTION = 0.5
+# Options of snapshots written before they were recorded
+DEFAULT_RENDER_OPTIONS = {"subtitle_source": "final_json", "inline_colors": False}
+
+
+def load_segments(json_path):
+    with open(json_path, "r", encoding="utf-8") as f:
+        segments = json.load(f)["segments"]
+    # Same timings the writers render, so untimed words do not show up as changes
+    repair_word_timings(segments)
+    return segments
+
+
+def save_rendered(source_path, rendered_path, subtitle_source, inline_colors):
+    """Writes the snapshot of a rendered transcript and the options it was rendered with."""
+    with open(source_path, "r", encoding="utf-8") as f:
+        result = json.load(f)
+    result["render_options"] = {"subtitle_source": subtitle_source, "inline_colors": inline_colors}
+    with open(rendered_path, "w", encoding="utf-8") as f:
+        json.dump(result, f, ensure_ascii=False, indent=2)
+
+
+def render_options(rendered_path):
+    """The options of the last render, or the pipeline defaults when there is no snapshot."""
+    try:
+        with open(rendered_path, "r", encoding="utf-8") as f:
+            return dict(DEFAULT_RENDER_OPTIONS, **json.load(f).get("render_options", {}))
+    except FileNotFoundError:
+        return dict(DEFAULT_RENDER_OPTIONS)
+
+
+def collect_cues(segments, cue_generator):
+    return [cue for segment in segments for cue in cue_generator(segment)]
+
+
+def merge_ranges(ranges, gap=0.0):
+    """
+    Merges (start, end) ranges that overlap or are closer than `gap`.
+    """
+    merged = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1] + gap:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def diff_cues(old_cues, new_cues):
+    """
+    Compares two lists of (start, end, text) cues and returns the merged
+    time ranges touched by inserted, deleted or changed cues.
+    """
+    matcher = difflib.SequenceMatcher(None, [cue[2] for cue in old_cues], [cue[2] for cue in new_cues], autojunk=False)
+    changed = []
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == "equal":
+            continue
+        touched = old_cues[i1:i2] + new_cues[j1:j2]
+        changed.append((min(cue[0] for cue in touched), max(cue[1] for cue in touched)))
+    return merge_ranges(changed)
+
+
+def read_ass_header(ass_path):
+    """Everything before the first event of an existing ASS file, or None."""
+    try:
+        with open(ass_path, "r", encoding="utf-8") as ass_file:
+            text = ass_file.read()
+    except FileNotFoundError:
+        return None
+    first_event = text.find("\nDialogue:")
+    return text if first_event < 0 else text[:first_event + 1]
+
+
+def update_subtitles(old_segments, new_segments, ass_path, srt_path, inline_colors=False):
+    """
+    Rewrites the ASS and SRT files if their cues changed. Returns the changed
+    time ranges of the ASS file, which is the one burned into the video.
+    """
+    def events(segment):
+        return ass_events(segment, inline_colors)
+
+    old_ass = collect_cues(old_segments, events)
+    new_ass = collect_cues(new_segments, events)
+    ass_ranges = diff_cues(old_ass, new_ass)
+    header = ASS_HEADER if inline_colors else ass_header(new_segments)
+    if old_ass and read_ass_header(ass_path) not in (None, header):
+        # Styles changed (or the file predates the style table): every cue renders differently
+        cues = old_ass + new_ass
+        ass_ranges = [(min(cue[0] for cue in cues), max(cue[1] for cue in cues))]
+    if ass_ranges or not os.path.exists(ass_path):
+        with open(ass_path, "w", encoding="utf-8") as ass_file:
+            ass_file.write(header)
+            ass_file.writelines(cue[2] for cue in new_ass)
+        logging.info(f"Rewrote {ass_path}: {len(ass_ranges)} changed range(s)")
+
+    srt_ranges = diff_cues(collect_cues(old_segments, srt_cues), collect_cues(new_segments, srt_cues))
+    if srt_ranges or not os.path.exists(srt_path):
+        write_srt(new_segments, srt_path)
+        logging.info(f"Rewrote {srt_path}: {len(srt_ranges)} changed range(s)")
+    return ass_ranges
+
+
+# --- Video splicing ---
+
+def probe_keyframes(video_path):
+    """
+    Returns the sorted keyframe timestamps and the duration of the first
+    video stream, read from packet flags so nothing has to be decoded.
+    """
+    packets = run(
+        ["ffprobe", "-v", "error", "-select_streams", "v:0",
+         "-show_entries", "packet=pts_time,flags", "-of", "csv=p=0", video_path],
+        check=True, capture_output=True, text=True
+    ).stdout
+    keyframes = []
+    for line in packets.splitlines():
+        fields = line.split(",")
+        if len(fields) >= 2 and "K" in fields[1] and fields[0] not in ("", "N/A"):
+            keyframes.append(float(fields[0]))
+
+    duration = run(
+        ["ffprobe", "-v", "error", "-show_entries", "format=duration", "-of", "csv=p=0", video_path],
+        check=True, capture_output=True, text=True
+    ).stdout.strip()
+    return sorted(set(keyframes)), float(duration)
+
+
+def gop_ranges(changed_ranges, keyframes, duration):
+    """
+    Expands changed time ranges to whole GOPs. Returns merged
+    (start_keyframe, end_keyframe) pairs; end is `duration` for the last GOP.
+    """
+    expanded = []
+    for start, end in changed_ranges:
+        first = bisect.bisect_right(keyframes, start) - 1
+        last = bisect.bisect_right(keyframes, end)
+        gop_start = keyframes[first] if first >= 0 else 0.0
+        gop_end = keyframes[last] if last < len(keyframes) else duration
+        expanded.append((gop_start, gop_end))
+    return merge_ranges(expanded)
+
+
+def encode_range(video_file, ass_output, start, end, piece_path):
+    """
+    Burns the subtitles into [start, end) of the source and writes it as a
+    standalone piece starting at timestamp 0.
+    """
+    # Shift the frames back to source time for the subtitles filter, then to 0 again
+    video_filter = f"setpts=PTS+{start}/TB,{subtitles_filter(ass_output)},setpts=PTS-STARTPTS"
+    if os.path.splitext(video_file)[1].lower() in AUDIO_EXTENSIONS:
+        command = [
+            "ffmpeg",
+            "-f", "lavfi", "-i", "color=c=black:s=1280x720:r=25",
+            "-ss", f"{start}", "-t", f"{end - start}", "-i", os.path.abspath(video_file),
+            "-vf", video_filter,
+            "-c:v", "libx264",
+            "-c:a", "copy",
+            "-shortest",
+            "-y", piece_path
+        ]
+    else:
+        command = [
+            "ffmpeg",
+            "-ss", f"{start}", "-t", f"{end - start}", "-i", os.path.abspath(video_file),
+            "-vf", video_filter,
+            "-c:a", "copy",
+            "-y", piece_path
+        ]
+    run(command, check=True, capture_output=True, text=True)
+
+
+def _concat_path(path):
+    # The concat demuxer wants forward slashes, also on Windows
+    return os.path.abspath(path).replace("\\", "/")
+
+
+def concat_list(previous_output, pieces, duration):
+    """
+    The ffconcat script that plays untouched stretches of `previous_output`
+    between re-encoded pieces, given as sorted (start, end, piece_path) tuples.
+    """
+    previous_name = _concat_path(previous_output)
+    lines = ["ffconcat version 1.0"]
+    position = 0.0
+    for start, end, piece_path in pieces:
+        if start > position:
+            lines += [f"file '{previous_name}'", f"inpoint {position}", f"outpoint {start}"]
+        lines.append(f"file '{_concat_path(piece_path)}'")
+        position = end
+    if position < duration:
+        lines += [f"file '{previous_name}'", f"inpoint {position}"]
+    return "\n".join(lines) + "\n"
+
+
+def splice(previous_output, pieces, duration, output_path):
+    """
+    Concatenates untouched stretches of `previous_output` with re-encoded
+    pieces (see concat_list) without re-encoding anything else.
+    """
+    list_path = output_path + ".ffconcat"
+    with open(list_path, "w", encoding="utf-8") as f:
+        f.write(concat_list(previous_output, pieces, duration))
+    try:
+        run(["ffmpeg", "-f", "concat", "-safe", "0", "-i", list_path, "-c", "copy", "-y", output_path],
+            check=True, capture_output=True, text=True)
+    finally:
+        os.remove(list_path)
+
+
+def regenerate(video_file, max_fraction=DEFAULT_MAX_FRACTION, dry_run=False):
+    """
+    Brings the subtitles and the subtitled video in line with the edited
+    `_final.json`. Returns a summary dict.
+    """
+    paths = output_paths(video_file)
+    options = render_options(paths["rendered_json"])
+    source = options["subtitle_source"]
+    source_path = paths[source]
+    if source != "final_json" and not dry_run and (
+            not os.path.exists(source_path) or os.path.getmtime(source_path) < os.path.getmtime(paths["final_json"])):
+        # The subtitles come from a transcript derived from _final.json: bring it up to date first
+        from pipeline import run_pipeline
+        logging.info(f"Updating {source_path} from the edited transcript")
+        if run_pipeline(video_file, (source,), subtitle_source=source, log_file=paths["log"]) is None:
+            raise RuntimeError(f"Could not update {source_path}; see {paths['log']}")
+    new_segments = load_segments(source_path)
+
+    if not os.path.exists(paths["rendered_json"]):
+        logging.info("No rendered snapshot found; regenerating everything.")
+        old_segments = []
+    else:
+        old_segments = load_segments(paths["rendered_json"])
+
+    if dry_run:
+        def events(segment):
+            return ass_events(segment, options["inline_colors"])
+        changed = diff_cues(collect_cues(old_segments, events), collect_cues(new_segments, events))
+        return {"mode": "dry-run", "changed_ranges": changed}
+
+    srt_path = srt_path_for(source_path, os.path.dirname(video_file))
+    changed = update_subtitles(old_segments, new_segments, paths["ass"], srt_path, options["inline_colors"])
+    summary = {"changed_ranges": changed}
+
+    if not changed and os.path.exists(paths["video"]):
+        summary["mode"] = "unchanged"
+    elif not old_segments or not os.path.exists(paths["video"]):
+        burn_subtitles(video_file, paths["ass"], paths["video"])
+        summary["mode"] = "full"
+    else:
+        keyframes, duration = probe_keyframes(paths["video"])
+        ranges = gop_ranges(changed, keyframes, duration)
+        encoded_seconds = sum(end - start for start, end in ranges)
+        summary["reencoded_seconds"] = encoded_seconds
+        summary["duration"] = duration
+
+        if not keyframes or encoded_seconds > max_fraction * duration:
+            logging.info(f"{encoded_seconds:.1f}s of {duration:.1f}s changed; re-burning the whole video.")
+            burn_subtitles(video_file, paths["ass"], paths["video"])
+            summary["mode"] = "full"
+        else:
+            work_dir = os.path.join(os.path.dirname(video_file), f".{os.path.basename(paths['video'])}.pieces")
+            os.makedirs(work_dir, exist_ok=True)
+            try:
+                pieces = []
+                for i, (start, end) in enumerate(ranges):
+                    piece_path = os.path.join(work_dir, f"piece_{i:04d}.mp4")
+                    logging.info(f"Re-encoding GOP range {start:.2f}-{end:.2f}s")
+                    encode_range(video_file, paths["ass"], start, end, piece_path)
+                    pieces.append((start, end, piece_path))
+
+                spliced_output = os.path.join(work_dir, "spliced.mp4")
+                splice(paths["video"], pieces, duration, spliced_output)
+                os.replace(spliced_output, paths["video"])
+            finally:
+                shutil.rmtree(work_dir, ignore_errors=True)
+            summary["mode"] = "incremental"
+
+    save_rendered(source_path, paths["rendered_json"], source, options["inline_colors"])
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Regenerate subtitles and video after editing _final.json.")
+    parser.add_argument("video", help="Original media file the transcript belongs to")
+    parser.add_argument("--max-fraction", type=float, default=DEFAULT_MAX_FRACTION,
+                        help="Re-burn fully when more than this fraction of the video changed")
+    parser.add_argument("--dry-run", action="store_true", help="Only print the changed time ranges")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(stream=sys.stderr, level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    try:
+        summary = regenerate(args.video, args.max_fraction, args.dry_run)
+    except CalledProcessError as e:
+        logging.error(f"FFmpeg failed with exit code {e.returncode}")
+        logging.error(f"FFmpeg stderr:\n{e.stderr}")
+        sys.exit(1)
+    except RuntimeError as e:
+        logging.error(str(e))
+        sys.exit(1)
+
+    for start, end in summary["changed_ranges"]:
+        print(f"Changed: {start:.2f}s - {end:.2f}s")
+    if "reencoded_seconds" in summary:
+        print(f"Re-encoded {summary['reencoded_seconds']:.1f}s of {summary['duration']:.1f}s")
+    print(f"Mode: {summary['mode']}")
+
+
+if __name__ == "__main__":
+    main()
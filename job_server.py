@@ -0,0 +1,368 @@
+"""
+Local HTTP job API around `process_video_to_subtitles`.
+
+Endpoints (JSON unless noted):
+    POST /jobs                      {"path": "D:/media/talk.mp4", "priority": 0}
+    POST /jobs?filename=talk.mp4    raw media in the request body (uploaded to the spool directory)
+    GET  /jobs                      all jobs
+    GET  /jobs/<id>                 status of one job
+    GET  /jobs/<id>/artifacts/<kind>  streams the srt, ass or json output
+
+Jobs with a higher priority run first; equal priorities run in submission
+order. The queue is bounded: when it is full, submissions are answered with
+503 and a Retry-After header instead of piling up. Finished and failed jobs
+are forgotten after `--job-ttl` seconds, or sooner once more than
+`--max-finished` of them are kept.
+
+Usage:
+    python job_server.py --port 8765 --spool-dir D:/spool
+"""
+
+import os
+import sys
+import json
+import time
+import uuid
+import queue
+import shutil
+import logging
+import argparse
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+from video_processor import MEDIA_EXTENSIONS, output_paths
+
+# Artifact kinds that can be downloaded, mapped to output_paths keys and content types
+ARTIFACTS = {
+    "srt": ("srt", "application/x-subrip; charset=utf-8"),
+    "ass": ("ass", "text/x-ssa; charset=utf-8"),
+    "json": ("final_json", "application/json; charset=utf-8"),
+}
+CHUNK_SIZE = 1024 * 1024
+# How long and how many finished or failed jobs stay in the job table
+DEFAULT_JOB_TTL = 24 * 3600
+DEFAULT_MAX_FINISHED = 1000
+
+
+def _now():
+    return datetime.now().isoformat(timespec="seconds")
+
+
+def default_processor(device=None, compute_type=None):
+    """
+    Returns a processor that runs the full pipeline with resident models.
+    """
+    from device_profile import detect_profile
+    from video_processor import ModelCache, process_video_to_subtitles
+
+    models = ModelCache.from_profile(detect_profile(device, compute_type), os.environ.get("HF_TOKEN"))
+
+    def processor(video_file):
+        return process_video_to_subtitles(video_file, models=models, interactive=False)
+
+    return processor
+
+
+def _discard_upload(path):
+    """Removes a spooled upload together with its job directory."""
+    shutil.rmtree(os.path.dirname(path), ignore_errors=True)
+
+
+class JobManager:
+    """
+    Owns the job table, the bounded priority queue and the worker threads.
+
+    `processor` is called with the media path of each job and must return a
+    truthy value on success; the artifacts are looked up with output_paths.
+    Finished and failed jobs are dropped from the table `job_ttl` seconds
+    after they ended, oldest first once there are more than `max_finished`.
+    """
+
+    def __init__(self, processor, max_queue=32, workers=1, job_ttl=DEFAULT_JOB_TTL, max_finished=DEFAULT_MAX_FINISHED):
+        self.processor = processor
+        self.jobs = {}
+        self.job_ttl = job_ttl
+        self.max_finished = max_finished
+        # Ended jobs in the order they ended -> time.monotonic() at the end
+        self._ended = OrderedDict()
+        self.lock = threading.Lock()
+        self.queue = queue.PriorityQueue(maxsize=max_queue)
+        self._sequence = 0
+        self._threads = []
+        for i in range(workers):
+            thread = threading.Thread(target=self._worker, name=f"job-worker-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def submit(self, path, priority=0):
+        """
+        Queues a job and returns its record. Raises queue.Full when the
+        queue is at capacity.
+        """
+        job_id = uuid.uuid4().hex[:12]
+        job = {
+            "id": job_id,
+            "path": path,
+            "priority": priority,
+            "state": "queued",
+            "submitted": _now(),
+        }
+        with self.lock:
+            self._sequence += 1
+            # Negate the priority: PriorityQueue pops the smallest entry first
+            self.queue.put_nowait((-priority, self._sequence, job_id))
+            self.jobs[job_id] = job
+        logging.info(f"Queued job {job_id} for {path} (priority {priority})")
+        return dict(job)
+
+    def get(self, job_id):
+        with self.lock:
+            self._expire()
+            job = self.jobs.get(job_id)
+            return dict(job) if job else None
+
+    def list(self):
+        with self.lock:
+            self._expire()
+            return [dict(job) for job in self.jobs.values()]
+
+    def artifact_path(self, job_id, kind):
+        job = self.get(job_id)
+        if not job or job["state"] != "done" or kind not in ARTIFACTS:
+            return None
+        path = output_paths(job["path"])[ARTIFACTS[kind][0]]
+        return path if os.path.exists(path) else None
+
+    def _update(self, job_id, **fields):
+        with self.lock:
+            self.jobs[job_id].update(fields)
+
+    def _finish(self, job_id, **fields):
+        with self.lock:
+            self.jobs[job_id].update(fields)
+            self._ended[job_id] = time.monotonic()
+            self._expire()
+
+    def _expire(self):
+        """Drops ended jobs past the TTL or over the limit; the caller holds the lock."""
+        deadline = time.monotonic() - self.job_ttl
+        while self._ended and (len(self._ended) > self.max_finished or next(iter(self._ended.values())) < deadline):
+            job_id, _ = self._ended.popitem(last=False)
+            del self.jobs[job_id]
+
+    def _worker(self):
+        while True:
+            _, _, job_id = self.queue.get()
+            job = self.get(job_id)
+            self._update(job_id, state="running", started=_now())
+            started = time.monotonic()
+            try:
+                ok = self.processor(job["path"])
+                error = None if ok else "Pipeline failed, see process.log"
+            except Exception as e:
+                logging.error(f"Job {job_id} crashed: {e}", exc_info=True)
+                ok, error = False, str(e)
+            self._finish(job_id, state="done" if ok else "failed", finished=_now(),
+                         seconds=round(time.monotonic() - started, 2), error=error)
+            self.queue.task_done()
+
+
+class JobRequestHandler(BaseHTTPRequestHandler):
+    server_version = "WhisperXJobServer/1.0"
+
+    # --- Helpers ---
+
+    def _send_json(self, status, payload, headers=None):
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_error(self, status, message, headers=None):
+        self._send_json(status, {"error": message}, headers)
+
+    def _receive_upload(self, filename, length):
+        """Streams the request body into the spool directory."""
+        spool_dir = self.server.spool_dir
+        if not spool_dir:
+            raise ValueError("Uploads are disabled; start the server with --spool-dir")
+        name = os.path.basename(filename)
+        if os.path.splitext(name)[1].lower() not in MEDIA_EXTENSIONS:
+            raise ValueError(f"Unsupported file type: {name}")
+        # Each upload gets its own directory so outputs of equal names do not collide
+        job_dir = os.path.join(spool_dir, uuid.uuid4().hex[:12])
+        os.makedirs(job_dir)
+        path = os.path.join(job_dir, name)
+        remaining = length
+        try:
+            with open(path, "wb") as f:
+                while remaining > 0:
+                    chunk = self.rfile.read(min(CHUNK_SIZE, remaining))
+                    if not chunk:
+                        raise ValueError("Upload ended before Content-Length bytes were received")
+                    f.write(chunk)
+                    remaining -= len(chunk)
+        except BaseException:
+            _discard_upload(path)
+            raise
+        return path
+
+    # --- Routes ---
+
+    def do_GET(self):
+        parts = [part for part in urlparse(self.path).path.split("/") if part]
+        manager = self.server.manager
+
+        if parts == ["jobs"]:
+            self._send_json(200, {"jobs": manager.list(), "queued": manager.queue.qsize()})
+        elif len(parts) == 2 and parts[0] == "jobs":
+            job = manager.get(parts[1])
+            if job:
+                self._send_json(200, job)
+            else:
+                self._send_error(404, "Unknown job")
+        elif len(parts) == 4 and parts[0] == "jobs" and parts[2] == "artifacts":
+            self._stream_artifact(parts[1], parts[3])
+        else:
+            self._send_error(404, "Not found")
+
+    def _stream_artifact(self, job_id, kind):
+        manager = self.server.manager
+        job = manager.get(job_id)
+        if not job:
+            self._send_error(404, "Unknown job")
+            return
+        if kind not in ARTIFACTS:
+            self._send_error(404, f"Unknown artifact '{kind}', expected one of {', '.join(ARTIFACTS)}")
+            return
+        if job["state"] != "done":
+            self._send_error(409, f"Job is {job['state']}")
+            return
+        path = manager.artifact_path(job_id, kind)
+        if not path:
+            self._send_error(404, "Artifact not found")
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", ARTIFACTS[kind][1])
+        self.send_header("Content-Length", str(os.path.getsize(path)))
+        self.send_header("Content-Disposition", f'attachment; filename="{os.path.basename(path)}"')
+        self.end_headers()
+        with open(path, "rb") as f:
+            shutil.copyfileobj(f, self.wfile, CHUNK_SIZE)
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        if url.path.rstrip("/") != "/jobs":
+            self._send_error(404, "Not found")
+            return
+
+        manager = self.server.manager
+        params = parse_qs(url.query)
+        if self.headers.get("Content-Length") is None:
+            self._send_error(411, "Content-Length is required")
+            return
+        try:
+            length = int(self.headers["Content-Length"])
+        except ValueError:
+            length = 0
+        if length <= 0:
+            self._send_error(400, "Content-Length must be a positive integer")
+            return
+
+        # Refuse early when full so uploads are not spooled just to be rejected
+        if manager.queue.full():
+            self._send_error(503, "Queue is full", {"Retry-After": str(self.server.retry_after)})
+            return
+
+        uploaded = "filename" in params
+        try:
+            if uploaded:
+                # Parsed first, so a bad priority does not leave a spooled upload behind
+                priority = int(params.get("priority", ["0"])[0])
+                path = self._receive_upload(params["filename"][0], length)
+            else:
+                payload = json.loads(self.rfile.read(length))
+                if not isinstance(payload, dict):
+                    raise ValueError("Expected a JSON object")
+                path = payload.get("path")
+                priority = int(payload.get("priority", 0))
+                if not isinstance(path, str) or not os.path.isfile(path):
+                    raise ValueError(f"Media file not found: {path}")
+                path = os.path.abspath(path)
+        except (ValueError, TypeError) as e:
+            self._send_error(400, str(e))
+            return
+
+        try:
+            job = manager.submit(path, priority)
+        except queue.Full:
+            if uploaded:
+                _discard_upload(path)
+            self._send_error(503, "Queue is full", {"Retry-After": str(self.server.retry_after)})
+            return
+        self._send_json(202, job, {"Location": f"/jobs/{job['id']}"})
+
+    def log_message(self, format, *args):
+        logging.info(f"{self.address_string()} - {format % args}")
+
+
+def create_server(manager, host="127.0.0.1", port=8765, spool_dir=None, retry_after=30):
+    """
+    Builds the HTTP server. Use port 0 to let the OS pick a free port
+    (see `server.server_address`).
+    """
+    server = ThreadingHTTPServer((host, port), JobRequestHandler)
+    server.manager = manager
+    server.spool_dir = os.path.abspath(spool_dir) if spool_dir else None
+    server.retry_after = retry_after
+    if server.spool_dir:
+        os.makedirs(server.spool_dir, exist_ok=True)
+    return server
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve the subtitle pipeline as a local HTTP job API.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--spool-dir", help="Directory for uploaded media; uploads are disabled without it")
+    parser.add_argument("--max-queue", type=int, default=32, help="Queued jobs before submissions get 503")
+    parser.add_argument("--job-ttl", type=float, default=DEFAULT_JOB_TTL,
+                        help="Seconds finished and failed jobs stay listed")
+    parser.add_argument("--max-finished", type=int, default=DEFAULT_MAX_FINISHED,
+                        help="Finished and failed jobs kept at most")
+    parser.add_argument("--device", choices=["cuda", "cpu"], help="Default: CUDA if available, else CPU")
+    parser.add_argument("--compute-type", help="Default: float16 on CUDA, int8 on CPU")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(
+        stream=sys.stderr,
+        level=logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(message)s'
+    )
+
+    if not os.environ.get("HF_TOKEN"):
+        print("ERROR: Hugging Face token not found. Please set the HF_TOKEN environment variable.")
+        sys.exit(1)
+
+    manager = JobManager(default_processor(args.device, args.compute_type), max_queue=args.max_queue,
+                         job_ttl=args.job_ttl, max_finished=args.max_finished)
+    server = create_server(manager, args.host, args.port, args.spool_dir)
+    print(f"Job server listening on http://{args.host}:{server.server_address[1]}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
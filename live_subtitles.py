@@ -0,0 +1,288 @@
+"""
+Live subtitles for streaming audio.
+
+Reads raw 16 kHz mono s16le PCM from stdin or a named pipe into a rolling
+buffer and transcribes the not yet finalized part of it every `--step`
+seconds. A segment is finalized once it ends at least `--stability-margin`
+seconds before the newest audio, because Whisper rarely revises text that
+far from the window edge. If nothing could be finalized for
+`--max-latency` seconds the whole window is finalized anyway, which bounds
+the delay between speech and its cue. Finalized cues are written as SRT or
+WebVTT and flushed immediately.
+
+Usage:
+    ffmpeg -i rtmp://host/live -f s16le -ac 1 -ar 16000 - | python live_subtitles.py --format vtt
+    python live_subtitles.py --input /tmp/audio.fifo --output live.srt
+    python live_subtitles.py --replay talk.wav --output talk.srt    # latency report
+
+benchmarks/bench_live_subtitles.py replays a generated recording through
+a stub model and reports the latency.
+"""
+
+import os
+import sys
+import time
+import wave
+import bisect
+import queue
+import logging
+import argparse
+import threading
+
+import numpy as np
+
+from speech_prepass import SAMPLE_RATE
+
+BYTES_PER_SAMPLE = 2
+WHISPER_WINDOW_SECONDS = 30.0
+
+
+def timestamp(seconds, fmt="srt"):
+    separator = "," if fmt == "srt" else "."
+    milliseconds = int(round(seconds * 1000))
+    hours, milliseconds = divmod(milliseconds, 3600000)
+    minutes, milliseconds = divmod(milliseconds, 60000)
+    secs, milliseconds = divmod(milliseconds, 1000)
+    return f"{hours:02d}:{minutes:02d}:{secs:02d}{separator}{milliseconds:03d}"
+
+
+class CueWriter:
+    """Writes finalized cues as SRT or WebVTT and flushes after each one."""
+
+    def __init__(self, stream, fmt="srt"):
+        self.stream = stream
+        self.fmt = fmt
+        self.count = 0
+        if fmt == "vtt":
+            stream.write("WEBVTT\n\n")
+            stream.flush()
+
+    def write(self, start, end, text):
+        self.count += 1
+        if self.fmt == "srt":
+            self.stream.write(f"{self.count}\n")
+        self.stream.write(f"{timestamp(start, self.fmt)} --> {timestamp(end, self.fmt)}\n{text}\n\n")
+        self.stream.flush()
+
+
+class LiveTranscriber:
+    """
+    Rolling-buffer transcription with stable, bounded-latency finalization.
+
+    `feed()` appends samples; `step()` decodes the pending window if at
+    least `step_seconds` of new audio arrived and returns the cues it
+    finalized as (start, end, text) in stream time.
+    """
+
+    def __init__(self, model, step_seconds=1.0, stability_margin=1.5, max_latency=6.0,
+                 language=None, batch_size=8):
+        if max_latency <= stability_margin:
+            raise ValueError("max_latency must be larger than stability_margin")
+        self.model = model
+        self.step_seconds = step_seconds
+        self.stability_margin = stability_margin
+        self.max_latency = max_latency
+        self.language = language
+        self.batch_size = batch_size
+        # buffer[0] is at stream time `committed`; everything before it is finalized
+        self.buffer = np.zeros(0, dtype=np.float32)
+        self.committed = 0.0
+        self.received = 0  # samples since the start of the stream
+        self.decoded_until = 0.0
+
+    @property
+    def stream_time(self):
+        return self.received / SAMPLE_RATE
+
+    def feed(self, samples):
+        self.buffer = np.concatenate((self.buffer, samples))
+        self.received += len(samples)
+
+    def step(self, final=False):
+        if not final and self.stream_time - self.decoded_until < self.step_seconds:
+            return []
+        window = self.buffer[:int(WHISPER_WINDOW_SECONDS * SAMPLE_RATE)]
+        if len(window) == 0:
+            return []
+        window_start = self.committed
+        window_end = window_start + len(window) / SAMPLE_RATE
+        self.decoded_until = self.stream_time
+
+        options = {"language": self.language} if self.language else {}
+        result = self.model.transcribe(window, batch_size=self.batch_size, **options)
+        # Detect once, then keep the language fixed so short windows cannot flip it
+        self.language = self.language or result.get("language")
+
+        # Forced when the oldest pending audio would otherwise exceed the latency bound
+        # before the next decode finishes
+        force = final or self.stream_time + self.step_seconds - window_start >= self.max_latency
+        stable_until = window_end if force else window_end - self.stability_margin
+        cues, new_committed, pending_start = [], window_start, None
+        for segment in result["segments"]:
+            start = window_start + segment["start"]
+            end = min(window_start + segment["end"], window_end)
+            if end > stable_until:
+                pending_start = start
+                break
+            text = segment["text"].strip()
+            if text:
+                cues.append((start, end, text))
+            new_committed = end
+
+        if force:
+            new_committed = window_end
+        else:
+            # Audio before the next unfinished segment holds no speech; drop it, keeping
+            # a little slack in case the segment really starts earlier than reported
+            silence_until = stable_until if pending_start is None else pending_start
+            new_committed = max(new_committed, silence_until - 0.5)
+        self._advance(new_committed)
+        return cues
+
+    def _advance(self, stream_time):
+        drop = int(round((stream_time - self.committed) * SAMPLE_RATE))
+        if drop > 0:
+            self.buffer = self.buffer[drop:]
+            self.committed += drop / SAMPLE_RATE
+
+
+# --- Sources ---
+
+def read_pcm(stream, chunks, chunk_seconds=0.1):
+    """Reads s16le PCM from a binary stream and puts float32 chunks on `chunks`."""
+    chunk_bytes = int(chunk_seconds * SAMPLE_RATE) * BYTES_PER_SAMPLE
+    leftover = b""
+    while True:
+        data = stream.read(chunk_bytes)
+        if not data:
+            break
+        data = leftover + data
+        usable = len(data) - len(data) % BYTES_PER_SAMPLE
+        leftover = data[usable:]
+        chunks.put(np.frombuffer(data[:usable], dtype="<i2").astype(np.float32) / 32768.0)
+    chunks.put(None)
+
+
+def replay_wav(path, chunks, chunk_seconds=0.1, speed=1.0):
+    """Feeds a 16 kHz mono 16-bit WAV file into `chunks` in real time."""
+    with wave.open(path, "rb") as wav:
+        frames_per_chunk = int(chunk_seconds * SAMPLE_RATE)
+        started = time.monotonic()
+        sent = 0
+        while True:
+            data = wav.readframes(frames_per_chunk)
+            if not data:
+                break
+            sent += len(data) // BYTES_PER_SAMPLE
+            # Release each chunk only once its last sample would have been "spoken"
+            delay = started + sent / SAMPLE_RATE / speed - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            chunks.put(np.frombuffer(data, dtype="<i2").astype(np.float32) / 32768.0)
+    chunks.put(None)
+
+
+# --- Main loop ---
+
+def run_live(transcriber, chunks, writer):
+    """
+    Consumes audio chunks until the source ends, emitting cues as they are
+    finalized. Returns the end-to-end latency of every cue: the time from
+    the end of its audio arriving to the cue being written.
+    """
+    latencies = []
+    # Stream time at the end of each chunk and the wall time it arrived
+    arrived_until, arrived_at = [], []
+    finished = False
+    while not finished:
+        # Block for new audio, then take everything that queued up while decoding
+        chunk = chunks.get()
+        while True:
+            if chunk is None:
+                finished = True
+                break
+            transcriber.feed(chunk)
+            arrived_until.append(transcriber.stream_time)
+            arrived_at.append(time.monotonic())
+            try:
+                chunk = chunks.get_nowait()
+            except queue.Empty:
+                break
+        cues = transcriber.step(final=finished)
+        if finished:
+            # Finalize whatever is left, window by window
+            while len(transcriber.buffer):
+                cues += transcriber.step(final=True)
+        for start, end, text in cues:
+            writer.write(start, end, text)
+            index = min(bisect.bisect_left(arrived_until, end - 1e-6), len(arrived_at) - 1)
+            latencies.append(time.monotonic() - arrived_at[index])
+        # Cues never end before the committed point, so older arrivals are not needed again
+        keep = bisect.bisect_left(arrived_until, transcriber.committed)
+        del arrived_until[:keep], arrived_at[:keep]
+    return latencies
+
+
+def latency_report(latencies, max_latency):
+    if not latencies:
+        return "No cues were emitted."
+    values = np.sort(np.array(latencies))
+    p50, p90, p99 = np.percentile(values, [50, 90, 99])
+    within = np.mean(values <= max_latency) * 100
+    return (f"{len(values)} cues, end-to-end latency p50 {p50:.2f}s  p90 {p90:.2f}s  p99 {p99:.2f}s  "
+            f"max {values[-1]:.2f}s; {within:.0f}% within the {max_latency:.1f}s bound")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Stream 16 kHz s16le PCM in and finalized subtitles out.")
+    parser.add_argument("--input", default="-", help="PCM source: '-' for stdin, or a file / named pipe")
+    parser.add_argument("--replay", metavar="WAV", help="Replay a WAV file in real time instead of reading PCM")
+    parser.add_argument("--output", help="Subtitle file to write (default: stdout)")
+    parser.add_argument("--format", choices=["srt", "vtt"], default="srt")
+    parser.add_argument("--step", type=float, default=1.0, help="Seconds of new audio between decodes")
+    parser.add_argument("--stability-margin", type=float, default=1.5,
+                        help="Segments ending this close to the newest audio are not final yet")
+    parser.add_argument("--max-latency", type=float, default=6.0, help="Upper bound for speech-to-cue delay")
+    parser.add_argument("--language", help="Language code (default: detect on the first window)")
+    parser.add_argument("--model", default="small", help="Whisper model size; smaller models keep latency low")
+    parser.add_argument("--device", choices=["cuda", "cpu"], help="Default: CUDA if available, else CPU")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(stream=sys.stderr, level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    from video_processor import ModelCache
+    from device_profile import detect_profile
+
+    models = ModelCache.from_profile(detect_profile(args.device), os.environ.get("HF_TOKEN"), model_name=args.model)
+    model, batch_size = models.asr_model(), models.batch_size
+
+    transcriber = LiveTranscriber(model, step_seconds=args.step, stability_margin=args.stability_margin,
+                                  max_latency=args.max_latency, language=args.language, batch_size=batch_size)
+
+    chunks = queue.Queue()
+    if args.replay:
+        try:
+            with wave.open(args.replay, "rb") as wav:
+                wav_format = (wav.getframerate(), wav.getnchannels(), wav.getsampwidth())
+        except (OSError, wave.Error) as e:
+            parser.error(f"Cannot read {args.replay}: {e}")
+        if wav_format != (SAMPLE_RATE, 1, BYTES_PER_SAMPLE):
+            parser.error(f"{args.replay} must be 16 kHz mono 16-bit PCM; convert it with "
+                         f"ffmpeg -i input -ac 1 -ar 16000 -sample_fmt s16 output.wav")
+        source = threading.Thread(target=replay_wav, args=(args.replay, chunks), daemon=True)
+    else:
+        stream = sys.stdin.buffer if args.input == "-" else open(args.input, "rb")
+        source = threading.Thread(target=read_pcm, args=(stream, chunks), daemon=True)
+    source.start()
+
+    output = open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+    try:
+        latencies = run_live(transcriber, chunks, CueWriter(output, args.format))
+    finally:
+        if args.output:
+            output.close()
+    print(latency_report(latencies, args.max_latency), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
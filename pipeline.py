@@ -0,0 +1,648 @@
+"""
+Declarative stage graph for the subtitle pipeline.
+
+Every stage names the artifacts it reads and writes (keys of
+`video_processor.output_paths`, plus "media" for the source file). Asking
+for target artifacts works like make: a stage runs only if one of its
+outputs is missing, older than one of its inputs (or than the module that
+renders it), or if a stage it depends on runs. With --parallel, stages that
+do not depend on each other run at the same time; diarization, for example,
+only needs the audio and can run next to transcription and alignment. By
+default stages run one at a time and each model is freed before the next
+one loads, as before.
+
+    media ─┬─ transcribe ─ initial_json ─ align ─ aligned_json ─┐
+           └─ diarize ─ diarization ───────────────────────────┴─ assign_speakers ─ final_json
+    final_json ─┬─ ass ─ burn ─ video          ├─ srt      ├─ segment_srt / txt
+                └─ resegment ─ resegmented_json (writers can read this instead)
+
+The legacy entry scripts are presets in PRESETS.
+
+Usage:
+    python pipeline.py talk.mp4 --dry-run
+    python pipeline.py talk.mp4 --targets ass,srt --rerun align
+    python pipeline.py talk.mp4 --parallel    # needs room for two models at once
+    python pipeline.py --preset intervention
+"""
+
+import os
+import json
+import time
+import logging
+import argparse
+import threading
+from contextlib import contextmanager
+from subprocess import CalledProcessError
+
+from video_processor import ModelCache, burn_subtitles, output_paths, select_media_file, stage_timer, write_metrics
+from device_profile import detect_profile
+from incremental import save_rendered
+import ass_from_json
+import srt_from_json
+
+DEFAULT_TARGETS = ("video", "srt")
+# Model stages that can run at the same time with --parallel (transcribe or align next to diarize)
+PARALLEL_MODEL_STAGES = 2
+# Stages whose outputs a fingerprint match can supply (see fingerprint.py)
+TRANSCRIPT_STAGES = ("transcribe", "align", "diarize", "assign_speakers")
+
+# Stage defaults; presets and callers override them
+DEFAULT_OPTIONS = {
+    "skip_silence": True,
+    # None: no edit prompt; 0: wait for Enter; n > 0: offer editing for n seconds
+    "edit_timeout": None,
+    # Passed to transcription; `fallback_language` only fills in a missing one after editing
+    "language": None,
+    "fallback_language": None,
+    # Transcript the subtitle writers and the burn read: "final_json" or "resegmented_json"
+    "subtitle_source": "final_json",
+    "writer_options": {"highlight_words": False, "max_line_width": 42, "max_line_count": 1},
+    # ASS layout: per-speaker styles, or the old color tags inlined around every word
+    "inline_colors": False,
+}
+
+# The legacy entry scripts, as target/option sets
+PRESETS = {
+    "default": {"targets": ("video", "srt"), "edit_timeout": 10},
+    # Make_ST_from_input.py: English, no manual editing, plus the WhisperX CLI's segment SRT and TXT
+    "make_st": {"targets": ("ass", "srt", "segment_srt", "txt", "video"), "language": "en",
+                "writer_options": {"highlight_words": True, "max_line_width": 42, "max_line_count": 1}},
+    # ST_with_Intervention.py: always pauses for editing, also writes segment SRT and TXT
+    "intervention": {"targets": ("ass", "srt", "segment_srt", "txt", "video"), "edit_timeout": 0,
+                     "fallback_language": "de",
+                     "writer_options": {"highlight_words": True, "max_line_width": 42, "max_line_count": 1}},
+    # ST_with_Intervention-2.py: like intervention, but editing is offered for three seconds
+    "intervention2": {"targets": ("ass", "srt", "segment_srt", "txt", "video"), "edit_timeout": 3,
+                      "fallback_language": "de",
+                      "writer_options": {"highlight_words": True, "max_line_width": 42, "max_line_count": 1}},
+    # ST_with_Intervention-STProcessor.py: subtitles from SubtitlesProcessor-resegmented text
+    "stprocessor": {"targets": ("ass", "srt", "txt", "video"), "edit_timeout": 3, "fallback_language": "en",
+                    "subtitle_source": "resegmented_json"},
+}
+
+
+class Stage:
+    """
+    One step of the graph. `action(context)` reads the `inputs` artifacts
+    and writes all `outputs`; `code` lists module files whose changes make
+    the outputs stale as well. `prompt(context)`, if set, runs on the main
+    thread after the action, before any dependent stage starts.
+    """
+
+    def __init__(self, name, inputs, outputs, action, code=(), models=(), prompt=None):
+        self.name = name
+        self.inputs = tuple(inputs)
+        self.outputs = tuple(outputs)
+        self.action = action
+        self.code = tuple(code)
+        # ModelCache stages ("asr", "align", "diarize") released after this stage when the run owns the models
+        self.models = tuple(models)
+        self.prompt = prompt
+
+
+# --- Run context ---
+
+class RunContext:
+    """
+    State shared by the stages of one run: paths, options, models, metrics
+    and the decoded audio, which is loaded once for all stages that need it.
+    """
+
+    def __init__(self, video_file, models, options):
+        self.video_file = video_file
+        self.models = models
+        self.options = options
+        self.paths = dict(output_paths(video_file), media=video_file)
+        # create_srt_from_json names the SRT after the transcript it renders
+        self.paths["srt"] = srt_from_json.srt_path_for(self.paths[options["subtitle_source"]], os.path.dirname(video_file))
+        self.metrics = {"file": video_file, "profile": models.profile if models else None, "stages": {}, "status": "failed"}
+        self._audio_lock = threading.Lock()
+        self._audio = None
+        self._speech = None
+
+    def audio(self):
+        with self._audio_lock:
+            if self._audio is None:
+                import whisperx
+                logging.info("Loading audio...")
+                with stage_timer(self.metrics, "load_audio"):
+                    self._audio = whisperx.load_audio(self.video_file)
+            return self._audio
+
+    def speech_audio(self):
+        """The audio with long silences removed, and the remap table (None if not applied)."""
+        audio = self.audio()
+        with self._audio_lock:
+            if self._speech is None:
+                self._speech = (audio, None)
+                if self.options["skip_silence"]:
+                    from speech_prepass import build_speech_buffer
+                    speech_audio, remap, prepass_stats = build_speech_buffer(audio)
+                    self.metrics["speech_prepass"] = prepass_stats
+                    logging.info(
+                        f"Speech pre-pass kept {prepass_stats['speech_seconds']}s of {prepass_stats['audio_seconds']}s "
+                        f"in {prepass_stats['regions']} regions (applied: {prepass_stats['applied']})"
+                    )
+                    self._speech = (speech_audio, remap)
+            return self._speech
+
+    def read_json(self, artifact):
+        with open(self.paths[artifact], "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def write_json(self, artifact, data):
+        with open(self.paths[artifact], "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+        logging.info(f"Saved {self.paths[artifact]}")
+
+
+# --- Stage actions ---
+
+def transcribe(context):
+    from speech_prepass import restore_result_timeline
+
+    speech_audio, remap = context.speech_audio()
+    language = context.options["language"]
+    options = {"language": language} if language else {}
+    result = context.models.asr_model().transcribe(speech_audio, batch_size=context.models.batch_size, **options)
+    # Timestamps refer to the compacted buffer until mapped back here
+    restore_result_timeline(result, remap)
+    context.write_json("initial_json", result)
+
+
+def edit_prompt(context):
+    offer_edit(context.paths["initial_json"], context.options["edit_timeout"])
+
+
+def offer_edit(json_path, timeout):
+    """Lets the user correct the initial transcript before alignment reads it."""
+    if timeout is None:
+        return
+    if timeout > 0:
+        from inputimeout import inputimeout, TimeoutOccurred
+        try:
+            answer = inputimeout(
+                prompt=f"You have {timeout} seconds to decide if you want to manually edit the transcript at:\n{json_path}\nEdit now? (y/n): ",
+                timeout=timeout
+            )
+        except TimeoutOccurred:
+            answer = 'n'
+        if answer.lower() != 'y':
+            return
+    input(f"Please edit {json_path}, save it, and then press Enter to continue...")
+
+
+def align(context):
+    import whisperx
+
+    result = context.read_json("initial_json")
+    language = result.get("language") or context.options["fallback_language"] or context.options["language"]
+    model_a, metadata = context.models.align_model(language)
+    # Segments are on the original timeline, and alignment only looks at the audio inside them
+    aligned = whisperx.align(result["segments"], model_a, metadata, context.audio(), context.models.device,
+                             return_char_alignments=False)
+    aligned["language"] = language
+    context.write_json("aligned_json", aligned)
+
+
+def diarize(context):
+    from speech_prepass import restore_dataframe_timeline
+
+    speech_audio, remap = context.speech_audio()
+    frame = restore_dataframe_timeline(context.models.diarize_model()(speech_audio), remap)
+    turns = [{"start": float(start), "end": float(end), "speaker": speaker}
+             for start, end, speaker in zip(frame["start"], frame["end"], frame["speaker"])]
+    context.write_json("diarization", turns)
+
+
+def assign_speakers(context):
+    import whisperx
+    import pandas as pd
+
+    result = context.read_json("aligned_json")
+    turns = context.read_json("diarization")
+    if turns:
+        language = result.get("language")
+        result = whisperx.assign_word_speakers(pd.DataFrame(turns), result)
+        result.setdefault("language", language)
+    context.write_json("final_json", result)
+
+
+def resegment(context):
+    from whisperx.SubtitlesProcessor import SubtitlesProcessor
+
+    result = context.read_json("final_json")
+    segments = SubtitlesProcessor(result["segments"], result.get("language") or context.options["fallback_language"]).process_segments()
+    # The ASS and SRT writers expect both fields on every segment
+    for segment in segments:
+        segment.setdefault("words", [])
+        segment.setdefault("speaker", "unknown")
+    context.write_json("resegmented_json", {"segments": segments, "language": result.get("language")})
+
+
+def write_ass(context):
+    # Words alignment could not time are interpolated by the writer; keep the count
+    context.metrics["repaired_word_timings"] = ass_from_json.create_ass_from_json(
+        context.paths[context.options["subtitle_source"]], context.paths["ass"], context.options["inline_colors"])
+
+
+def write_srt(context):
+    srt_from_json.create_srt_from_json(context.paths[context.options["subtitle_source"]], os.path.dirname(context.paths["srt"]))
+
+
+def whisperx_writer(output_format):
+    """Stage action for the WhisperX SRT/TXT writers, which name the file after the media file."""
+    def write(context):
+        from whisperx.utils import get_writer
+        writer = get_writer(output_format, os.path.dirname(context.video_file))
+        writer(context.read_json(context.options["subtitle_source"]), context.video_file, context.options["writer_options"])
+    return write
+
+
+def write_binary(context):
+    from transcript_store import write_transcript
+    write_transcript(context.read_json("final_json"), context.paths["final_binary"])
+
+
+def burn(context):
+    burn_subtitles(context.video_file, context.paths["ass"], context.paths["video"])
+    # Remember the transcript and options the outputs were rendered with, for incremental.py
+    save_rendered(context.paths[context.options["subtitle_source"]], context.paths["rendered_json"],
+                  context.options["subtitle_source"], context.options["inline_colors"])
+
+
+def build_stages(options):
+    source = options["subtitle_source"]
+    return [
+        Stage("transcribe", ["media"], ["initial_json"], transcribe, models=["asr"], prompt=edit_prompt),
+        Stage("align", ["media", "initial_json"], ["aligned_json"], align, models=["align"]),
+        Stage("diarize", ["media"], ["diarization"], diarize, models=["diarize"]),
+        Stage("assign_speakers", ["aligned_json", "diarization"], ["final_json"], assign_speakers),
+        Stage("resegment", ["final_json"], ["resegmented_json"], resegment),
+        Stage("binary", ["final_json"], ["final_binary"], write_binary),
+        Stage("ass", [source], ["ass"], write_ass, code=[ass_from_json.__file__]),
+        Stage("srt", [source], ["srt"], write_srt, code=[srt_from_json.__file__]),
+        Stage("segment_srt", [source], ["segment_srt"], whisperx_writer("srt")),
+        Stage("txt", [source], ["txt"], whisperx_writer("txt")),
+        Stage("burn", ["media", "ass", source], ["video", "rendered_json"], burn),
+    ]
+
+
+# --- Planning ---
+
+def _mtime(path):
+    try:
+        return os.path.getmtime(path)
+    except OSError:
+        return None
+
+
+def plan(stages, targets, paths, force=False, rerun=(), keep=()):
+    """
+    Returns [(stage, reason)] for the stages that have to run to bring
+    `targets` up to date, in dependency order, and the stages found fresh.
+    `force` reruns everything needed for the targets except the `keep`
+    stages; `rerun` names stages to run regardless (their dependents follow).
+    Without either, a stage whose outputs exist is never run only because
+    an intermediate it was made from is missing.
+    """
+    producers = {artifact: stage for stage in stages for artifact in stage.outputs}
+    unknown = set(rerun) - {stage.name for stage in stages}
+    if unknown:
+        raise ValueError(f"Unknown stage: {', '.join(sorted(unknown))}")
+    decisions, order, fresh = {}, [], []
+
+    def reaches_rerun(stage):
+        """Whether `stage` or a stage it depends on is named in `rerun`."""
+        return stage.name in rerun or any(reaches_rerun(producers[artifact]) for artifact in stage.inputs
+                                          if artifact in producers)
+
+    def visit(stage):
+        if stage.name in decisions:
+            return decisions[stage.name] is not None
+        decisions[stage.name] = None  # Marks the stage as being visited
+        forced = (force and stage.name not in keep) or stage.name in rerun
+        output_times = [_mtime(paths[artifact]) for artifact in stage.outputs]
+        # Like make, existing outputs whose intermediate inputs are gone count as fresh: transcripts
+        # of the pre-series scripts have a _final.json but no _initial.json, _aligned.json or
+        # _diarization.json, and rebuilding those would overwrite a possibly hand-edited transcript
+        unavailable = set()
+        if not forced and None not in output_times:
+            unavailable = {artifact for artifact in stage.inputs if artifact in producers
+                           and _mtime(paths[artifact]) is None and not reaches_rerun(producers[artifact])}
+        upstream = [producers[artifact] for artifact in stage.inputs if artifact in producers and artifact not in unavailable]
+        rebuilt_inputs = [producer.name for producer in upstream if visit(producer)]
+        if rebuilt_inputs and unavailable:
+            # Running after all: the missing intermediates are needed again
+            rebuilt_inputs += [producers[artifact].name for artifact in stage.inputs
+                               if artifact in unavailable and visit(producers[artifact])]
+            unavailable = set()
+
+        reason = None
+        if forced:
+            reason = "forced"
+        elif rebuilt_inputs:
+            reason = f"{', '.join(rebuilt_inputs)} will run"
+        elif None in output_times:
+            reason = f"{stage.outputs[output_times.index(None)]} missing"
+        else:
+            for dependency in [paths[artifact] for artifact in stage.inputs if artifact not in unavailable] + list(stage.code):
+                dependency_time = _mtime(dependency)
+                if dependency_time is None:
+                    raise FileNotFoundError(f"{stage.name} needs {dependency}, which does not exist")
+                if dependency_time > min(output_times):
+                    reason = f"{os.path.basename(dependency)} is newer"
+                    break
+
+        decisions[stage.name] = reason
+        if reason:
+            order.append((stage, reason))
+        else:
+            fresh.append(stage)
+        return reason is not None
+
+    for target in targets:
+        if target not in producers:
+            raise ValueError(f"Unknown target: {target}")
+        visit(producers[target])
+    return order, fresh
+
+
+def waves(steps):
+    """Groups planned stages into waves whose members can run at the same time."""
+    planned = {stage.name: stage for stage, _ in steps}
+    producers = {artifact: stage.name for stage in planned.values() for artifact in stage.outputs}
+    level = {}
+    for stage, _ in steps:  # Already in dependency order
+        level[stage.name] = 1 + max((level[producers[a]] for a in stage.inputs if a in producers), default=0)
+    grouped = {}
+    for stage, reason in steps:
+        grouped.setdefault(level[stage.name], []).append((stage, reason))
+    return [grouped[key] for key in sorted(grouped)]
+
+
+def print_plan(video_file, steps, fresh, paths):
+    print(f"Plan for {video_file}:")
+    if not steps:
+        print("  everything is up to date")
+    for number, wave in enumerate(waves(steps), start=1):
+        for stage, reason in wave:
+            outputs = ", ".join(os.path.basename(paths[artifact]) for artifact in stage.outputs)
+            print(f"  [{number}] {stage.name:<16} -> {outputs}  ({reason})")
+    for stage in fresh:
+        print(f"  [-] {stage.name:<16} up to date")
+
+
+# --- Fingerprint pre-step ---
+
+def reuse_duplicate(context, db_path):
+    """
+    Looks the media file up in the fingerprint index and, if it is a copy
+    of an already transcribed recording, writes that recording's transcripts
+    shifted by the match offset. Returns the stages this makes unnecessary.
+    """
+    from fingerprint import SAMPLE_RATE, FingerprintIndex, find_reusable, reuse_transcripts
+
+    with stage_timer(context.metrics, "fingerprint"):
+        audio = context.audio()
+        with FingerprintIndex(db_path) as index:
+            match = find_reusable(index, context.video_file, audio)
+    if match is None:
+        logging.info("No earlier copy of this recording in the fingerprint index")
+        return ()
+    reuse_transcripts(match, context.paths, output_paths(match["path"]), len(audio) / SAMPLE_RATE)
+    context.metrics["reused_transcript"] = match
+    logging.info(f"Reusing the transcripts of {match['path']} (offset {match['offset']:+.2f}s, score {match['score']})")
+    print(f"Same recording as {match['path']} (offset {match['offset']:+.2f}s); reusing its transcript.")
+    return TRANSCRIPT_STAGES
+
+
+def add_fingerprint(context, db_path):
+    from fingerprint import FingerprintIndex
+
+    try:
+        with FingerprintIndex(db_path) as index:
+            if not index.is_current(context.video_file):
+                hashes = index.add_file(context.video_file, context.audio())
+                logging.info(f"Added {hashes} hashes to the fingerprint index {db_path}")
+    except Exception as e:
+        # The outputs are fine; only later copies will not be recognized
+        logging.warning(f"Could not update the fingerprint index: {e}", exc_info=True)
+
+
+# --- Execution ---
+
+def execute(steps, context, parallel=False, release_models=False):
+    """
+    Runs the planned stages in dependency order; with `parallel`, each as
+    soon as the stages it depends on are done. Prompts run here on the
+    calling thread, outside the stage timings. Raises the first stage error
+    after the running stages finished.
+    """
+    from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+    planned = {stage.name: stage for stage, _ in steps}
+    producers = {artifact: stage.name for stage in planned.values() for artifact in stage.outputs}
+    waiting_on = {name: {producers[a] for a in stage.inputs if a in producers} for name, stage in planned.items()}
+    done, running, error = set(), {}, None
+
+    def run_stage(stage):
+        logging.info(f"Stage {stage.name} started")
+        with stage_timer(context.metrics, stage.name):
+            stage.action(context)
+        if release_models:
+            for model in stage.models:
+                context.models.release(model)
+        logging.info(f"Stage {stage.name} finished")
+
+    # The execution profile splits the CPU threads for this many stages at once (see _run)
+    with ThreadPoolExecutor(max_workers=PARALLEL_MODEL_STAGES if parallel else 1) as executor:
+        while len(done) < len(planned) and error is None:
+            for name, stage in planned.items():
+                if name not in done and name not in running.values() and waiting_on[name] <= done:
+                    running[executor.submit(run_stage, stage)] = name
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                name = running.pop(future)
+                if future.exception() is not None:
+                    error = error or future.exception()
+                    logging.error(f"Stage {name} failed: {future.exception()}")
+                elif planned[name].prompt and error is None:
+                    # Dependents are not submitted until the prompt returns
+                    try:
+                        planned[name].prompt(context)
+                    except Exception as e:
+                        error = e
+                done.add(name)
+        # Let stages that are still running finish before reporting the failure
+        wait(running)
+    if error is not None:
+        raise error
+
+
+@contextmanager
+def run_log(log_file):
+    """
+    Sends the log records of one run to `log_file` (truncated), unless a
+    handler for that file is already attached, as in the daemon and the
+    worker pool.
+    """
+    root = logging.getLogger()
+    path = os.path.abspath(log_file)
+    if any(isinstance(handler, logging.FileHandler) and handler.baseFilename == path for handler in root.handlers):
+        yield
+        return
+    handler = logging.FileHandler(path, mode='w', encoding="utf-8")
+    handler.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(message)s'))
+    previous_level = root.level
+    if root.level == logging.NOTSET or root.level > logging.INFO:
+        root.setLevel(logging.INFO)
+    root.addHandler(handler)
+    try:
+        yield
+    finally:
+        root.removeHandler(handler)
+        root.setLevel(previous_level)
+        handler.close()
+
+
+def run_pipeline(video_file, targets=DEFAULT_TARGETS, models=None, force=False, rerun=(), dry_run=False,
+                 parallel=False, fingerprint_index=None, log_file=None, **options):
+    """
+    Brings `targets` (artifact names) up to date for one media file.
+    Returns the RunContext (its `paths` hold every artifact) on success, or
+    None on failure. With `dry_run` only the plan is printed. `parallel`
+    runs independent stages at the same time, which needs memory for
+    several models at once. With a `fingerprint_index` database, a file
+    without a final transcript is first checked against earlier recordings,
+    and every successful run adds the file to the index. The run is logged
+    to `log_file` (default: the process.log next to the media file).
+    """
+    options = dict(DEFAULT_OPTIONS, **options)
+    context = RunContext(video_file, models, options)
+    stages = build_stages(options)
+    if dry_run:
+        try:
+            steps, fresh = plan(stages, targets, context.paths, force, rerun)
+        except (FileNotFoundError, ValueError) as e:
+            print(f"ERROR: {e}")
+            return None
+        print_plan(video_file, steps, fresh, context.paths)
+        return context
+
+    log_file = log_file or context.paths["log"]
+    print(f"Processing file: {video_file}")
+    with run_log(log_file):
+        return _run(context, stages, targets, force, rerun, parallel, fingerprint_index, log_file)
+
+
+def _run(context, stages, targets, force, rerun, parallel, fingerprint_index, log_file):
+    video_file = context.video_file
+    reused = ()
+    if fingerprint_index and os.path.exists(video_file) and not os.path.exists(context.paths["final_json"]):
+        try:
+            reused = reuse_duplicate(context, fingerprint_index)
+        except Exception as e:
+            # Only an optimization: transcribe as usual
+            logging.warning(f"Fingerprint lookup failed: {e}", exc_info=True)
+    try:
+        steps, fresh = plan(stages, targets, context.paths, force, rerun, keep=reused)
+    except (FileNotFoundError, ValueError) as e:
+        logging.error(str(e))
+        print(f"ERROR: {e}")
+        return None
+    logging.info(f"Starting processing for {video_file}: " + ", ".join(f"{stage.name} ({reason})" for stage, reason in steps))
+    if not steps:
+        print("Everything is up to date.")
+        return context
+
+    free_models = context.models is None
+    needs_models = any(stage.models for stage, _ in steps)
+    if free_models and needs_models:
+        hf_token = os.environ.get("HF_TOKEN")  # Use environment variable for Hugging Face token
+        if not hf_token:
+            message = "Hugging Face token not found. Please set the HF_TOKEN environment variable."
+            logging.error(message)
+            print(f"ERROR: {message}")
+            return None
+        # Pick device, compute type, batch size and threads for this machine, shared by the concurrent stages
+        profile = detect_profile(concurrent_stages=PARALLEL_MODEL_STAGES if parallel else 1)
+        context.models = ModelCache.from_profile(profile, hf_token)
+        context.metrics["profile"] = context.models.profile
+    if context.models:
+        logging.info(f"Execution profile: {context.models.profile}")
+
+    started = time.perf_counter()
+    try:
+        execute(steps, context, parallel=parallel, release_models=free_models)
+        if fingerprint_index:
+            with stage_timer(context.metrics, "fingerprint_index"):
+                add_fingerprint(context, fingerprint_index)
+        context.metrics["status"] = "ok"
+        logging.info(f"Process complete! Up to date: {', '.join(targets)}")
+        return context
+    except FileNotFoundError as e:
+        logging.error(f"A file was not found: {e}")
+        print(f"ERROR: A file was not found. Check the logs at {log_file}")
+    except CalledProcessError as e:
+        logging.error(f"FFmpeg failed with exit code {e.returncode}")
+        logging.error(f"FFmpeg stdout: {e.stdout}")
+        logging.error(f"FFmpeg stderr:\n{e.stderr}")
+        print(f"ERROR: FFmpeg failed. Check the logs at {log_file}")
+    except Exception as e:
+        logging.error(f"An unexpected error occurred: {e}", exc_info=True)
+        print(f"An unexpected error occurred. Check the logs at {log_file}")
+    finally:
+        # Stages may overlap, so the wall time is shorter than their sum
+        context.metrics["total_seconds"] = round(sum(context.metrics["stages"].values()), 3)
+        context.metrics["wall_seconds"] = round(time.perf_counter() - started, 3)
+        try:
+            write_metrics(context.metrics, context.paths["metrics"])
+        except OSError as e:
+            logging.error(f"Could not write metrics: {e}")
+    return None
+
+
+def main(argv=None, preset="default"):
+    parser = argparse.ArgumentParser(description="Run the subtitle pipeline as a stage graph.")
+    parser.add_argument("files", nargs="*", help="Media files (default: choose one in a file dialog)")
+    parser.add_argument("--preset", choices=sorted(PRESETS), default=preset, help="Targets and options of a legacy script")
+    parser.add_argument("--targets", help="Comma-separated artifacts to produce, e.g. ass,srt,video")
+    parser.add_argument("--dry-run", action="store_true", help="Only print which stages would run and why")
+    parser.add_argument("--force", action="store_true", help="Run every stage needed for the targets")
+    parser.add_argument("--rerun", action="append", default=[], metavar="STAGE", help="Run this stage and its dependents")
+    parser.add_argument("--parallel", action="store_true",
+                        help="Run independent stages at the same time (needs memory for two models)")
+    parser.add_argument("--no-edit", action="store_true", help="Skip the prompt to edit the initial transcript")
+    parser.add_argument("--keep-silence", action="store_true", help="Disable the speech pre-pass")
+    parser.add_argument("--language", help="Transcribe in this language instead of detecting it")
+    parser.add_argument("--inline-colors", action="store_true", help="Write the ASS file in the old inline-color layout")
+    parser.add_argument("--fingerprint-index", metavar="DB", help="Reuse transcripts of earlier copies found in this index")
+    args = parser.parse_args(argv)
+
+    options = {key: value for key, value in PRESETS[args.preset].items() if key != "targets"}
+    targets = args.targets.split(",") if args.targets else PRESETS[args.preset]["targets"]
+    if args.no_edit:
+        options["edit_timeout"] = None
+    if args.keep_silence:
+        options["skip_silence"] = False
+    if args.language:
+        options["language"] = args.language
+    if args.inline_colors:
+        options["inline_colors"] = True
+
+    video_files = args.files or [select_media_file()]
+    failed = 0
+    for video_file in video_files:
+        if not video_file:
+            print("No file selected. Exiting.")
+            return 1
+        context = run_pipeline(video_file, targets, force=args.force, rerun=args.rerun, dry_run=args.dry_run,
+                               parallel=args.parallel, fingerprint_index=args.fingerprint_index,
+                               **options)
+        failed += context is None
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
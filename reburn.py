@@ -0,0 +1,134 @@
+"""
+Re-burns existing ASS subtitles into their videos, many at a time.
+
+After a style change only the burn step has to run again. Jobs are FFmpeg
+processes started from an asyncio pool: a global thread budget (default:
+all usable cores) is split into slots of `--threads-per-job` threads, each
+job passes that limit to FFmpeg, and no more jobs run than there are slots.
+Commands use absolute paths, so nothing depends on the working directory.
+Each job writes to a temporary file that replaces the old video only on
+success, and failed jobs are retried.
+
+Usage:
+    python reburn.py D:/archive --threads-per-job 4
+    python reburn.py talk.mp4 interview.wav --force
+"""
+
+import os
+import sys
+import time
+import asyncio
+import logging
+import argparse
+
+from video_processor import burn_command, output_paths
+from device_profile import usable_cores
+from batch_convert import is_fresh
+from worker_pool import find_media, estimate_duration
+
+
+def find_jobs(inputs, force=False):
+    """
+    Returns (media file, ASS file, output video) for every media file that
+    has an ASS file, and the number skipped because the video is up to date.
+    """
+    jobs, up_to_date = [], 0
+    for media_file in find_media(inputs):
+        paths = output_paths(media_file)
+        if not os.path.exists(paths["ass"]):
+            continue
+        if not force and is_fresh(paths["video"], paths["ass"], media_file):
+            up_to_date += 1
+            continue
+        jobs.append((media_file, paths["ass"], paths["video"]))
+    return jobs, up_to_date
+
+
+async def burn_one(job, slots, threads, retries, retry_delay):
+    """
+    Runs one burn in a free slot. Returns (job, attempts, error or None, seconds).
+    """
+    media_file, ass_file, video_file = job
+    root, extension = os.path.splitext(video_file)
+    temporary_file = f"{root}.reburn{extension}"
+    async with slots:
+        started = time.perf_counter()
+        error = None
+        for attempt in range(1, retries + 2):
+            try:
+                process = await asyncio.create_subprocess_exec(
+                    *burn_command(media_file, ass_file, temporary_file, threads),
+                    stdout=asyncio.subprocess.DEVNULL, stderr=asyncio.subprocess.PIPE
+                )
+            except OSError as e:  # FFmpeg missing from PATH; retrying will not help
+                return job, attempt, str(e), time.perf_counter() - started
+            _, stderr = await process.communicate()
+            if process.returncode == 0:
+                os.replace(temporary_file, video_file)
+                return job, attempt, None, time.perf_counter() - started
+            # The last lines of the FFmpeg log carry the actual error
+            error = f"exit code {process.returncode}: " + " | ".join(
+                stderr.decode("utf-8", "replace").strip().splitlines()[-3:])
+            logging.warning(f"Burn of {video_file} failed (attempt {attempt}): {error}")
+            if attempt <= retries:
+                await asyncio.sleep(retry_delay * attempt)
+        if os.path.exists(temporary_file):
+            os.remove(temporary_file)
+        return job, retries + 1, error, time.perf_counter() - started
+
+
+async def reburn_all(jobs, thread_budget, threads_per_job, retries=2, retry_delay=2.0):
+    slot_count = max(1, thread_budget // threads_per_job)
+    slots = asyncio.Semaphore(slot_count)
+    logging.info(f"Re-burning {len(jobs)} videos, {slot_count} at a time with {threads_per_job} threads each")
+    results = []
+    for done_count, finished in enumerate(asyncio.as_completed(
+            [burn_one(job, slots, threads_per_job, retries, retry_delay) for job in jobs]), start=1):
+        job, attempts, error, seconds = await finished
+        results.append((job, attempts, error, seconds))
+        logging.info(f"[{done_count}/{len(jobs)}] {'done  ' if not error else 'FAILED'} "
+                     f"{os.path.basename(job[2])} in {seconds:.1f}s")
+    return results
+
+
+def print_summary(results, up_to_date, wall_seconds, durations):
+    failed = [(job, error) for job, _, error, _ in results if error]
+    succeeded = len(results) - len(failed)
+    retried = sum(1 for _, attempts, error, _ in results if attempts > 1 and not error)
+    media_seconds = sum(durations[job[0]] for job, _, error, _ in results if not error)
+    busy_seconds = sum(seconds for *_, seconds in results)
+    print(
+        f"Re-burned {succeeded} of {len(results)} videos ({up_to_date} up to date, {retried} after a retry, "
+        f"{len(failed)} failed) in {wall_seconds:.1f}s: {succeeded / wall_seconds * 60 if wall_seconds else 0:.1f} videos/min, "
+        f"{media_seconds / wall_seconds if wall_seconds else 0:.1f}x real time, "
+        f"{busy_seconds / wall_seconds if wall_seconds else 0:.1f} jobs running on average."
+    )
+    for job, error in failed:
+        print(f"FAILED {job[0]}: {error}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Burn existing ASS subtitles into their videos again, in parallel.")
+    parser.add_argument("inputs", nargs="+", help="Media files or directories")
+    parser.add_argument("--thread-budget", type=int, default=usable_cores(), help="Threads for all jobs together")
+    parser.add_argument("--threads-per-job", type=int, default=2, help="Threads FFmpeg may use per job")
+    parser.add_argument("--retries", type=int, default=2, help="Retries per failed job")
+    parser.add_argument("--force", action="store_true", help="Re-burn even if the video is newer than its ASS file")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(stream=sys.stderr, level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    jobs, up_to_date = find_jobs(args.inputs, args.force)
+    if not jobs:
+        print(f"Nothing to re-burn ({up_to_date} videos up to date).")
+        return 0
+    durations = {job[0]: estimate_duration(job[0]) for job in jobs}
+
+    started = time.perf_counter()
+    results = asyncio.run(reburn_all(jobs, args.thread_budget, min(args.threads_per_job, args.thread_budget),
+                                     args.retries))
+    print_summary(results, up_to_date, time.perf_counter() - started, durations)
+    return 1 if any(error for _, _, error, _ in results) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
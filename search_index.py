@@ -0,0 +1,276 @@
+"""
+Timecoded full-text search over all produced transcripts.
+
+An SQLite database holds an inverted index from normalized tokens to
+(file, segment, word position, word start, speaker) postings, built from the
+word lists of the final transcripts. Postings are clustered by token, so a
+term lookup is a single index range scan, and phrase queries join the
+postings of consecutive tokens on their word positions. Files are
+re-indexed only when their size or mtime changed.
+
+Usage:
+    python search_index.py build archive.db D:/archive
+    python search_index.py query archive.db "\"quarterly numbers\"" --speaker SPEAKER_01
+
+benchmarks/bench_search_index.py measures build throughput and query
+latency on synthetic transcripts.
+"""
+
+import os
+import re
+import json
+import time
+import glob
+import sqlite3
+import argparse
+import unicodedata
+
+TOKEN_PATTERN = re.compile(r"\w+(?:['’]\w+)*")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    id INTEGER PRIMARY KEY,
+    path TEXT UNIQUE NOT NULL,
+    mtime REAL NOT NULL,
+    size INTEGER NOT NULL,
+    word_count INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS segments (
+    file_id INTEGER NOT NULL,
+    segment INTEGER NOT NULL,
+    start REAL,
+    end REAL,
+    speaker TEXT,
+    text TEXT,
+    first_position INTEGER NOT NULL,
+    last_position INTEGER NOT NULL,
+    PRIMARY KEY (file_id, segment)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS postings (
+    token TEXT NOT NULL,
+    file_id INTEGER NOT NULL,
+    position INTEGER NOT NULL,
+    segment INTEGER NOT NULL,
+    start REAL,
+    speaker TEXT,
+    PRIMARY KEY (token, file_id, position)
+) WITHOUT ROWID;
+"""
+
+
+def normalize_tokens(text):
+    """
+    Splits text into search tokens: NFKC-normalized, case-folded runs of
+    word characters (apostrophes inside words are kept).
+    """
+    return TOKEN_PATTERN.findall(unicodedata.normalize("NFKC", text).casefold())
+
+
+def format_timecode(seconds):
+    if seconds is None:
+        return "--:--:--.---"
+    return f"{int(seconds // 3600):02d}:{int((seconds % 3600) // 60):02d}:{seconds % 60:06.3f}"
+
+
+def _load_segments(path):
+    if path.endswith(".wxt"):
+        from transcript_store import read_transcript
+        return read_transcript(path)["segments"]
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)["segments"]
+
+
+class SearchIndex:
+    """
+    Inverted index over word-timed transcripts, stored in one SQLite file.
+    """
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self.connection = sqlite3.connect(db_path)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.executescript(SCHEMA)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self.connection.close()
+
+    # --- Indexing ---
+
+    def add_file(self, path, force=False):
+        """
+        Indexes one transcript. Returns the number of postings written, or 0
+        if the file is unchanged since it was last indexed.
+        """
+        path = os.path.abspath(path)
+        stat = os.stat(path)
+        row = self.connection.execute("SELECT id, mtime, size FROM files WHERE path = ?", (path,)).fetchone()
+        if row and not force and row[1] == stat.st_mtime and row[2] == stat.st_size:
+            return 0
+
+        segments = _load_segments(path)
+        segment_rows, posting_rows = [], []
+        position = 0
+        for segment_index, segment in enumerate(segments):
+            segment_speaker = segment.get("speaker")
+            first_position = position
+            for word in segment.get("words", []):
+                # Untimed words (numerals, symbols) fall back to the segment start
+                start = word.get("start", segment.get("start"))
+                speaker = word.get("speaker", segment_speaker)
+                for token in normalize_tokens(word.get("word", "")):
+                    posting_rows.append((token, position, segment_index, start, speaker))
+                    position += 1
+            segment_rows.append((segment_index, segment.get("start"), segment.get("end"), segment_speaker,
+                                 segment.get("text", "").strip(), first_position, position - 1))
+
+        # Inserting in key order keeps the clustered postings B-tree writes local
+        posting_rows.sort()
+        with self.connection:
+            if row:
+                file_id = row[0]
+                self.connection.execute("DELETE FROM postings WHERE file_id = ?", (file_id,))
+                self.connection.execute("DELETE FROM segments WHERE file_id = ?", (file_id,))
+                self.connection.execute("UPDATE files SET mtime = ?, size = ?, word_count = ? WHERE id = ?",
+                                        (stat.st_mtime, stat.st_size, position, file_id))
+            else:
+                file_id = self.connection.execute(
+                    "INSERT INTO files (path, mtime, size, word_count) VALUES (?, ?, ?, ?)",
+                    (path, stat.st_mtime, stat.st_size, position)).lastrowid
+            self.connection.executemany(
+                "INSERT INTO segments (file_id, segment, start, end, speaker, text, first_position, last_position) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                [(file_id,) + segment_row for segment_row in segment_rows])
+            self.connection.executemany(
+                "INSERT INTO postings (token, file_id, position, segment, start, speaker) VALUES (?, ?, ?, ?, ?, ?)",
+                [(token, file_id, pos, seg, start, speaker) for token, pos, seg, start, speaker in posting_rows])
+        return len(posting_rows)
+
+    def remove_file(self, path):
+        path = os.path.abspath(path)
+        with self.connection:
+            row = self.connection.execute("SELECT id FROM files WHERE path = ?", (path,)).fetchone()
+            if row:
+                self.connection.execute("DELETE FROM postings WHERE file_id = ?", (row[0],))
+                self.connection.execute("DELETE FROM segments WHERE file_id = ?", (row[0],))
+                self.connection.execute("DELETE FROM files WHERE id = ?", (row[0],))
+
+    def update(self, inputs, pattern="*_final.json"):
+        """
+        Indexes new and changed transcripts under `inputs` (files or
+        directories) and drops files that no longer exist. Returns
+        (files indexed, postings written).
+        """
+        paths = set()
+        for item in inputs:
+            if os.path.isdir(item):
+                paths.update(glob.glob(os.path.join(item, "**", pattern), recursive=True))
+            elif os.path.isfile(item):
+                paths.add(item)
+        indexed = postings = 0
+        for path in sorted(paths):
+            written = self.add_file(path)
+            if written:
+                indexed += 1
+                postings += written
+        for (path,) in self.connection.execute("SELECT path FROM files").fetchall():
+            if not os.path.exists(path):
+                self.remove_file(path)
+        return indexed, postings
+
+    # --- Queries ---
+
+    def search(self, query, phrase=None, speaker=None, limit=100):
+        """
+        Returns timecoded hits as dicts (path, segment, start, speaker, text).
+
+        Text in double quotes, or any query with `phrase=True`, must occur as
+        consecutive words. Otherwise every token has to occur in the same
+        segment, and the hit points at the first query token.
+        """
+        if phrase is None:
+            phrase = len(query) > 1 and query.startswith('"') and query.endswith('"')
+        tokens = normalize_tokens(query)
+        if not tokens:
+            return []
+
+        joins, conditions, parameters = [], ["p0.token = ?"], [tokens[0]]
+        for i, token in enumerate(tokens[1:], start=1):
+            if phrase:
+                # Each further token must sit at the first token's position + i
+                joins.append(f"JOIN postings p{i} ON p{i}.token = ? AND p{i}.file_id = p0.file_id "
+                             f"AND p{i}.position = p0.position + {i}")
+                parameters.insert(i - 1, token)
+            else:
+                # Segments own a contiguous position range, so this is a primary key range probe
+                conditions.append(f"EXISTS (SELECT 1 FROM postings p{i} WHERE p{i}.token = ? AND p{i}.file_id = p0.file_id "
+                                  f"AND p{i}.position BETWEEN s.first_position AND s.last_position)")
+                parameters.append(token)
+        if speaker:
+            conditions.append("p0.speaker = ?")
+            parameters.append(speaker)
+        sql = ("SELECT f.path, p0.segment, p0.start, p0.speaker, s.text FROM postings p0 "
+               + " ".join(joins) +
+               " JOIN segments s ON s.file_id = p0.file_id AND s.segment = p0.segment"
+               " JOIN files f ON f.id = p0.file_id"
+               " WHERE " + " AND ".join(conditions) +
+               # Primary key order, so SQLite can stop after `limit` hits instead of sorting them all
+               " ORDER BY p0.file_id, p0.position LIMIT ?")
+        parameters.append(limit)
+        return [
+            {"path": path, "segment": segment, "start": start, "speaker": hit_speaker, "text": text}
+            for path, segment, start, hit_speaker, text in self.connection.execute(sql, parameters)
+        ]
+
+    def stats(self):
+        files, words = self.connection.execute("SELECT COUNT(*), COALESCE(SUM(word_count), 0) FROM files").fetchone()
+        return {"files": files, "postings": words}
+
+
+def update_index(db_path, transcript_path):
+    """Adds or refreshes a single transcript; used by the pipeline after each file."""
+    with SearchIndex(db_path) as index:
+        return index.add_file(transcript_path)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build and query the transcript search index.")
+    subparsers = parser.add_subparsers(dest="command")
+
+    build = subparsers.add_parser("build", help="Index new and changed transcripts")
+    build.add_argument("db")
+    build.add_argument("inputs", nargs="+", help="Transcript files or directories")
+    build.add_argument("--pattern", default="*_final.json")
+
+    query = subparsers.add_parser("query", help="Search the index")
+    query.add_argument("db")
+    query.add_argument("text", help='Words, or a "quoted phrase"')
+    query.add_argument("--speaker")
+    query.add_argument("--limit", type=int, default=50)
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        with SearchIndex(args.db) as index:
+            started = time.perf_counter()
+            indexed, postings = index.update(args.inputs, args.pattern)
+            stats = index.stats()
+        print(f"Indexed {indexed} changed files ({postings:,} postings) in {time.perf_counter() - started:.1f}s; "
+              f"index holds {stats['files']} files.")
+    elif args.command == "query":
+        with SearchIndex(args.db) as index:
+            hits = index.search(args.text, speaker=args.speaker, limit=args.limit)
+        for hit in hits:
+            print(f"{hit['path']}  {format_timecode(hit['start'])}  [{hit['speaker'] or 'UNKNOWN'}]  {hit['text']}")
+        print(f"{len(hits)} hit(s)")
+    else:
+        parser.print_help()
+
+
+if __name__ == "__main__":
+    main()
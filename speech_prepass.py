@@ -0,0 +1,172 @@
+"""
+Energy-based speech-activity pre-pass.
+
+Finds the stretches of a decoded 16 kHz waveform that contain sound above
+the noise floor and builds a compacted buffer holding only those stretches,
+plus a remap table to translate timestamps on the compacted buffer back to
+the original timeline. Transcription and diarization then skip long silent
+breaks entirely.
+
+benchmarks/bench_speech_prepass.py measures how much audio is removed and
+the error of word timestamps found on the compacted audio, on synthetic
+recordings with known words and silence gaps.
+"""
+
+import time
+
+import numpy as np
+
+SAMPLE_RATE = 16000
+
+
+def frame_energy_db(audio, frame_length):
+    """
+    Returns the RMS level of each non-overlapping frame in dBFS.
+    """
+    frame_count = len(audio) // frame_length
+    frames = audio[:frame_count * frame_length].reshape(frame_count, frame_length).astype(np.float32)
+    rms = np.sqrt(np.mean(frames * frames, axis=1))
+    return 20.0 * np.log10(np.maximum(rms, 1e-10))
+
+
+def _runs(mask):
+    """
+    Returns the start and end indices of the runs of True in a boolean array.
+    """
+    edges = np.diff(np.concatenate(([False], mask, [False])).astype(np.int8))
+    return np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)
+
+
+def detect_speech(audio, sample_rate=SAMPLE_RATE, frame_ms=30, margin_db=12.0, floor_db=-55.0,
+                  min_speech=0.25, min_silence=0.6, pad=0.25):
+    """
+    Returns an (n, 2) array of (start, end) sample indices of the regions
+    that contain speech, padded by `pad` seconds and merged when the gap
+    between them is shorter than `min_silence` seconds.
+    """
+    frame_length = int(sample_rate * frame_ms / 1000)
+    if len(audio) < frame_length:
+        return np.array([[0, len(audio)]], dtype=np.int64)
+
+    energy = frame_energy_db(audio, frame_length)
+    # Adaptive threshold: a margin above the quietest decile, never below an absolute floor
+    noise_floor = np.percentile(energy, 10)
+    threshold = max(noise_floor + margin_db, floor_db)
+    starts, ends = _runs(energy > threshold)
+    if len(starts) == 0:
+        return np.empty((0, 2), dtype=np.int64)
+
+    # Close short gaps, then drop blips that are too short to be speech
+    frame_seconds = frame_length / sample_rate
+    gaps = (starts[1:] - ends[:-1]) * frame_seconds
+    keep = np.concatenate(([True], gaps >= min_silence))
+    starts = starts[keep]
+    ends = ends[np.concatenate((keep[1:], [True]))]
+    long_enough = (ends - starts) * frame_seconds >= min_speech
+    starts, ends = starts[long_enough], ends[long_enough]
+    if len(starts) == 0:
+        return np.empty((0, 2), dtype=np.int64)
+
+    # Pad in samples and merge regions that now overlap
+    pad_samples = int(pad * sample_rate)
+    region_starts = np.maximum(starts * frame_length - pad_samples, 0)
+    region_ends = np.minimum(ends * frame_length + pad_samples, len(audio))
+    overlaps = region_starts[1:] <= region_ends[:-1]
+    keep = np.concatenate(([True], ~overlaps))
+    region_starts = region_starts[keep]
+    region_ends = region_ends[np.concatenate((keep[1:], [True]))]
+    return np.stack((region_starts, region_ends), axis=1).astype(np.int64)
+
+
+def compact_audio(audio, regions, sample_rate=SAMPLE_RATE):
+    """
+    Concatenates the speech regions. Returns the compacted buffer and a remap
+    table with one row (compact_start, original_start, length) per region,
+    all in seconds.
+    """
+    lengths = regions[:, 1] - regions[:, 0]
+    compact_starts = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+    compact = np.concatenate([audio[start:end] for start, end in regions]) if len(regions) else audio[:0]
+    remap = np.stack((compact_starts, regions[:, 0], lengths), axis=1).astype(np.float64) / sample_rate
+    return compact, remap
+
+
+def to_original(times, remap, end=False):
+    """
+    Maps timestamps on the compacted buffer back to the original timeline.
+    A time on the seam between two regions is the start of the later one,
+    or, with `end`, the end of the earlier one.
+    """
+    times = np.asarray(times, dtype=np.float64)
+    index = np.clip(np.searchsorted(remap[:, 0], times, side="left" if end else "right") - 1, 0, len(remap) - 1)
+    offset = np.clip(times - remap[index, 0], 0.0, remap[index, 2])
+    return remap[index, 1] + offset
+
+
+def to_compact(times, remap):
+    """
+    Maps original timestamps onto the compacted buffer; times inside removed
+    silence snap to the start of the next kept region.
+    """
+    times = np.asarray(times, dtype=np.float64)
+    index = np.clip(np.searchsorted(remap[:, 1], times, side="right") - 1, 0, len(remap) - 1)
+    offset = np.clip(times - remap[index, 1], 0.0, remap[index, 2])
+    return remap[index, 0] + offset
+
+
+def build_speech_buffer(audio, sample_rate=SAMPLE_RATE, min_saving=0.1, **detect_options):
+    """
+    Runs the pre-pass. Returns (buffer, remap, stats); `remap` is None when
+    compaction would save less than `min_saving` of the audio or no speech
+    was found, in which case `buffer` is the original audio.
+    """
+    started = time.perf_counter()
+    regions = detect_speech(audio, sample_rate, **detect_options)
+    total = len(audio) / sample_rate
+    kept = float((regions[:, 1] - regions[:, 0]).sum()) / sample_rate if len(regions) else 0.0
+    stats = {
+        "audio_seconds": round(total, 2),
+        "speech_seconds": round(kept, 2),
+        "regions": int(len(regions)),
+        "prepass_seconds": round(time.perf_counter() - started, 3),
+    }
+    if kept == 0.0 or kept > total * (1.0 - min_saving):
+        stats["applied"] = False
+        return audio, None, stats
+
+    compact, remap = compact_audio(audio, regions, sample_rate)
+    stats["applied"] = True
+    return compact, remap, stats
+
+
+def restore_result_timeline(result, remap):
+    """
+    Rewrites every segment and word start/end of a WhisperX result in place
+    from the compacted timeline to the original one.
+    """
+    if remap is None:
+        return result
+    # Collect all timestamps so they are mapped in one vectorized call per key
+    holders = []
+    for segment in result["segments"]:
+        holders.append(segment)
+        holders.extend(segment.get("words", []))
+    for key in ("start", "end"):
+        slots = [holder for holder in holders if holder.get(key) is not None]
+        mapped = to_original([holder[key] for holder in slots], remap, end=key == "end")
+        for holder, value in zip(slots, mapped):
+            holder[key] = round(float(value), 3)
+    return result
+
+
+def restore_dataframe_timeline(frame, remap):
+    """
+    Maps the start/end columns of a diarization DataFrame back to the
+    original timeline.
+    """
+    if remap is None:
+        return frame
+    frame = frame.copy()
+    frame["start"] = to_original(frame["start"].to_numpy(), remap)
+    frame["end"] = to_original(frame["end"].to_numpy(), remap, end=True)
+    return frame
@@ -1,44 +1,86 @@
 import json
 import os
+import argparse
+
+from timing_repair import repair_word_timings
+
+def srt_timestamp(seconds):
+    return f"{int(seconds // 3600):02d}:{int((seconds % 3600) // 60):02d}:{int(seconds % 60):02d},{int((seconds % 1) * 1000):03d}"
+
+
+def srt_cues(segment):
+    """
+    Yields (start, end, cue) for every word of one segment, where cue is the
+    SRT block without its running index.
+    """
+    for word_info in segment["words"]:
+        # Only left after repair_word_timings if the segment has no bounds either
+        if "start" not in word_info or "end" not in word_info:
+            continue
+
+        word_start = word_info["start"]
+        word_end = word_info["end"]
+        speaker = word_info.get("speaker", "UNKNOWN")  # Get speaker, default to "UNKNOWN"
+
+        yield word_start, word_end, f"{srt_timestamp(word_start)} --> {srt_timestamp(word_end)}\n[{speaker}]: {word_info['word']}\n\n"
+
+
+def srt_path_for(json_path, output_dir):
+    base_name = os.path.splitext(os.path.basename(json_path))[0]
+    return os.path.join(output_dir, f"{base_name}_word_lvl.srt")
+
+
+def write_srt(segments, srt_path):
+    """
+    Writes the word-level SRT file for a list of WhisperX segments. Missing
+    word timings are interpolated first (in place); returns how many were.
+    """
+    repaired = repair_word_timings(segments)
+    srt_lines = [cue for segment in segments for _, _, cue in srt_cues(segment)]
+    with open(srt_path, "w", encoding="utf-8") as srt_file:
+        for i, subtitle in enumerate(srt_lines, start=1):
+            srt_file.write(f"{i}\n")
+            srt_file.write(subtitle)
+    return repaired
+
 
 def create_srt_from_json(json_path, output_dir):
     try:
-        with open(json_path, "r", encoding="utf-8") as json_file:
-            data = json.load(json_file)
-            segments = data["segments"]
+        if json_path.endswith(".wxt"):
+            # Binary transcript written by transcript_store
+            from transcript_store import read_transcript
+            segments = read_transcript(json_path)["segments"]
+        else:
+            with open(json_path, "r", encoding="utf-8") as json_file:
+                data = json.load(json_file)
+                segments = data["segments"]
     except FileNotFoundError:
         print(f"Error: The file {json_path} was not found.")
-        exit(1)
+        raise
     except json.JSONDecodeError as e:
         print(f"Error decoding JSON: {e}")
-        exit(1)
+        raise
 
     try:
-        srt_lines = []
-
-        for segment in segments:
-            words = segment["words"]
+        srt_path = srt_path_for(json_path, output_dir)
+        repaired = write_srt(segments, srt_path)
+        if repaired:
+            print(f"Interpolated timings for {repaired} words with missing timing information.")
+        print(f"SRT file created: {srt_path}")
+        return repaired
+    except Exception as e:
+        print(f"An error occurred: {e}")
+        raise
 
-            for word_info in words:
-                if "start" not in word_info or "end" not in word_info:
-                    print(f"Skipping word with missing timing information: {word_info['word']}")
-                    continue
 
-                word_start = word_info["start"]
-                word_end = word_info["end"]
-                speaker = word_info.get("speaker", "UNKNOWN")  # Get speaker, default to "UNKNOWN"
+def main(argv=None):
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--input", type=str, required=True, help="Path to the input JSON file")
+    parser.add_argument("--output-dir", type=str, help="Directory for the SRT file (default: next to the JSON)")
+    args = parser.parse_args(argv)
 
-                start_srt = f"{int(word_start // 3600):02d}:{int((word_start % 3600) // 60):02d}:{int(word_start % 60):02d},{int((word_start % 1) * 1000):03d}"
-                end_srt = f"{int(word_end // 3600):02d}:{int((word_end % 3600) // 60):02d}:{int(word_end % 60):02d},{int((word_end % 1) * 1000):03d}"
+    create_srt_from_json(args.input, args.output_dir or os.path.dirname(os.path.abspath(args.input)))
 
-                srt_lines.append(f"{start_srt} --> {end_srt}\n[{speaker}]: {word_info['word']}\n\n")
 
-        base_name = os.path.splitext(os.path.basename(json_path))[0]
-        srt_path = os.path.join(output_dir, f"{base_name}_word_lvl.srt")
-        with open(srt_path, "w", encoding="utf-8") as srt_file:
-            for i, subtitle in enumerate(srt_lines, start=1):
-                srt_file.write(f"{i}\n")
-                srt_file.write(subtitle)
-        print(f"SRT file created: {srt_path}")
-    except Exception as e:
-        print(f"An error occurred: {e}")
\ No newline at end of file
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""
+Single command-line entry point for all tools in this repository.
+
+    python subtitles_cli.py <command> [options]
+
+Each command imports only the module it dispatches to, so the subtitle
+commands (ass, srt, batch) start without loading whisperx, torch, pyannote,
+numpy or tkinter. tests/test_import_time.py checks that this stays true and
+that they start within their time budget.
+"""
+
+import sys
+import importlib
+
+# command -> (module, description)
+COMMANDS = {
+    "ass": ("ass_from_json", "Convert a WhisperX JSON transcript to an ASS file"),
+    "srt": ("srt_from_json", "Convert a WhisperX JSON transcript to a word-level SRT file"),
+    "batch": ("batch_convert", "Convert many transcripts to ASS/SRT in parallel"),
+    "store": ("transcript_store", "Convert transcripts between JSON and the binary .wxt format"),
+    "repair": ("timing_repair", "Interpolate missing word timings in a transcript"),
+    "search": ("search_index", "Build or query the timecoded transcript search index"),
+    "query": ("transcript_query", "Look up words and speakers by time and export clips"),
+    "fingerprint": ("fingerprint", "Fingerprint recordings and find repeated copies"),
+    "live": ("live_subtitles", "Subtitle a live PCM stream from stdin or a named pipe"),
+    "regen": ("incremental", "Regenerate subtitles and video after editing _final.json"),
+    "transcribe": ("batch_transcribe", "Transcribe many short files with batches shared across files"),
+    "reburn": ("reburn", "Burn existing ASS files into their videos again, in parallel"),
+    "process": ("video_processor", "Run the full transcription pipeline on media files"),
+    "pipeline": ("pipeline", "Bring selected outputs up to date, skipping fresh stages"),
+    "pool": ("worker_pool", "Transcribe many short files with a pool of CPU worker processes"),
+    "watch": ("watch_folder", "Run the watch-folder daemon"),
+    "serve": ("job_server", "Run the local HTTP job API"),
+    "profile": ("device_profile", "Show the execution profile"),
+}
+
+
+def print_usage():
+    print("Usage: python subtitles_cli.py <command> [options]\n\nCommands:")
+    for name, (_, description) in COMMANDS.items():
+        print(f"  {name:<12} {description}")
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv or argv[0] in ("-h", "--help"):
+        print_usage()
+        return 0
+
+    command, rest = argv[0], argv[1:]
+    if command not in COMMANDS:
+        print(f"Unknown command: {command}\n")
+        print_usage()
+        return 2
+
+    module = importlib.import_module(COMMANDS[command][0])
+    return module.main(rest) or 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,8 @@
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# The modules live at the repository root, not in a package
+sys.path.insert(0, ROOT)
+# Synthetic data and stub models, shared with the benchmarks
+sys.path.insert(1, os.path.join(ROOT, "benchmarks"))
@@ -0,0 +1,27 @@
+from ass_from_json import ass_events, ass_header, speaker_colour
+
+
+def style_names(header):
+    return [line.split(",", 1)[0][len("Style: "):] for line in header.splitlines() if line.startswith("Style: ")]
+
+
+def segment(speaker=None):
+    result = {"text": "Hello there", "words": [{"word": "Hello", "start": 0.0, "end": 0.5},
+                                                {"word": "there", "start": 0.5, "end": 1.0}]}
+    if speaker is not None:
+        result["speaker"] = speaker
+    return result
+
+
+def test_speaker_named_default_gets_its_own_styles():
+    segments = [segment(), segment("Default"), segment("SPEAKER_00")]
+    names = style_names(ass_header(segments))
+    assert len(names) == len(set(names))
+    assert names == ["Default", "Default_hl", "Spk_Default", "Spk_Default_hl", "Spk_SPEAKER_00", "Spk_SPEAKER_00_hl"]
+    _, _, line = next(ass_events(segments[1]))
+    assert ",Spk_Default,," in line and "{\\rSpk_Default_hl}Hello{\\r}" in line
+
+
+def test_first_speakers_keep_the_inline_colors():
+    assert [speaker_colour(f"SPEAKER_0{i}") for i in range(3)] == ["&H00128F07", "&H00702618", "&H00161691"]
+    assert len({speaker_colour(f"SPEAKER_{i:02d}") for i in range(12)}) == 12
@@ -0,0 +1,48 @@
+import os
+import json
+
+import pytest
+
+import timing_repair
+from batch_convert import WRITER_MODULES, convert_batch, find_transcripts, is_fresh, target_paths
+
+TRANSCRIPT = {"segments": [{"start": 0.0, "end": 1.0, "text": " Hello", "speaker": "SPEAKER_00",
+                            "words": [{"word": "Hello", "start": 0.0, "end": 1.0, "speaker": "SPEAKER_00"}]}]}
+
+
+def write_transcript(path):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(TRANSCRIPT), encoding="utf-8")
+    return str(path)
+
+
+def test_output_dir_mirrors_the_layout(tmp_path):
+    write_transcript(tmp_path / "in" / "a" / "talk_final.json")
+    write_transcript(tmp_path / "in" / "b" / "talk_final.json")
+    out = tmp_path / "out"
+    summary = convert_batch(find_transcripts([str(tmp_path / "in")]), workers=1, output_dir=str(out), progress=False)
+    assert summary["converted"] == 2 and summary["failed"] == 0
+    for part in ("a", "b"):
+        assert (out / part / "talk.ass").exists()
+        assert (out / part / "talk_final_word_lvl.srt").exists()
+
+
+def test_duplicate_targets_are_refused(tmp_path):
+    # Both render to talk.ass
+    paths = [write_transcript(tmp_path / "talk_final.json"), write_transcript(tmp_path / "talk.json")]
+    with pytest.raises(ValueError, match="talk.ass"):
+        convert_batch(paths, formats=["ass"], workers=1, progress=False)
+    assert not (tmp_path / "talk.ass").exists()
+
+
+def test_timing_repair_is_a_dependency(tmp_path):
+    json_path = write_transcript(tmp_path / "talk_final.json")
+    convert_batch([json_path], workers=1, progress=False)
+    ass_path = target_paths(json_path)["ass"]
+    assert is_fresh(ass_path, json_path, *WRITER_MODULES["ass"])
+    assert timing_repair.__file__ in WRITER_MODULES["ass"] and timing_repair.__file__ in WRITER_MODULES["srt"]
+    # An output older than timing_repair.py is stale
+    old = os.path.getmtime(timing_repair.__file__) - 10
+    os.utime(ass_path, (old, old))
+    os.utime(json_path, (old - 10, old - 10))
+    assert not is_fresh(ass_path, json_path, *WRITER_MODULES["ass"])
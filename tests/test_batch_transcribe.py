@@ -0,0 +1,56 @@
+import numpy as np
+
+from batch_transcribe import MAX_CHUNK_SECONDS, BatchTranscriber, chunk_audio
+from speech_prepass import SAMPLE_RATE
+from stub_model import StubBatchModel
+from synthetic import synthetic_recording
+
+
+def clips(count, seed=0):
+    """Short clips with known speech spans: (spans, audio)."""
+    rng = np.random.default_rng(seed)
+    for i in range(count):
+        seconds = rng.uniform(20.0, 60.0)
+        spans, position = [], 0.5
+        while position < seconds - 4.0:
+            length = rng.uniform(2.0, 12.0)
+            spans.append((position, min(position + length, seconds - 0.5)))
+            position += length + rng.uniform(1.0, 3.0)
+        yield spans, synthetic_recording(spans, seconds, seed=i)
+
+
+def test_chunks_are_bounded():
+    audio = synthetic_recording([(1.0, 75.0), (80.0, 85.0)], 90.0)
+    chunks = chunk_audio(audio)
+    assert all(end - start <= MAX_CHUNK_SECONDS * SAMPLE_RATE for start, end in chunks)
+    assert chunks[0][0] <= 1.0 * SAMPLE_RATE and chunks[-1][1] >= 85.0 * SAMPLE_RATE
+
+
+def test_pooled_batches_are_full_and_results_complete():
+    model = StubBatchModel(languages=("en", "de"))
+    transcriber = BatchTranscriber(model, batch_size=16)
+    expected, finished = {}, []
+    transcriber.on_result = lambda key, result: finished.append(key)
+    for key, (spans, audio) in enumerate(clips(40)):
+        expected[key] = spans
+        transcriber.add(key, audio)
+    results = transcriber.finish()
+
+    # Every file comes back once, complete, in order and on its own timeline
+    assert sorted(finished) == sorted(expected)
+    for key, spans in expected.items():
+        segments = results[key]["segments"]
+        assert results[key]["language"] == ("en", "de")[key % 2]
+        assert all(a["start"] <= b["start"] for a, b in zip(segments, segments[1:]))
+        assert segments[0]["start"] <= spans[0][0] + 0.5 and segments[-1]["end"] >= spans[-1][1] - 0.5
+
+    # Only the last batch per language may be partial, and pooling beats batching per file
+    sizes = {}
+    for language, size in model.batches:
+        sizes.setdefault(language, []).append(size)
+    assert all(size == 16 for batch_sizes in sizes.values() for size in batch_sizes[:-1])
+    stats = transcriber.stats()
+    # As few batches as the chunk count per language allows
+    assert stats["batches"] == sum(-(-sum(batch_sizes) // 16) for batch_sizes in sizes.values())
+    assert stats["batches"] < stats["per_file_batches"]
+    assert stats["occupancy"] > 2 * stats["per_file_occupancy"]
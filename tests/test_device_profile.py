@@ -0,0 +1,66 @@
+import pytest
+
+import device_profile
+from device_profile import MAX_BATCH_SIZE, cpu_batch_size, detect_profile
+
+
+@pytest.fixture
+def machine(monkeypatch):
+    """Sets the cores, free memory and CUDA device detect_profile sees."""
+    for variable in ("WHISPERX_DEVICE", "WHISPERX_COMPUTE_TYPE", "WHISPERX_BATCH_SIZE", "WHISPERX_THREADS"):
+        monkeypatch.delenv(variable, raising=False)
+
+    def configure(cores, memory_gb, cuda=None):
+        monkeypatch.setattr(device_profile, "usable_cores", lambda: cores)
+        monkeypatch.setattr(device_profile, "available_memory_gb", lambda: memory_gb)
+        monkeypatch.setattr(device_profile, "_cuda_info", lambda: cuda)
+    return configure
+
+
+@pytest.mark.parametrize("cores, memory_gb, expected", [
+    (8, 32.0, 4),          # Half the cores
+    (64, 64.0, MAX_BATCH_SIZE),
+    (64, 8.0, 16),         # (8 - 3) / 0.25 = 20 items fit
+    (64, 4.0, 4),          # Memory is the limit
+    (6, 32.0, 2),          # Rounded down to a power of two
+    (2, None, 1),          # Unknown memory: cores decide
+    (16, 2.0, 1),          # Less than the models need: still one item
+])
+def test_cpu_batch_size(cores, memory_gb, expected):
+    assert cpu_batch_size(cores, memory_gb) == expected
+
+
+def test_cpu_profile(machine):
+    machine(cores=16, memory_gb=64.0)
+    profile = detect_profile()
+    assert profile == {"cores": 16, "memory_gb": 64.0, "device": "cpu", "compute_type": "int8",
+                       "batch_size": 8, "threads": 16}
+    # Stages running at the same time share the cores
+    assert detect_profile(concurrent_stages=2)["threads"] == 8
+    assert detect_profile(concurrent_stages=32)["threads"] == 1
+
+
+@pytest.mark.parametrize("capability, compute_type", [((8, 6), "float16"), ((6, 1), "int8_float16"), ((5, 2), "float32")])
+def test_cuda_profile(machine, capability, compute_type):
+    machine(cores=16, memory_gb=64.0, cuda=("Test GPU", 24.0, capability))
+    profile = detect_profile()
+    assert profile["device"] == "cuda" and profile["compute_type"] == compute_type
+    assert profile["batch_size"] == MAX_BATCH_SIZE
+    assert profile["threads"] == 4
+    # (8 - 5) / 0.35 = 8.6 items fit
+    machine(cores=16, memory_gb=64.0, cuda=("Test GPU", 8.0, capability))
+    assert detect_profile()["batch_size"] == 8
+
+
+def test_missing_cuda_falls_back_to_cpu(machine):
+    machine(cores=4, memory_gb=16.0)
+    assert detect_profile(device="cuda")["device"] == "cpu"
+
+
+def test_pinned_values(machine, monkeypatch):
+    machine(cores=16, memory_gb=64.0, cuda=("Test GPU", 24.0, (8, 6)))
+    assert detect_profile(device="cpu")["device"] == "cpu"
+    monkeypatch.setenv("WHISPERX_BATCH_SIZE", "3")
+    monkeypatch.setenv("WHISPERX_THREADS", "5")
+    profile = detect_profile(compute_type="int8")
+    assert (profile["batch_size"], profile["threads"], profile["compute_type"]) == (3, 5, "int8")
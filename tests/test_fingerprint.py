@@ -0,0 +1,49 @@
+import os
+
+import pytest
+
+from fingerprint import SAMPLE_RATE, FingerprintIndex, shift_transcript
+from synthetic import synthetic_program
+
+SECONDS = 30.0
+
+
+@pytest.fixture
+def index(tmp_path):
+    with FingerprintIndex(str(tmp_path / "fp.db")) as index:
+        for i in range(3):
+            path = str(tmp_path / f"recording{i}.wav")
+            open(path, "wb").close()  # The index only stats the file
+            index.add_file(path, synthetic_program(SECONDS, seed=i))
+        yield index
+
+
+def test_trimmed_copy_matches_at_its_offset(index):
+    source = synthetic_program(SECONDS, seed=1)
+    matches = index.match(source[int(6.0 * SAMPLE_RATE):-int(3.0 * SAMPLE_RATE)])
+    assert os.path.basename(matches[0]["path"]) == "recording1.wav"
+    assert matches[0]["offset"] == pytest.approx(6.0, abs=0.05)
+
+
+def test_unrelated_recording_has_no_match(index):
+    assert index.match(synthetic_program(SECONDS, seed=999)) == []
+
+
+def test_shift_transcript_drops_untimed_segments_outside_the_copy():
+    result = {"segments": [
+        {"text": " before"},
+        {"start": 1.0, "end": 3.0, "text": " one", "words": [{"word": "one", "start": 1.0, "end": 3.0}, {"word": "%"}]},
+        {"text": " between"},
+        {"start": 12.0, "end": 14.0, "text": " two", "words": [{"word": "two", "start": 12.0, "end": 14.0}]},
+        {"text": " inside"},
+        {"start": 15.0, "end": 16.0, "text": " three", "words": []},
+        {"text": " after"},
+    ]}
+    # The copy starts 10 s into the original and lasts 8 s
+    shifted = shift_transcript(result, 10.0, 8.0)
+    assert [segment["text"] for segment in shifted["segments"]] == [" two", " inside", " three", " after"]
+    assert (shifted["segments"][0]["start"], shifted["segments"][0]["end"]) == (2.0, 4.0)
+    # From the start, the first segment's untimed word stays with it
+    shifted = shift_transcript(result, 0.0, 5.0)
+    assert [segment["text"] for segment in shifted["segments"]] == [" before", " one"]
+    assert [word["word"] for word in shifted["segments"][1]["words"]] == ["one", "%"]
@@ -0,0 +1,41 @@
+"""
+The subtitle-only commands must start fast: a fresh interpreter that
+imports their module the way subtitles_cli.py does stays within the budget
+and does not load any of the heavy modules.
+"""
+
+import os
+import sys
+import time
+import subprocess
+
+import pytest
+
+from subtitles_cli import COMMANDS
+
+LIGHT_COMMANDS = ("ass", "srt", "batch")
+HEAVY_MODULES = ("whisperx", "torch", "pyannote", "numpy", "tkinter", "inputimeout")
+IMPORT_BUDGET_MS = 100.0
+RUNS = 5
+
+PROBE = (
+    "import sys, importlib; import subtitles_cli; importlib.import_module(sys.argv[1]); "
+    "print(','.join(sorted(name for name in sys.modules if name.split('.')[0] in sys.argv[2].split(','))))"
+)
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def start(module):
+    """Wall time of the whole interpreter start in ms, which is what the user waits for, and the heavy modules loaded."""
+    started = time.perf_counter()
+    heavy = subprocess.run([sys.executable, "-c", PROBE, module, ",".join(HEAVY_MODULES)],
+                           cwd=REPO_DIR, check=True, capture_output=True, text=True).stdout.strip()
+    return (time.perf_counter() - started) * 1000, heavy
+
+
+@pytest.mark.parametrize("command", LIGHT_COMMANDS)
+def test_light_command_starts_fast(command):
+    runs = [start(COMMANDS[command][0]) for _ in range(RUNS)]
+    assert runs[0][1] == "", f"{command} imports heavy modules: {runs[0][1]}"
+    best = min(elapsed for elapsed, _ in runs)
+    assert best <= IMPORT_BUDGET_MS, f"{command} starts in {best:.1f} ms (budget {IMPORT_BUDGET_MS:.0f} ms)"
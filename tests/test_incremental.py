@@ -0,0 +1,91 @@
+import os
+import json
+
+from ass_from_json import ass_events
+from srt_from_json import srt_cues
+from incremental import collect_cues, concat_list, diff_cues, gop_ranges, merge_ranges, regenerate, save_rendered
+from video_processor import output_paths
+
+
+def transcript(middle_word="big"):
+    segments = []
+    for i in range(3):
+        start = i * 10.0
+        words = [("Hello", start, start + 0.5), (middle_word, start + 0.5, start + 1.0), ("world", start + 1.0, start + 2.0)]
+        segments.append({"start": start, "end": start + 2.0, "text": " " + " ".join(word for word, _, _ in words),
+                         "speaker": "SPEAKER_00",
+                         "words": [{"word": word, "start": a, "end": b, "speaker": "SPEAKER_00"} for word, a, b in words]})
+    return {"segments": segments, "language": "en"}
+
+
+def edited(word="bigger", segment=1):
+    result = transcript()
+    target = result["segments"][segment]
+    target["words"][1]["word"] = word
+    target["text"] = " " + " ".join(w["word"] for w in target["words"])
+    return result
+
+
+def test_one_word_edit_changes_only_its_segment():
+    old, new = transcript()["segments"], edited()["segments"]
+    # Every ASS event of a segment shows the whole line, so the whole segment changes
+    assert diff_cues(collect_cues(old, ass_events), collect_cues(new, ass_events)) == [(10.0, 12.0)]
+    # SRT cues hold one word each
+    assert diff_cues(collect_cues(old, srt_cues), collect_cues(new, srt_cues)) == [(10.5, 11.0)]
+    assert diff_cues(collect_cues(old, ass_events), collect_cues(old, ass_events)) == []
+
+
+def test_merge_ranges():
+    assert merge_ranges([(5.0, 6.0), (0.0, 1.0), (1.0, 2.0), (5.5, 7.0)]) == [(0.0, 2.0), (5.0, 7.0)]
+    assert merge_ranges([(0.0, 1.0), (1.4, 2.0)]) == [(0.0, 1.0), (1.4, 2.0)]
+    assert merge_ranges([(0.0, 1.0), (1.4, 2.0)], gap=0.5) == [(0.0, 2.0)]
+    assert merge_ranges([]) == []
+
+
+def test_gop_ranges_snap_to_keyframes():
+    keyframes, duration = [0.0, 2.0, 4.0, 6.0, 8.0], 9.5
+    assert gop_ranges([(2.5, 3.0)], keyframes, duration) == [(2.0, 4.0)]
+    # First and last GOP
+    assert gop_ranges([(0.1, 0.5)], keyframes, duration) == [(0.0, 2.0)]
+    assert gop_ranges([(8.5, 9.0)], keyframes, duration) == [(8.0, 9.5)]
+    # Changes in neighbouring GOPs become one piece
+    assert gop_ranges([(2.5, 3.0), (4.5, 5.0)], keyframes, duration) == [(2.0, 6.0)]
+    assert gop_ranges([(0.5, 1.0), (8.5, 9.0)], keyframes, duration) == [(0.0, 2.0), (8.0, 9.5)]
+    # A stream whose first keyframe is not at 0
+    assert gop_ranges([(0.0, 0.02)], [0.04, 2.04], 3.0) == [(0.0, 0.04)]
+
+
+def test_concat_list_alternates_previous_output_and_pieces(tmp_path):
+    previous = str(tmp_path / "talk_subtitled.mp4")
+    pieces = [(2.0, 4.0, str(tmp_path / "piece_0000.mp4")), (8.0, 9.5, str(tmp_path / "piece_0001.mp4"))]
+    root = str(tmp_path).replace("\\", "/")
+    assert concat_list(previous, pieces, 9.5).splitlines() == [
+        "ffconcat version 1.0",
+        f"file '{root}/talk_subtitled.mp4'", "inpoint 0.0", "outpoint 2.0",
+        f"file '{root}/piece_0000.mp4'",
+        f"file '{root}/talk_subtitled.mp4'", "inpoint 4.0", "outpoint 8.0",
+        f"file '{root}/piece_0001.mp4'",
+    ]
+    # A piece at the start, and an untouched tail without an outpoint
+    assert concat_list(previous, [(0.0, 2.0, pieces[0][2])], 9.5).splitlines()[1:] == [
+        f"file '{root}/piece_0000.mp4'", f"file '{root}/talk_subtitled.mp4'", "inpoint 2.0"]
+
+
+def test_regenerate_without_video_changes(tmp_path):
+    video = str(tmp_path / "talk.mp4")
+    open(video, "wb").close()
+    paths = output_paths(video)
+    with open(paths["final_json"], "w", encoding="utf-8") as f:
+        json.dump(transcript(), f)
+    save_rendered(paths["final_json"], paths["rendered_json"], "final_json", False)
+    open(paths["video"], "wb").close()
+
+    with open(paths["final_json"], "w", encoding="utf-8") as f:
+        json.dump(edited(), f)
+    assert regenerate(video, dry_run=True) == {"mode": "dry-run", "changed_ranges": [(10.0, 12.0)]}
+
+    # Back to the rendered text: the subtitles are written, the video is left alone
+    with open(paths["final_json"], "w", encoding="utf-8") as f:
+        json.dump(transcript(), f)
+    assert regenerate(video) == {"changed_ranges": [], "mode": "unchanged"}
+    assert os.path.exists(paths["ass"]) and os.path.getsize(paths["video"]) == 0
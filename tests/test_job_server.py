@@ -0,0 +1,142 @@
+import os
+import json
+import time
+import queue
+import socket
+import threading
+import urllib.error
+import urllib.request
+
+import pytest
+
+from job_server import JobManager, create_server
+from video_processor import output_paths
+
+
+def stub_processor(video_file):
+    """Stands in for the pipeline: writes the artifacts the server serves."""
+    paths = output_paths(video_file)
+    with open(paths["final_json"], "w", encoding="utf-8") as f:
+        json.dump({"segments": []}, f)
+    with open(paths["srt"], "w", encoding="utf-8") as f:
+        f.write("1\n00:00:00,000 --> 00:00:01,000\n[SPEAKER_00]: Hello\n\n")
+    return paths["video"]
+
+
+@pytest.fixture
+def server(tmp_path):
+    manager = JobManager(stub_processor, max_queue=4)
+    server = create_server(manager, port=0, spool_dir=str(tmp_path / "spool"))
+    thread = threading.Thread(target=server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True)
+    thread.start()
+    server.url = f"http://127.0.0.1:{server.server_address[1]}"
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def request(url, data=None, headers=None):
+    """Returns (status, decoded JSON or raw bytes)."""
+    try:
+        with urllib.request.urlopen(urllib.request.Request(url, data=data, headers=headers or {}), timeout=5) as response:
+            status, body, kind = response.status, response.read(), response.headers["Content-Type"]
+    except urllib.error.HTTPError as e:
+        status, body, kind = e.code, e.read(), e.headers["Content-Type"]
+    return status, json.loads(body) if kind.startswith("application/json") else body
+
+
+def wait_for(server, job_id):
+    for _ in range(200):
+        status, job = request(f"{server.url}/jobs/{job_id}")
+        if job["state"] in ("done", "failed"):
+            return job
+        time.sleep(0.01)
+    raise AssertionError(f"Job {job_id} did not finish")
+
+
+def spooled(server):
+    return os.listdir(server.spool_dir)
+
+
+def test_path_job_and_artifact(server, tmp_path):
+    media = tmp_path / "talk.mp4"
+    media.write_bytes(b"\0" * 16)
+    status, job = request(f"{server.url}/jobs", json.dumps({"path": str(media), "priority": 2}).encode())
+    assert status == 202 and job["priority"] == 2
+    assert wait_for(server, job["id"])["state"] == "done"
+    status, body = request(f"{server.url}/jobs/{job['id']}/artifacts/srt")
+    assert status == 200 and b"Hello" in body
+    status, error = request(f"{server.url}/jobs/{job['id']}/artifacts/mp3")
+    assert status == 404
+
+
+def test_upload_job(server):
+    status, job = request(f"{server.url}/jobs?filename=talk.mp4", b"\0" * 1000)
+    assert status == 202
+    assert wait_for(server, job["id"])["state"] == "done"
+    assert os.path.getsize(job["path"]) == 1000
+
+
+@pytest.mark.parametrize("body", [b"[]", b'"x"', b"3", b"{not json", b'{"path": 3}', b'{"path": "/no/such.mp4"}'])
+def test_bad_json_is_rejected(server, body):
+    status, error = request(f"{server.url}/jobs", body)
+    assert status == 400 and "error" in error
+
+
+def test_bad_upload_leaves_nothing_behind(server):
+    status, error = request(f"{server.url}/jobs?filename=talk.mp4&priority=high", b"\0" * 10)
+    assert status == 400
+    status, error = request(f"{server.url}/jobs?filename=notes.txt", b"\0" * 10)
+    assert status == 400
+
+    # The client promises more bytes than it sends
+    host, port = server.server_address
+    with socket.create_connection((host, port), timeout=5) as connection:
+        connection.sendall(b"POST /jobs?filename=talk.mp4 HTTP/1.1\r\nHost: localhost\r\n"
+                           b"Content-Length: 100\r\n\r\n" + b"\0" * 10)
+        connection.shutdown(socket.SHUT_WR)
+        assert connection.recv(1024).startswith(b"HTTP/1.0 400")
+    assert spooled(server) == []
+
+
+def test_full_queue_discards_the_upload(server):
+    def full(path, priority=0):
+        raise queue.Full
+
+    server.manager.submit = full
+    status, error = request(f"{server.url}/jobs?filename=talk.mp4", b"\0" * 10)
+    assert status == 503
+    assert spooled(server) == []
+
+
+def raw_post(server, headers):
+    host, port = server.server_address
+    with socket.create_connection((host, port), timeout=5) as connection:
+        connection.sendall(b"POST /jobs?filename=talk.mp4 HTTP/1.1\r\nHost: localhost\r\n" + headers + b"\r\n")
+        connection.shutdown(socket.SHUT_WR)
+        return connection.recv(1024)
+
+
+@pytest.mark.parametrize("headers, status", [
+    (b"", b"411"),
+    (b"Content-Length: ten\r\n", b"400"),
+    (b"Content-Length: 0\r\n", b"400"),
+    (b"Content-Length: -5\r\n", b"400"),
+])
+def test_bad_content_length_is_rejected_before_spooling(server, headers, status):
+    assert raw_post(server, headers).startswith(b"HTTP/1.0 " + status)
+    assert spooled(server) == []
+    assert server.manager.list() == []
+
+
+def test_ended_jobs_expire(tmp_path):
+    media = tmp_path / "talk.mp4"
+    media.write_bytes(b"\0" * 16)
+    manager = JobManager(stub_processor, max_finished=2)
+    first = [manager.submit(str(media)) for _ in range(3)]
+    manager.queue.join()
+    assert [job["id"] for job in manager.list()] == [job["id"] for job in first[1:]]
+
+    manager.job_ttl = -1.0  # Everything that ended is past its TTL
+    assert manager.get(first[-1]["id"]) is None
+    assert manager.list() == []
@@ -0,0 +1,48 @@
+import io
+import queue
+import threading
+
+import numpy as np
+
+from live_subtitles import CueWriter, LiveTranscriber, replay_wav, run_live
+from speech_prepass import SAMPLE_RATE
+from stub_model import StubModel
+from synthetic import synthetic_recording, write_synthetic_wav
+
+SPANS = [(0.5, 4.0), (5.0, 12.5), (13.0, 14.0), (16.0, 27.0), (28.0, 29.5)]
+
+
+def test_cues_cover_the_speech_within_the_latency_bound():
+    audio = synthetic_recording(SPANS, 32.0)
+    transcriber = LiveTranscriber(StubModel(rtf=0.0), step_seconds=1.0, stability_margin=1.5, max_latency=6.0)
+    chunk = SAMPLE_RATE // 10
+    emitted = []
+    for first in range(0, len(audio), chunk):
+        transcriber.feed(audio[first:first + chunk])
+        emitted += [(cue, transcriber.stream_time) for cue in transcriber.step()]
+    while len(transcriber.buffer):
+        emitted += [(cue, transcriber.stream_time) for cue in transcriber.step(final=True)]
+
+    cues = [cue for cue, _ in emitted]
+    # Chronological, not overlapping, and every utterance has a cue
+    assert all(previous[1] <= cue[0] for previous, cue in zip(cues, cues[1:]))
+    for start, end in SPANS:
+        assert any(cue_start < end and cue_end > start for cue_start, cue_end, _ in cues)
+    # Stream time between the end of a cue's audio and the cue, at most one step over the bound
+    for (_, end, _), emitted_at in emitted:
+        assert emitted_at - end <= transcriber.max_latency + transcriber.step_seconds
+
+
+def test_replay(tmp_path):
+    wav_path = write_synthetic_wav(str(tmp_path / "synthetic.wav"), seconds=20.0)
+    transcriber = LiveTranscriber(StubModel(rtf=0.01), max_latency=6.0, batch_size=1)
+    chunks = queue.Queue()
+    threading.Thread(target=replay_wav, args=(wav_path, chunks), kwargs={"speed": 10.0}, daemon=True).start()
+    output = io.StringIO()
+    latencies = run_live(transcriber, chunks, CueWriter(output, "vtt"))
+
+    text = output.getvalue()
+    assert text.startswith("WEBVTT\n\n")
+    assert text.count(" --> ") == len(latencies) > 0
+    # Replayed ten times faster than real time, so wall-clock latencies stay well inside the bound
+    assert np.max(latencies) <= transcriber.max_latency
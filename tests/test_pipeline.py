@@ -0,0 +1,139 @@
+import os
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+from pipeline import Stage, execute, plan, run_pipeline, waves
+
+# media ─┬─ first ─ one ─ second ─ two ─┐
+#        └─ side ─ three ────────────────┴─ last ─ out
+
+
+def write_outputs(context, stage_name, outputs):
+    with context.lock:
+        context.ran.append(stage_name)
+    for artifact in outputs:
+        with open(context.paths[artifact], "w") as f:
+            f.write(stage_name)
+
+
+def stub_stage(name, inputs, outputs):
+    return Stage(name, inputs, outputs, lambda context: write_outputs(context, name, outputs))
+
+
+def stub_stages():
+    return [
+        stub_stage("first", ["media"], ["one"]),
+        stub_stage("second", ["one"], ["two"]),
+        stub_stage("side", ["media"], ["three"]),
+        stub_stage("last", ["two", "three"], ["out"]),
+    ]
+
+
+@pytest.fixture
+def paths(tmp_path):
+    paths = {artifact: str(tmp_path / f"{artifact}.txt") for artifact in ("media", "one", "two", "three", "out")}
+    open(paths["media"], "w").close()
+    return paths
+
+
+def touch(paths, *artifacts):
+    """Writes `artifacts` in this order, each a second newer than the media file or the one before."""
+    now = os.path.getmtime(paths["media"])
+    for offset, artifact in enumerate(artifacts, start=1):
+        with open(paths[artifact], "w") as f:
+            f.write(artifact)
+        os.utime(paths[artifact], (now + offset, now + offset))
+
+
+def names(steps):
+    return [stage.name for stage, _ in steps]
+
+
+def test_everything_runs_without_outputs(paths):
+    steps, fresh = plan(stub_stages(), ["out"], paths)
+    assert names(steps) == ["first", "second", "side", "last"]
+    assert fresh == []
+
+
+def test_fresh_outputs_are_skipped_by_mtime(paths):
+    touch(paths, "one", "two", "three", "out")
+    steps, fresh = plan(stub_stages(), ["out"], paths)
+    assert steps == []
+    assert sorted(stage.name for stage in fresh) == ["first", "last", "second", "side"]
+
+    # An input newer than the output makes it stale, and the stages after it follow
+    os.utime(paths["one"], (os.path.getmtime(paths["out"]) + 1,) * 2)
+    steps, _ = plan(stub_stages(), ["out"], paths)
+    assert dict((stage.name, reason) for stage, reason in steps) == {
+        "second": "one.txt is newer", "last": "second will run"}
+
+
+def test_rerun_propagates_to_dependents(paths):
+    touch(paths, "one", "two", "three", "out")
+    steps, _ = plan(stub_stages(), ["out"], paths, rerun=["first"])
+    assert names(steps) == ["first", "second", "last"]
+    with pytest.raises(ValueError, match="nope"):
+        plan(stub_stages(), ["out"], paths, rerun=["nope"])
+
+
+def test_force_skips_the_kept_stages(paths):
+    touch(paths, "one", "two", "three", "out")
+    steps, fresh = plan(stub_stages(), ["out"], paths, force=True, keep=["first", "side"])
+    assert names(steps) == ["second", "last"]
+    assert sorted(stage.name for stage in fresh) == ["first", "side"]
+
+
+def test_existing_output_with_missing_intermediates_is_kept(paths):
+    # Made without the intermediate files, like transcripts of the pre-series scripts
+    touch(paths, "out")
+    steps, fresh = plan(stub_stages(), ["out"], paths)
+    assert steps == [] and [stage.name for stage in fresh] == ["last"]
+    # Rerunning part of the chain rebuilds the missing inputs of the stages that run
+    steps, _ = plan(stub_stages(), ["out"], paths, rerun=["second"])
+    assert sorted(names(steps)) == ["first", "last", "second", "side"]
+    steps, _ = plan(stub_stages(), ["out"], paths, force=True)
+    assert len(steps) == 4
+
+
+def test_waves_follow_the_dependencies(paths):
+    steps, _ = plan(stub_stages(), ["out"], paths)
+    assert [sorted(stage.name for stage, _ in wave) for wave in waves(steps)] == [
+        ["first", "side"], ["second"], ["last"]]
+
+
+@pytest.mark.parametrize("parallel", [False, True])
+def test_execute_runs_the_plan_in_dependency_order(paths, parallel):
+    steps, _ = plan(stub_stages(), ["out"], paths)
+    context = SimpleNamespace(paths=paths, metrics={"stages": {}}, ran=[], lock=threading.Lock())
+    execute(steps, context, parallel=parallel)
+    assert sorted(context.ran) == ["first", "last", "second", "side"]
+    assert context.ran.index("first") < context.ran.index("second") < context.ran.index("last")
+    assert context.ran[-1] == "last"
+    assert set(context.metrics["stages"]) == {"first", "second", "side", "last"}
+
+
+def test_execute_stops_after_a_failed_stage(paths):
+    stages = stub_stages()
+    stages[0].action = lambda context: 1 / 0
+    steps, _ = plan(stages, ["out"], paths)
+    context = SimpleNamespace(paths=paths, metrics={"stages": {}}, ran=[], lock=threading.Lock())
+    with pytest.raises(ZeroDivisionError):
+        execute(steps, context)
+    assert "second" not in context.ran and "last" not in context.ran
+
+
+def test_dry_run_prints_the_plan(tmp_path, capsys):
+    media = tmp_path / "talk.mp4"
+    media.write_bytes(b"")
+    (tmp_path / "talk_final.json").write_text('{"segments": []}', encoding="utf-8")
+    context = run_pipeline(str(media), targets=("ass", "srt"), dry_run=True)
+    output = capsys.readouterr().out
+    assert context is not None
+    assert "talk.ass  (ass missing)" in output
+    assert "assign_speakers  up to date" in output
+    for stage in ("transcribe", "align", "diarize"):
+        assert f"] {stage} " not in output
+    # Nothing was written
+    assert sorted(os.listdir(tmp_path)) == ["talk.mp4", "talk_final.json"]
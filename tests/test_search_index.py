@@ -0,0 +1,44 @@
+import json
+
+from search_index import SearchIndex
+
+
+def words(text, start, speaker):
+    return [{"word": word, "start": start + i * 0.5, "end": start + i * 0.5 + 0.4, "speaker": speaker}
+            for i, word in enumerate(text.split())]
+
+
+def write(path, segments):
+    path.write_text(json.dumps({"segments": segments}), encoding="utf-8")
+    return str(path)
+
+
+def test_terms_phrases_and_updates(tmp_path):
+    talk = write(tmp_path / "talk_final.json", [
+        {"start": 0.0, "end": 2.0, "text": " The quarterly numbers are in", "speaker": "SPEAKER_00",
+         "words": words("The quarterly numbers are in", 0.0, "SPEAKER_00")},
+        {"start": 10.0, "end": 12.0, "text": " Numbers for the quarter", "speaker": "SPEAKER_01",
+         "words": words("Numbers for the quarter", 10.0, "SPEAKER_01")},
+    ])
+    write(tmp_path / "other_final.json", [
+        {"start": 3.0, "end": 4.0, "text": " Über größer", "words": words("Über größer", 3.0, "SPEAKER_00")},
+    ])
+
+    with SearchIndex(str(tmp_path / "index.db")) as index:
+        assert index.update([str(tmp_path)])[0] == 2
+        assert index.update([str(tmp_path)]) == (0, 0)
+
+        assert [hit["start"] for hit in index.search("numbers")] == [1.0, 10.0]
+        assert [hit["start"] for hit in index.search('"quarterly numbers"')] == [0.5]
+        assert index.search('"numbers quarterly"') == []
+        # Both terms in one segment, hit on the first query term
+        assert [hit["start"] for hit in index.search("quarter numbers")] == [11.5]
+        assert [hit["speaker"] for hit in index.search("numbers", speaker="SPEAKER_01")] == ["SPEAKER_01"]
+        # Case and Unicode normalization
+        assert len(index.search("ÜBER")) == 1
+
+        (tmp_path / "other_final.json").unlink()
+        index.update([str(tmp_path)])
+        assert index.search("über") == []
+        assert index.stats()["files"] == 1
+        assert index.search("numbers")[0]["path"] == talk
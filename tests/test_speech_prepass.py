@@ -0,0 +1,39 @@
+import numpy as np
+
+from speech_prepass import SAMPLE_RATE, build_speech_buffer, restore_result_timeline, to_compact, to_original
+from synthetic import synthetic_recording
+
+# Two regions: 10-12 s and 30-33 s of the original, 0-2 s and 2-5 s of the compacted audio
+REMAP = np.array([[0.0, 10.0, 2.0], [2.0, 30.0, 3.0]])
+
+
+def test_seam_maps_to_start_or_end():
+    assert to_original([2.0], REMAP).tolist() == [30.0]
+    assert to_original([2.0], REMAP, end=True).tolist() == [12.0]
+    assert to_original([0.5, 4.0], REMAP, end=True).tolist() == [10.5, 32.0]
+
+
+def test_round_trip_inside_regions():
+    times = np.array([10.0, 11.5, 30.25, 32.9])
+    assert np.allclose(to_original(to_compact(times, REMAP), REMAP), times)
+
+
+def test_restore_result_timeline():
+    result = {"segments": [{"start": 1.5, "end": 2.0, "words": [{"word": "a", "start": 1.5, "end": 2.0},
+                                                              {"word": "b"}]},
+                           {"start": 2.0, "end": 2.5, "words": []}]}
+    restore_result_timeline(result, REMAP)
+    assert result["segments"][0]["start"] == 11.5 and result["segments"][0]["end"] == 12.0
+    assert result["segments"][0]["words"][1] == {"word": "b"}
+    assert result["segments"][1]["start"] == 30.0 and result["segments"][1]["end"] == 30.5
+
+
+def test_compaction_keeps_speech():
+    spans = [(1.0, 4.0), (40.0, 45.0), (100.0, 101.5)]
+    audio = synthetic_recording(spans, 110.0)
+    buffer, remap, stats = build_speech_buffer(audio)
+    assert stats["applied"] and len(buffer) < len(audio) / 5
+    # Every instant of speech is inside a kept region
+    for start, end in spans:
+        probes = np.linspace(start, end, 50)
+        assert np.allclose(to_original(to_compact(probes, remap), remap), probes, atol=1.0 / SAMPLE_RATE)
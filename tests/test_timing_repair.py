@@ -0,0 +1,49 @@
+from srt_from_json import srt_cues
+from timing_repair import repair_word_timings
+
+
+def test_untimed_words_share_the_gap():
+    segment = {"start": 0.0, "end": 4.0, "words": [
+        {"word": "In", "start": 0.0, "end": 0.5},
+        {"word": "1984"}, {"word": "and"},
+        {"word": "later", "start": 2.5, "end": 3.0},
+        {"word": "%"},
+    ]}
+    assert repair_word_timings([segment]) == 3
+    words = segment["words"]
+    assert (words[1]["start"], words[1]["end"]) == (0.5, 1.5)
+    assert (words[2]["start"], words[2]["end"]) == (1.5, 2.5)
+    assert (words[4]["start"], words[4]["end"]) == (3.0, 4.0)
+
+
+def test_repaired_words_get_the_segment_speaker():
+    segments = [
+        {"start": 0.0, "end": 2.0, "speaker": "SPEAKER_01", "words": [
+            {"word": "Room", "start": 0.0, "end": 1.0, "speaker": "SPEAKER_01"}, {"word": "101"}]},
+        {"start": 2.0, "end": 3.0, "words": [{"word": "42"}]},
+    ]
+    repair_word_timings(segments)
+    assert segments[0]["words"][1]["speaker"] == "SPEAKER_01"
+    assert "[SPEAKER_01]: 101" in next(cue for _, _, cue in srt_cues(segments[0]) if "101" in cue)
+    # No diarization for this segment: nothing to copy
+    assert "speaker" not in segments[1]["words"][0]
+
+
+def test_segments_without_bounds_stay_untimed():
+    segment = {"text": " 42", "words": [{"word": "42"}]}
+    assert repair_word_timings([segment]) == 0
+    assert segment["words"] == [{"word": "42"}]
+
+
+def test_half_timed_words_never_end_before_they_start():
+    segment = {"start": 0.0, "end": 4.0, "words": [
+        {"word": "In", "start": 0.0, "end": 0.5},
+        {"word": "1984"},
+        {"word": "%", "end": 1.0},
+        {"word": "later", "start": 3.0, "end": 3.5},
+    ]}
+    assert repair_word_timings([segment]) == 2
+    words = segment["words"]
+    # The interpolated start would be 1.75, after the end alignment produced
+    assert (words[2]["start"], words[2]["end"]) == (1.0, 1.0)
+    assert all(word["start"] <= word["end"] for word in words)
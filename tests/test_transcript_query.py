@@ -0,0 +1,53 @@
+from transcript_query import TranscriptQuery
+from transcript_store import write_transcript
+
+
+def word(text, start, end, speaker="SPEAKER_00"):
+    return {"word": text, "start": start, "end": end, "speaker": speaker}
+
+
+def make_result():
+    return {"segments": [
+        {"start": 0.0, "end": 2.0, "text": " Good morning", "speaker": "SPEAKER_00",
+         "words": [word("Good", 0.0, 0.5), word("morning", 0.6, 2.0)]},
+        {"start": 2.5, "end": 4.0, "text": " Hi there", "speaker": "SPEAKER_01",
+         "words": [word("Hi", 2.5, 3.0, "SPEAKER_01"), word("there", 3.2, 4.0, "SPEAKER_01")]},
+        {"start": 4.5, "end": 5.0, "text": " Yes", "speaker": "SPEAKER_00",
+         "words": [word("Yes", 4.5, 5.0)]},
+    ]}
+
+
+def test_at_and_ranges():
+    query = TranscriptQuery(make_result())
+    active = query.at(0.7)
+    assert active["word"]["word"] == "morning" and active["speaker"] == "SPEAKER_00"
+    # Between two words: the segment is still active
+    gap = query.at(3.1)
+    assert gap["word"] is None and gap["segment"]["text"] == " Hi there"
+    assert query.at(10.0) == {"word": None, "segment": None, "speaker": None}
+    assert [w["word"] for w in query.words_between(1.0, 3.1)] == ["morning", "Hi"]
+    assert [s["text"] for s in query.segments_between(4.0, 4.6)] == [" Yes"]
+
+
+def test_clip_is_on_its_own_timeline():
+    clip = TranscriptQuery(make_result()).clip(1.0, 3.1)
+    assert [(s["start"], s["end"], s["text"]) for s in clip["segments"]] == [
+        (0.0, 1.0, " morning"), (1.5, 2.1, " Hi")]
+
+
+def test_speaking_time_uses_the_gap():
+    query = TranscriptQuery(make_result())
+    assert query.speaking_time() == {"SPEAKER_00": 2.4, "SPEAKER_01": 1.3}
+    # With a 1 s gap the turns are joined, pauses included
+    assert query.speaking_time(gap=1.0) == {"SPEAKER_00": 2.0 + 0.5, "SPEAKER_01": 1.5}
+    assert len(query.speaker_timelines(gap=1.0)["SPEAKER_00"]) == 2
+
+
+def test_wxt_with_untimed_segment(tmp_path):
+    result = make_result()
+    result["segments"].append({"text": " (inaudible)", "words": [{"word": "(inaudible)"}]})
+    path = str(tmp_path / "talk.wxt")
+    write_transcript(result, path)
+    query = TranscriptQuery.from_file(path)
+    assert query.duration == 5.0
+    assert query.at(4.7)["word"]["word"] == "Yes"
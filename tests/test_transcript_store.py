@@ -0,0 +1,37 @@
+import gzip
+
+import pytest
+
+from transcript_store import BinaryTranscript, _compress, _zstd, read_transcript, write_transcript
+from synthetic import synthetic_result
+
+
+@pytest.mark.parametrize("compression", ["none", "gzip", pytest.param("zstd", marks=pytest.mark.skipif(
+    not _zstd(), reason="zstandard is not installed"))])
+def test_round_trip(tmp_path, compression):
+    result = synthetic_result(300, seed=1)
+    path = str(tmp_path / "talk.wxt")
+    write_transcript(result, path, compression, segments_per_chunk=64)
+    assert read_transcript(path)["segments"] == result["segments"]
+    # A range across a chunk boundary decompresses only the chunks it needs
+    with BinaryTranscript(path) as transcript:
+        assert transcript.segments(60, 70) == result["segments"][60:70]
+
+
+def test_missing_times_have_no_keys(tmp_path):
+    result = {"segments": [
+        {"start": 0.0, "end": 1.0, "text": " Hello", "speaker": "SPEAKER_00",
+         "words": [{"word": "Hello", "start": 0.0, "end": 1.0, "score": 0.9, "speaker": "SPEAKER_00"}]},
+        {"text": " 1984", "words": [{"word": "1984"}]},
+    ]}
+    path = str(tmp_path / "talk.wxt")
+    write_transcript(result, path)
+    segments = read_transcript(path)["segments"]
+    assert segments[0]["start"] == 0.0 and segments[0]["end"] == 1.0
+    assert "start" not in segments[1] and "end" not in segments[1]
+    assert segments[1]["words"] == [{"word": "1984"}]
+
+
+def test_gzip_chunks_are_gzip_streams():
+    data = b"chunk" * 100
+    assert gzip.decompress(_compress(data, "gzip")) == data
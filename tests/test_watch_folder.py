@@ -0,0 +1,63 @@
+import os
+import sys
+import subprocess
+
+import pytest
+
+from watch_folder import PROCESSING_DIR, WatchFolderDaemon, read_status, write_status
+
+
+def test_losing_a_claim_race_leaves_the_winner_alone(tmp_path, monkeypatch):
+    inbox, outbox = tmp_path / "inbox", tmp_path / "outbox"
+    inbox.mkdir()
+    media = inbox / "talk.mp4"
+    media.write_bytes(b"\0" * 16)
+    first = WatchFolderDaemon([str(inbox)], str(outbox), models=None)
+    second = WatchFolderDaemon([str(inbox)], str(outbox), models=None)
+
+    # The second daemon picked its job name before the first one created the claim directory
+    names = iter(["talk"])
+    real_unique_job_name = second._unique_job_name
+    monkeypatch.setattr(second, "_unique_job_name", lambda base_name: next(names, None) or real_unique_job_name(base_name))
+
+    claimed = first.claim(str(media), str(inbox))
+    assert claimed == os.path.join(str(inbox), PROCESSING_DIR, "talk", "talk.mp4")
+    assert second.claim(str(media), str(inbox)) is None
+
+    assert os.path.exists(claimed)
+    assert read_status(str(outbox), "talk")["state"] == "queued"
+    assert os.listdir(inbox / PROCESSING_DIR) == ["talk"]
+    assert not (outbox / "talk-2.status.json").exists()
+
+
+def dead_pid():
+    process = subprocess.Popen([sys.executable, "-c", "pass"])
+    process.wait()
+    return process.pid
+
+
+@pytest.mark.parametrize("owner, recovered", [
+    (None, True),
+    ("dead", True),
+    ("self", True),
+    ("parent", False),
+    ("other host", False),
+])
+def test_recover_claims_skips_live_owners(tmp_path, owner, recovered):
+    inbox, outbox = tmp_path / "inbox", tmp_path / "outbox"
+    inbox.mkdir()
+    (inbox / "talk.mp4").write_bytes(b"\0" * 16)
+    daemon = WatchFolderDaemon([str(inbox)], str(outbox), models=None)
+    claimed = daemon.claim(str(inbox / "talk.mp4"), str(inbox))
+    assert read_status(str(outbox), "talk")["owner"] == daemon.owner
+
+    owners = {
+        None: None,
+        "dead": {**daemon.owner, "pid": dead_pid()},
+        "self": daemon.owner,
+        "parent": {**daemon.owner, "pid": os.getppid()},
+        "other host": {"host": daemon.owner["host"] + "-elsewhere", "pid": os.getpid()},
+    }
+    write_status(str(outbox), "talk", owner=owners[owner])
+    assert daemon.recover_claims() == ([claimed] if recovered else [])
+    assert os.path.exists(claimed)
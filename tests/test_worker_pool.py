@@ -0,0 +1,24 @@
+import os
+
+from worker_pool import find_media, run_pool
+
+
+def test_find_media_skips_outputs_and_unfinished_reburns(tmp_path):
+    nested = tmp_path / "day1"
+    nested.mkdir()
+    for name in ("talk.mp4", "talk_subtitled.mp4", "talk_subtitled.reburn.mp4", "talk.ass"):
+        (nested / name).write_bytes(b"")
+    (tmp_path / "interview.wav").write_bytes(b"")
+    assert find_media([str(tmp_path)]) == sorted([os.path.abspath(nested / "talk.mp4"),
+                                                  os.path.abspath(tmp_path / "interview.wav")])
+
+
+def fails_on_bad_names(path, duration):
+    return "bad" not in path
+
+
+def test_run_pool_uses_the_injected_process():
+    durations = {"a.wav": 3.0, "bad.wav": 2.0, "c.wav": 1.0}
+    summary = run_pool(durations, workers=2, cores=2, batch_size=1, process=fails_on_bad_names)
+    assert summary["files"] == 3 and summary["failed"] == ["bad.wav"]
+    assert summary["audio_seconds"] == 6.0
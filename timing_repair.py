@@ -0,0 +1,104 @@
+"""
+Fills in missing word timings in WhisperX segments.
+
+After alignment, words the alignment model has no characters for (mostly
+numerals and symbols) come back without "start"/"end" (and without the
+speaker diarization would have given them). Instead of dropping them, every
+run of untimed words gets an equal share of the gap between the previous
+timed word's end (or the segment start) and the next timed word's start (or
+the segment end), and the speaker of its segment.
+
+All words of the transcript are handled at once: segment bounds are
+inserted as always-known anchors around each segment's words, the nearest
+known anchor on either side is found with a running maximum/minimum over
+the indices of known entries, and the gaps are split with array
+arithmetic.
+
+Usage:
+    python timing_repair.py talk_final.json [--output repaired.json]
+"""
+
+import json
+import argparse
+
+
+def repair_word_timings(segments):
+    """
+    Sets missing word "start"/"end" values in place, and the segment's
+    speaker on those words if they have none. Returns the number of words
+    that were changed. Words stay untimed only if their segment has no
+    bounds either.
+    """
+    # Cheap check first: most transcripts need nothing, and numpy is a heavy import
+    # for the subtitle-only commands
+    if all("start" in word and "end" in word for segment in segments for word in segment.get("words", [])):
+        return 0
+    import numpy as np
+
+    # Flattened layout per segment: [segment start anchor, words..., segment end anchor]
+    starts, ends, words, owners = [], [], [], []
+    for segment in segments:
+        segment_start = segment.get("start", float("nan"))
+        segment_end = segment.get("end", float("nan"))
+        starts.append(segment_start)
+        ends.append(segment_start)
+        words.append(None)
+        owners.append(segment)
+        for word in segment.get("words", []):
+            starts.append(word.get("start", float("nan")))
+            ends.append(word.get("end", float("nan")))
+            words.append(word)
+            owners.append(segment)
+        starts.append(segment_end)
+        ends.append(segment_end)
+        words.append(None)
+        owners.append(segment)
+
+    starts = np.array(starts, dtype=np.float64)
+    ends = np.array(ends, dtype=np.float64)
+    is_word = np.array([word is not None for word in words])
+    # Anchors always count as known, so runs never cross a segment boundary
+    known = ~is_word | (~np.isnan(starts) & ~np.isnan(ends))
+    index = np.arange(len(words))
+    previous = np.maximum.accumulate(np.where(known, index, -1))
+    following = np.minimum.accumulate(np.where(known, index, len(words))[::-1])[::-1]
+
+    missing = np.flatnonzero(~known)
+    left = ends[previous[missing]]
+    right = np.maximum(starts[following[missing]], left)
+    run_length = following[missing] - previous[missing] - 1
+    rank = missing - previous[missing] - 1
+    slot = (right - left) / run_length
+    new_starts = np.round(left + rank * slot, 3)
+    new_ends = np.round(left + (rank + 1) * slot, 3)
+
+    repaired = 0
+    for position, new_start, new_end in zip(missing.tolist(), new_starts.tolist(), new_ends.tolist()):
+        if new_start != new_start or new_end != new_end:  # NaN: the segment has no bounds
+            continue
+        word = words[position]
+        # Keep whichever of the two times alignment did produce, without starting after it ends
+        word.setdefault("start", min(new_start, word.get("end", new_start)))
+        word.setdefault("end", max(new_end, word["start"]))
+        if "speaker" not in word and "speaker" in owners[position]:
+            word["speaker"] = owners[position]["speaker"]
+        repaired += 1
+    return repaired
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Interpolate missing word timings in a WhisperX JSON file.")
+    parser.add_argument("input", help="WhisperX JSON transcript")
+    parser.add_argument("--output", help="Where to write the repaired transcript (default: overwrite the input)")
+    args = parser.parse_args(argv)
+
+    with open(args.input, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    repaired = repair_word_timings(data["segments"])
+    with open(args.output or args.input, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+    print(f"Repaired {repaired} words with missing timing information.")
+
+
+if __name__ == "__main__":
+    main()
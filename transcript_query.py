@@ -0,0 +1,231 @@
+"""
+Time-indexed queries over a final WhisperX transcript.
+
+A TranscriptQuery is built once from a result dict. It keeps the words and
+segments sorted by start time together with a running maximum of their end
+times, so "what is active at t" and "what overlaps [a, b)" are two
+bisections plus the matches, whatever the length of the transcript. Clips
+come back as WhisperX-shaped results on the clip's own timeline and can be
+written with the existing ASS/SRT writers.
+
+Usage:
+    python transcript_query.py talk_final.json --at 754.2
+    python transcript_query.py talk_final.json --range 600 660 --export clip.ass
+    python transcript_query.py talk_final.json --speakers
+
+benchmarks/bench_transcript_query.py measures query and export times
+against transcript length.
+"""
+
+import os
+import json
+import bisect
+import argparse
+
+from timing_repair import repair_word_timings
+
+
+def _timed(item):
+    """Whether a segment or word has both bounds; a missing one may be absent or None."""
+    return item.get("start") is not None and item.get("end") is not None
+
+
+class _Spans:
+    """Items with "start"/"end", sorted by start, for stabbing and overlap queries."""
+
+    def __init__(self, items):
+        self.items = sorted(items, key=lambda item: (item["start"], item["end"]))
+        self.starts = [item["start"] for item in self.items]
+        # Running maximum of the ends: non-decreasing, so it can be bisected too
+        self.max_ends = []
+        running = float("-inf")
+        for item in self.items:
+            running = max(running, item["end"])
+            self.max_ends.append(running)
+
+    def overlapping(self, start, end):
+        """Items with item.start < end and item.end > start, in start order."""
+        # Nothing before `first` ends after `start`; nothing from `last` on starts before `end`
+        first = bisect.bisect_right(self.max_ends, start)
+        last = bisect.bisect_left(self.starts, end)
+        return [item for item in self.items[first:last] if item["end"] > start]
+
+    def at(self, t):
+        """Items with item.start <= t < item.end."""
+        first = bisect.bisect_right(self.max_ends, t)
+        last = bisect.bisect_right(self.starts, t)
+        return [item for item in self.items[first:last] if item["end"] > t]
+
+
+class TranscriptQuery:
+    """
+    Point and range lookups on one transcript. Missing word timings are
+    interpolated first, in place, exactly as the subtitle writers do.
+    """
+
+    def __init__(self, result):
+        self.result = result
+        self.segments = result["segments"]
+        repair_word_timings(self.segments)
+        self._segment_spans = _Spans(segment for segment in self.segments if _timed(segment))
+        # Words that are still untimed (their segment has no bounds) cannot be placed on the timeline
+        self._segment_of = {}
+        words = []
+        for segment in self.segments:
+            for word in segment.get("words", []):
+                if _timed(word):
+                    self._segment_of[id(word)] = segment
+                    words.append(word)
+        self._word_spans = _Spans(words)
+        self._timelines = None
+
+    @classmethod
+    def from_file(cls, json_path):
+        if json_path.endswith(".wxt"):
+            from transcript_store import read_transcript
+            return cls(read_transcript(json_path))
+        with open(json_path, "r", encoding="utf-8") as f:
+            return cls(json.load(f))
+
+    @property
+    def duration(self):
+        return self._segment_spans.max_ends[-1] if self._segment_spans.items else 0.0
+
+    def speaker_of(self, word):
+        return word.get("speaker") or self._segment_of[id(word)].get("speaker")
+
+    # --- Point and range lookups ---
+
+    def at(self, t):
+        """
+        What is active at `t` seconds: {"word", "segment", "speaker"}, with
+        None where nothing is. Between two words of a segment "word" is None.
+        """
+        words = self._word_spans.at(t)
+        segments = self._segment_spans.at(t)
+        # Overlapping items: the one that started last is the one on screen
+        word = words[-1] if words else None
+        segment = self._segment_of[id(word)] if word else (segments[-1] if segments else None)
+        speaker = self.speaker_of(word) if word else (segment.get("speaker") if segment else None)
+        return {"word": word, "segment": segment, "speaker": speaker}
+
+    def words_between(self, start, end):
+        """Timed words overlapping [start, end), in start order."""
+        return self._word_spans.overlapping(start, end)
+
+    def segments_between(self, start, end):
+        """Segments overlapping [start, end), in start order."""
+        return self._segment_spans.overlapping(start, end)
+
+    # --- Speakers ---
+
+    def speaker_timelines(self, gap=0.0):
+        """
+        Speaker -> merged (start, end) turns, from word times (segment times
+        for segments without words). Turns closer than `gap` are joined.
+        """
+        if self._timelines is None or self._timelines[0] != gap:
+            spans = {}
+            for segment in self._segment_spans.items:
+                timed = [word for word in segment.get("words", []) if _timed(word)]
+                for item in timed or [segment]:
+                    speaker = item.get("speaker") or segment.get("speaker")
+                    if speaker is not None:
+                        spans.setdefault(speaker, []).append((item["start"], item["end"]))
+            timelines = {}
+            for speaker, ranges in spans.items():
+                merged = []
+                for start, end in sorted(ranges):
+                    if merged and start <= merged[-1][1] + gap:
+                        merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+                    else:
+                        merged.append((start, end))
+                timelines[speaker] = merged
+            self._timelines = (gap, timelines)
+        return self._timelines[1]
+
+    def speaking_time(self, gap=0.0):
+        """Speaker -> seconds spoken, over the turns of speaker_timelines(gap)."""
+        return {speaker: round(sum(end - start for start, end in turns), 3)
+                for speaker, turns in self.speaker_timelines(gap).items()}
+
+    # --- Clips ---
+
+    def clip(self, start, end):
+        """
+        The part of the transcript inside [start, end) as a WhisperX result
+        on the clip's timeline (t - start). Segments cut by the bounds keep
+        only their words inside, and their text is rebuilt from those words.
+        """
+        start, end = float(start), float(end)
+        segments = []
+        for segment in self.segments_between(start, end):
+            words = [word for word in segment.get("words", []) if _timed(word)]
+            kept = [word for word in words if word["start"] < end and word["end"] > start]
+            if words and not kept:
+                continue
+            clipped = {key: value for key, value in segment.items() if key not in ("words", "chars")}
+            clipped["start"] = round(max(segment["start"], start) - start, 3)
+            clipped["end"] = round(min(segment["end"], end) - start, 3)
+            if "words" in segment:
+                clipped["words"] = [dict(word, start=round(max(word["start"], start) - start, 3),
+                                         end=round(min(word["end"], end) - start, 3)) for word in kept]
+                if len(kept) < len(words):
+                    clipped["text"] = " " + " ".join(word["word"].strip() for word in kept)
+            segments.append(clipped)
+        return {"segments": segments, "language": self.result.get("language")}
+
+    def export_clip(self, start, end, output_path):
+        """Writes the clip with the ASS or SRT writer, chosen by the extension of `output_path`."""
+        segments = self.clip(start, end)["segments"]
+        extension = os.path.splitext(output_path)[1].lower()
+        if extension == ".ass":
+            from ass_from_json import write_ass
+            write_ass(segments, output_path)
+        elif extension == ".srt":
+            from srt_from_json import write_srt
+            write_srt(segments, output_path)
+        else:
+            raise ValueError(f"Unsupported clip format: {extension} (use .ass or .srt)")
+        return len(segments)
+
+
+def format_time(seconds):
+    return f"{int(seconds // 3600)}:{int(seconds % 3600 // 60):02}:{seconds % 60:06.3f}"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Query a transcript by time and export clips.")
+    parser.add_argument("input", help="Final WhisperX JSON (or .wxt) transcript")
+    parser.add_argument("--at", type=float, metavar="SECONDS", help="Show the word, segment and speaker at this time")
+    parser.add_argument("--range", type=float, nargs=2, metavar=("START", "END"), help="Show the words in this range")
+    parser.add_argument("--export", metavar="PATH", help="With --range: write the clip as .ass or .srt")
+    parser.add_argument("--speakers", action="store_true", help="Show each speaker's speaking time and turns")
+    args = parser.parse_args(argv)
+
+    if args.export and not args.range:
+        parser.error("--export needs --range")
+
+    query = TranscriptQuery.from_file(args.input)
+    if args.at is not None:
+        active = query.at(args.at)
+        word = active["word"]
+        print(f"{format_time(args.at)}  speaker: {active['speaker'] or '-'}  "
+              f"word: {word['word'].strip() if word else '-'}  "
+              f"segment: {active['segment']['text'].strip() if active['segment'] else '-'}")
+    if args.range:
+        start, end = args.range
+        if args.export:
+            segments = query.export_clip(start, end, args.export)
+            print(f"Wrote {segments} segments of {format_time(start)}-{format_time(end)} to {args.export}")
+        else:
+            for word in query.words_between(start, end):
+                print(f"{format_time(word['start'])}  [{query.speaker_of(word) or '-'}]  {word['word'].strip()}")
+    if args.speakers:
+        timelines = query.speaker_timelines(gap=1.0)
+        for speaker, seconds in sorted(query.speaking_time(gap=1.0).items()):
+            print(f"{speaker}: {seconds / 60:.1f} min in {len(timelines[speaker])} turns")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,348 @@
+"""
+Compact columnar binary format for WhisperX transcripts (`.wxt`).
+
+JSON stays the human-editable interchange format; this format is for
+archiving and for tools that read transcripts many times. Layout:
+
+    b"WXTB" | version (u16) | reserved (u16) | header length (u32) | header JSON | chunks...
+
+The header holds the compression codec, the speaker table, the top-level
+keys of the result and an index of chunks. Each chunk covers a run of
+consecutive segments and stores, column by column:
+
+    segment start, end (f8) | segment speaker (i4) | word offsets (i4, n+1)
+    word start, end (f8) | word score (f4) | word speaker (i4)
+    string offsets (u4) | UTF-8 string table (segment texts, then words)
+
+Missing times and scores are NaN, a missing speaker is -1. Chunks are
+compressed independently with zstd (if the `zstandard` package is
+installed), gzip, or not at all; uncompressed files are read straight from a
+memory map without copying. Only the chunks covering the requested segment
+range are ever decompressed.
+
+Only the keys the subtitle writers use are stored (segment start, end,
+text, speaker, words; word word, start, end, score, speaker).
+
+benchmarks/bench_transcript_store.py compares size and load time against
+pretty-printed JSON.
+"""
+
+import os
+import io
+import json
+import mmap
+import gzip
+import struct
+import bisect
+import argparse
+
+import numpy as np
+
+BINARY_EXTENSION = ".wxt"
+MAGIC = b"WXTB"
+VERSION = 1
+PREAMBLE = struct.Struct("<4sHHI")
+SEGMENTS_PER_CHUNK = 256
+
+
+def _zstd():
+    try:
+        import zstandard
+        return zstandard
+    except ImportError:
+        return None
+
+
+def default_compression():
+    return "zstd" if _zstd() else "gzip"
+
+
+def _compress(data, compression):
+    if compression == "zstd":
+        return _zstd().ZstdCompressor(level=10).compress(data)
+    if compression == "gzip":
+        # mtime=0 keeps the output identical for identical chunks
+        return gzip.compress(data, 6, mtime=0)
+    return data
+
+
+def _decompress(data, compression, raw_length):
+    if compression == "zstd":
+        return _zstd().ZstdDecompressor().decompress(data, max_output_size=raw_length)
+    if compression == "gzip":
+        return gzip.decompress(data)
+    return data
+
+
+def _time(value):
+    return np.nan if value is None else value
+
+
+def _encode_chunk(segments, speaker_ids):
+    """Serializes a run of segments into the columnar chunk layout."""
+    words = [word for segment in segments for word in segment.get("words", [])]
+    word_offsets = np.zeros(len(segments) + 1, dtype="<i4")
+    word_offsets[1:] = np.cumsum([len(segment.get("words", [])) for segment in segments])
+
+    strings = [segment.get("text", "").encode("utf-8") for segment in segments]
+    strings += [word.get("word", "").encode("utf-8") for word in words]
+    string_offsets = np.zeros(len(strings) + 1, dtype="<u4")
+    string_offsets[1:] = np.cumsum([len(string) for string in strings])
+
+    columns = [
+        np.array([_time(segment.get("start")) for segment in segments], dtype="<f8"),
+        np.array([_time(segment.get("end")) for segment in segments], dtype="<f8"),
+        np.array([speaker_ids.get(segment.get("speaker"), -1) for segment in segments], dtype="<i4"),
+        word_offsets,
+        np.array([_time(word.get("start")) for word in words], dtype="<f8"),
+        np.array([_time(word.get("end")) for word in words], dtype="<f8"),
+        np.array([_time(word.get("score")) for word in words], dtype="<f4"),
+        np.array([speaker_ids.get(word.get("speaker"), -1) for word in words], dtype="<i4"),
+        string_offsets,
+    ]
+    buffer = io.BytesIO()
+    for column in columns:
+        buffer.write(column.tobytes())
+    buffer.write(b"".join(strings))
+    return buffer.getvalue(), len(words)
+
+
+def write_transcript(result, path, compression=None, segments_per_chunk=SEGMENTS_PER_CHUNK):
+    """
+    Writes a WhisperX result dict to `path` in the binary format.
+    """
+    compression = compression or default_compression()
+    if compression == "zstd" and not _zstd():
+        raise ValueError("zstd compression requires the 'zstandard' package")
+    if compression not in ("zstd", "gzip", "none"):
+        raise ValueError(f"Unknown compression: {compression}")
+
+    segments = result["segments"]
+    speakers = sorted({item["speaker"] for segment in segments
+                       for item in [segment] + segment.get("words", []) if item.get("speaker") is not None})
+    speaker_ids = {speaker: index for index, speaker in enumerate(speakers)}
+
+    chunks, payloads = [], []
+    for first in range(0, len(segments), segments_per_chunk):
+        raw, word_count = _encode_chunk(segments[first:first + segments_per_chunk], speaker_ids)
+        payload = _compress(raw, compression)
+        chunks.append({
+            "first_segment": first,
+            "segment_count": min(segments_per_chunk, len(segments) - first),
+            "word_count": word_count,
+            "length": len(payload),
+            "raw_length": len(raw),
+        })
+        payloads.append(payload)
+
+    header = {
+        "compression": compression,
+        "segment_count": len(segments),
+        "speakers": speakers,
+        "has_word_segments": "word_segments" in result,
+        "extra": {key: value for key, value in result.items() if key not in ("segments", "word_segments")},
+        "chunks": chunks,
+    }
+    # Offsets are only known once the header size is; they are relative to the first chunk
+    position = 0
+    for chunk in chunks:
+        chunk["offset"] = position
+        position += chunk["length"]
+    header_bytes = json.dumps(header, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(PREAMBLE.pack(MAGIC, VERSION, 0, len(header_bytes)))
+        f.write(header_bytes)
+        for payload in payloads:
+            f.write(payload)
+    os.replace(tmp_path, path)
+
+
+class BinaryTranscript:
+    """
+    Lazily reads a `.wxt` file. Segments are decoded chunk by chunk on
+    demand; use `segments(start, stop)` to read a range without touching
+    the rest of the file.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, "rb")
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, _, header_length = PREAMBLE.unpack_from(self._map, 0)
+        if magic != MAGIC:
+            self.close()
+            raise ValueError(f"{path} is not a binary transcript")
+        if version > VERSION:
+            self.close()
+            raise ValueError(f"{path} uses format version {version}; this reader supports {VERSION}")
+        self.header = json.loads(self._map[PREAMBLE.size:PREAMBLE.size + header_length])
+        self._data_offset = PREAMBLE.size + header_length
+        self._chunk_starts = [chunk["first_segment"] for chunk in self.header["chunks"]]
+        self._cache = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __len__(self):
+        return self.header["segment_count"]
+
+    def close(self):
+        self._cache.clear()
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        self._file.close()
+
+    @property
+    def speakers(self):
+        return self.header["speakers"]
+
+    def _chunk_columns(self, index):
+        """Decodes one chunk into numpy columns (cached)."""
+        if index in self._cache:
+            return self._cache[index]
+        chunk = self.header["chunks"][index]
+        start = self._data_offset + chunk["offset"]
+        if self.header["compression"] == "none":
+            raw = memoryview(self._map)[start:start + chunk["length"]]
+        else:
+            raw = _decompress(self._map[start:start + chunk["length"]], self.header["compression"], chunk["raw_length"])
+
+        n, m = chunk["segment_count"], chunk["word_count"]
+        layout = [("seg_start", "<f8", n), ("seg_end", "<f8", n), ("seg_speaker", "<i4", n),
+                  ("word_offsets", "<i4", n + 1), ("word_start", "<f8", m), ("word_end", "<f8", m),
+                  ("word_score", "<f4", m), ("word_speaker", "<i4", m), ("string_offsets", "<u4", n + m + 1)]
+        columns, position = {}, 0
+        for name, dtype, count in layout:
+            columns[name] = np.frombuffer(raw, dtype=dtype, count=count, offset=position)
+            position += np.dtype(dtype).itemsize * count
+        columns["strings"] = raw[position:]
+
+        # Keep a handful of decoded chunks for sequential and nearby reads
+        if len(self._cache) >= 8:
+            self._cache.pop(next(iter(self._cache)))
+        self._cache[index] = columns
+        return columns
+
+    def _chunks_for(self, start, stop):
+        first = max(bisect.bisect_right(self._chunk_starts, start) - 1, 0)
+        last = bisect.bisect_right(self._chunk_starts, stop - 1)
+        return range(first, last)
+
+    def segments(self, start=0, stop=None):
+        """
+        Returns segments [start, stop) as WhisperX-style dicts.
+        """
+        stop = len(self) if stop is None else min(stop, len(self))
+        speakers = self.speakers
+        result = []
+        if start >= stop:
+            return result
+
+        for index in self._chunks_for(start, stop):
+            chunk = self.header["chunks"][index]
+            columns = self._chunk_columns(index)
+            n = chunk["segment_count"]
+            local_start = max(start - chunk["first_segment"], 0)
+            local_stop = min(stop - chunk["first_segment"], n)
+
+            # Convert the needed columns to Python lists once; per-element numpy access is slow
+            word_offsets = columns["word_offsets"].tolist()
+            first_word, last_word = word_offsets[local_start], word_offsets[local_stop]
+            offsets = columns["string_offsets"].tolist()
+            blob = bytes(columns["strings"][offsets[local_start]:offsets[local_stop]])
+            base = offsets[local_start]
+            texts = [blob[offsets[i] - base:offsets[i + 1] - base].decode("utf-8") for i in range(local_start, local_stop)]
+            blob = bytes(columns["strings"][offsets[n + first_word]:offsets[n + last_word]])
+            base = offsets[n + first_word]
+            word_texts = [blob[offsets[n + w] - base:offsets[n + w + 1] - base].decode("utf-8")
+                          for w in range(first_word, last_word)]
+            word_start = columns["word_start"][first_word:last_word].tolist()
+            word_end = columns["word_end"][first_word:last_word].tolist()
+            word_score = np.round(columns["word_score"][first_word:last_word].astype(np.float64), 3).tolist()
+            word_speaker = columns["word_speaker"][first_word:last_word].tolist()
+            seg_start = columns["seg_start"].tolist()
+            seg_end = columns["seg_end"].tolist()
+            seg_speaker = columns["seg_speaker"].tolist()
+
+            for s in range(local_start, local_stop):
+                words = []
+                for w in range(word_offsets[s] - first_word, word_offsets[s + 1] - first_word):
+                    word = {"word": word_texts[w]}
+                    # NaN marks a missing value (NaN != NaN)
+                    if word_start[w] == word_start[w]:
+                        word["start"] = word_start[w]
+                    if word_end[w] == word_end[w]:
+                        word["end"] = word_end[w]
+                    if word_score[w] == word_score[w]:
+                        word["score"] = word_score[w]
+                    if word_speaker[w] >= 0:
+                        word["speaker"] = speakers[word_speaker[w]]
+                    words.append(word)
+                # Like the words, a segment without bounds has no "start"/"end" keys
+                segment = {}
+                if seg_start[s] == seg_start[s]:
+                    segment["start"] = seg_start[s]
+                if seg_end[s] == seg_end[s]:
+                    segment["end"] = seg_end[s]
+                segment["text"] = texts[s - local_start]
+                segment["words"] = words
+                if seg_speaker[s] >= 0:
+                    segment["speaker"] = speakers[seg_speaker[s]]
+                result.append(segment)
+        return result
+
+    def word_times(self):
+        """
+        Returns (start, end) arrays of every word in transcript order without
+        building any dicts.
+        """
+        starts = [self._chunk_columns(i)["word_start"] for i in range(len(self.header["chunks"]))]
+        ends = [self._chunk_columns(i)["word_end"] for i in range(len(self.header["chunks"]))]
+        if not starts:
+            return np.empty(0), np.empty(0)
+        return np.concatenate(starts), np.concatenate(ends)
+
+    def to_result(self):
+        """Rebuilds the full WhisperX result dict."""
+        result = dict(self.header["extra"])
+        result["segments"] = self.segments()
+        if self.header["has_word_segments"]:
+            result["word_segments"] = [word for segment in result["segments"] for word in segment["words"]]
+        return result
+
+
+def read_transcript(path):
+    """
+    Loads a transcript from either format, chosen by file extension.
+    """
+    if path.endswith(BINARY_EXTENSION):
+        with BinaryTranscript(path) as transcript:
+            return transcript.to_result()
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Convert between JSON and binary (.wxt) transcripts.")
+    parser.add_argument("input", help="Transcript to convert (.json or .wxt)")
+    parser.add_argument("output", help="Output path; the extension selects the format")
+    parser.add_argument("--compression", choices=["zstd", "gzip", "none"], help="Default: zstd if available, else gzip")
+    args = parser.parse_args(argv)
+
+    result = read_transcript(args.input)
+    if args.output.endswith(BINARY_EXTENSION):
+        write_transcript(result, args.output, args.compression)
+    else:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+    print(f"Wrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,192 +1,230 @@
 import os
-import tkinter as tk
-from tkinter import filedialog
 import json
 import logging
-from subprocess import run, CalledProcessError
+from subprocess import run
 import gc
-import whisperx
-from inputimeout import inputimeout, TimeoutOccurred
-from whisperx.diarize import DiarizationPipeline
+import time
+from contextlib import contextmanager
 
-# Import your custom subtitle creation functions
-from srt_from_json import create_srt_from_json
-from ass_from_json import create_ass_from_json
+from device_profile import apply_thread_limits
+
+# whisperx (torch, pyannote), numpy, tkinter and inputimeout are imported by
+# the stages that need them, so importing this module for its helpers stays
+# cheap for the subtitle-only commands.
 
 # Define constants for supported file types to ensure consistency
 AUDIO_EXTENSIONS = ['.mp3', '.wav', '.aac', '.flac', '.m4a']
 VIDEO_EXTENSIONS = ['.mp4', '.mkv', '.avi', '.mov']
+MEDIA_EXTENSIONS = AUDIO_EXTENSIONS + VIDEO_EXTENSIONS
+
 
-def process_video_to_subtitles(video_file):
+class ModelCache:
     """
-    Full pipeline to transcribe a video/audio file and generate subtitles.
+    Keeps the WhisperX models resident between files.
+
+    The single-file entry points load each model, use it once and free it
+    again. Long-running callers (the watch-folder daemon) pass one instance
+    of this class to every `process_video_to_subtitles` call instead, so the
+    models are only loaded for the first file.
     """
-    if not video_file:
-        print("No file selected. Exiting.")
-        return
 
-    # --- 1. Setup Paths and Logging ---
+    def __init__(self, device, compute_type, hf_token, model_name="large-v3", batch_size=16, threads=None):
+        self.device = device
+        self.compute_type = compute_type
+        self.hf_token = hf_token
+        self.model_name = model_name
+        self.batch_size = batch_size
+        self.threads = threads
+        self.profile = {"device": device, "compute_type": compute_type, "batch_size": batch_size, "threads": threads}
+        self._asr_model = None
+        self._align_models = {}  # language code -> (model, metadata)
+        self._diarize_model = None
+
+    @classmethod
+    def from_profile(cls, profile, hf_token, model_name="large-v3"):
+        """Builds a cache for a device_profile.detect_profile() result."""
+        apply_thread_limits(profile["threads"])
+        models = cls(profile["device"], profile["compute_type"], hf_token, model_name,
+                     batch_size=profile["batch_size"], threads=profile["threads"])
+        models.profile = dict(profile)
+        return models
+
+    def asr_model(self):
+        if self._asr_model is None:
+            import whisperx
+            logging.info(f"Loading whisper model {self.model_name} ({self.device}, {self.compute_type})...")
+            options = {"threads": self.threads} if self.threads else {}
+            self._asr_model = whisperx.load_model(self.model_name, self.device, compute_type=self.compute_type, **options)
+        return self._asr_model
+
+    def align_model(self, language_code):
+        if language_code not in self._align_models:
+            import whisperx
+            logging.info(f"Loading alignment model for '{language_code}'...")
+            self._align_models[language_code] = whisperx.load_align_model(language_code=language_code, device=self.device)
+        return self._align_models[language_code]
+
+    def diarize_model(self):
+        if self._diarize_model is None:
+            from whisperx.diarize import DiarizationPipeline
+            logging.info("Loading diarization pipeline...")
+            self._diarize_model = DiarizationPipeline(use_auth_token=self.hf_token, device=self.device)
+        return self._diarize_model
+
+    def release(self, stage):
+        """Drops the model(s) of one stage ("asr", "align" or "diarize")."""
+        if stage == "asr":
+            self._asr_model = None
+        elif stage == "align":
+            self._align_models.clear()
+        elif stage == "diarize":
+            self._diarize_model = None
+        gc.collect()
+
+
+@contextmanager
+def stage_timer(metrics, stage):
+    """Records the wall time of a pipeline stage in metrics["stages"]."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics["stages"][stage] = round(time.perf_counter() - started, 3)
+
+
+def write_metrics(metrics, metrics_path):
+    with open(metrics_path, "w", encoding="utf-8") as f:
+        json.dump(metrics, f, ensure_ascii=False, indent=2)
+
+
+def output_paths(video_file):
+    """
+    Returns the paths of every file the pipeline writes for `video_file`.
+    """
     video_dir = os.path.dirname(video_file)
     base_name = os.path.splitext(os.path.basename(video_file))[0]
+    return {
+        # Initial transcript before alignment and diarization
+        "initial_json": os.path.join(video_dir, f"{base_name}_initial.json"),
+        # Intermediate results of the pipeline stages (see pipeline.py)
+        "aligned_json": os.path.join(video_dir, f"{base_name}_aligned.json"),
+        "diarization": os.path.join(video_dir, f"{base_name}_diarization.json"),
+        # Final, processed transcript with speaker info
+        "final_json": os.path.join(video_dir, f"{base_name}_final.json"),
+        # Optional compact copy of the final transcript (see transcript_store.py)
+        "final_binary": os.path.join(video_dir, f"{base_name}_final.wxt"),
+        # Final transcript re-split into subtitle-sized segments (SubtitlesProcessor)
+        "resegmented_json": os.path.join(video_dir, f"{base_name}_resegmented.json"),
+        "ass": os.path.join(video_dir, f"{base_name}.ass"),
+        # create_srt_from_json names the file after the JSON it reads
+        "srt": os.path.join(video_dir, f"{base_name}_final_word_lvl.srt"),
+        # Segment-level subtitles and plain text from the WhisperX writers
+        "segment_srt": os.path.join(video_dir, f"{base_name}.srt"),
+        "txt": os.path.join(video_dir, f"{base_name}.txt"),
+        "video": os.path.join(video_dir, f"{base_name}_subtitled.mp4"),
+        # Copy of the final transcript the current subtitles/video were rendered from
+        "rendered_json": os.path.join(video_dir, f"{base_name}_final.rendered.json"),
+        "log": os.path.join(video_dir, "process.log"),
+        # Log of this file alone, for callers that process files of one directory concurrently
+        "media_log": os.path.join(video_dir, f"{base_name}.log"),
+        # Execution profile, stage timings and pre-pass statistics of the last run
+        "metrics": os.path.join(video_dir, f"{base_name}_metrics.json"),
+    }
 
-    # Path for the initial transcript before alignment and diarization
-    initial_json_output = os.path.join(video_dir, f"{base_name}_initial.json")
-    # Path for the final, processed transcript with speaker info
-    final_json_output = os.path.join(video_dir, f"{base_name}_final.json")
-    ass_output = os.path.join(video_dir, f"{base_name}.ass")
-    final_video_output = os.path.join(video_dir, f"{base_name}_subtitled.mp4")
-    log_file = os.path.join(video_dir, "process.log")
-
-    print(f"Processing file: {video_file}")
-    logging.basicConfig(
-        filename=log_file,
-        level=logging.INFO,
-        format='%(asctime)s - %(levelname)s - %(message)s',
-        filemode='w'
-    )
-    logging.info(f"Starting processing for {video_file}")
-
-    # --- 2. Transcription with WhisperX ---
-    device = "cuda"
-    batch_size = 16
-    compute_type = "float16"
-    hf_token = os.environ.get("HF_TOKEN") # Use environment variable for Hugging Face token
-    if not hf_token:
-        message = "Hugging Face token not found. Please set the HF_TOKEN environment variable."
-        logging.error(message)
-        print(f"ERROR: {message}")
-        return
 
-    try:
-        # Load audio
-        logging.info("Loading audio...")
-        audio = whisperx.load_audio(video_file)
-
-        # Transcribe
-        logging.info("Transcribing audio with whisper...")
-        model = whisperx.load_model("large-v3", device, compute_type=compute_type)
-        result = model.transcribe(audio, batch_size=batch_size)
-        del model
-        gc.collect()
+def subtitles_filter(ass_path):
+    """
+    Returns the `subtitles` filter for `ass_path` as an absolute path, so no
+    working-directory change is needed. The path is escaped twice: once as
+    a filter option value and once for the filtergraph around it, which
+    covers Windows drive colons as well as quotes, commas and brackets.
+    """
+    # FFmpeg accepts forward slashes on Windows, and they need no escaping
+    path = os.path.abspath(ass_path).replace(os.sep, "/")
+    for char in ("\\", ":", "'"):
+        path = path.replace(char, "\\" + char)
+    for char in ("\\", "'", "[", "]", ",", ";"):
+        path = path.replace(char, "\\" + char)
+    return f"subtitles=filename={path}"
 
-        # Save initial transcript for potential manual editing
-        with open(initial_json_output, "w", encoding="utf-8") as f:
-            json.dump(result, f, ensure_ascii=False, indent=2)
-        logging.info(f"Initial transcript saved to {initial_json_output}")
-
-        # --- 3. Optional Manual Intervention ---
-        try:
-            edit_prompt = inputimeout(
-                prompt=f"You have 10 seconds to decide if you want to manually edit the transcript at:\n{initial_json_output}\nEdit now? (y/n): ",
-                timeout=10
-            )
-        except TimeoutOccurred:
-            edit_prompt = 'n'
-
-        if edit_prompt.lower() == 'y':
-            input("Please edit the JSON file, save it, and then press Enter to continue...")
-            # Load the potentially edited file
-            with open(initial_json_output, "r", encoding="utf-8") as f:
-                result = json.load(f)
-            logging.info("Reloaded edited transcript.")
-
-        # --- 4. Align and Diarize ---
-        # Align
-        logging.info("Aligning transcript...")
-        model_a, metadata = whisperx.load_align_model(language_code=result["language"], device=device)
-        result = whisperx.align(result["segments"], model_a, metadata, audio, device, return_char_alignments=False)
-        del model_a
-        gc.collect()
 
-        # Diarize and assign speakers
-        logging.info("Performing speaker diarization...")
-        diarize_model = DiarizationPipeline(use_auth_token=hf_token, device=device)
-        diarize_segments = diarize_model(audio)
-        result = whisperx.assign_word_speakers(diarize_segments, result)
-        del diarize_model
-        gc.collect()
+def burn_command(video_file, ass_output, final_video_output, threads=None):
+    """
+    Builds the FFmpeg command that burns `ass_output` into `video_file`.
+    Audio inputs get a black 720p video track. `threads` caps the encoder
+    and filter threads of this one job.
+    """
+    thread_options = ["-threads", str(threads), "-filter_threads", str(threads)] if threads else []
+    if os.path.splitext(video_file)[1].lower() in AUDIO_EXTENSIONS:
+        # Input is audio: create a black video, add audio, and burn subtitles
+        inputs = ["-f", "lavfi", "-i", "color=c=black:s=1280x720:r=25", "-i", os.path.abspath(video_file)]
+        codec_options = ["-c:v", "libx264", "-c:a", "copy", "-shortest"]
+    else:
+        # Input is a video: burn subtitles onto the existing video
+        inputs = ["-i", os.path.abspath(video_file)]
+        codec_options = ["-c:a", "copy"]
+    return (["ffmpeg"] + inputs + ["-vf", subtitles_filter(ass_output)] + codec_options + thread_options
+            + ["-y", os.path.abspath(final_video_output)])
+
+
+def burn_subtitles(video_file, ass_output, final_video_output, threads=None):
+    """
+    Burns `ass_output` into `video_file` with FFmpeg. Raises
+    CalledProcessError if FFmpeg fails.
+    """
+    logging.info("Burning subtitles into video...")
+    if os.path.splitext(video_file)[1].lower() in AUDIO_EXTENSIONS:
+        logging.info("Input is an audio file. Creating a black video with subtitles.")
+    else:
+        logging.info("Input is a video file. Burning subtitles into the existing video.")
+    run(burn_command(video_file, ass_output, final_video_output, threads), check=True, capture_output=True, text=True)
+
+
+def process_video_to_subtitles(video_file, models=None, interactive=True, skip_silence=True, binary_transcript=False,
+                               search_index=None, fingerprint_index=None, parallel=False, log_file=None):
+    """
+    Full pipeline to transcribe a video/audio file and generate subtitles.
+
+    `models` is an optional ModelCache; when given, the models stay loaded
+    after this call. With `interactive=False` the manual-edit prompt is
+    skipped. With `skip_silence` transcription and diarization only see the
+    stretches the speech pre-pass kept. With `binary_transcript` a `.wxt`
+    copy of the final transcript is written next to the JSON. `search_index`
+    is the path of a search_index.py database the final transcript is added
+    to. With `fingerprint_index` (a fingerprint.py database) a copy of an
+    already processed recording reuses its transcripts instead of being
+    transcribed again. `parallel` runs independent stages at the same time
+    (see pipeline.py). `log_file` replaces the shared process.log. Returns
+    the path of the subtitled video, or None on failure.
+    """
+    if not video_file:
+        print("No file selected. Exiting.")
+        return None
+
+    # The stages live in pipeline.py; this entry point always runs all of them
+    from pipeline import run_pipeline
+
+    targets = ["video", "srt"] + (["final_binary"] if binary_transcript else [])
+    context = run_pipeline(video_file, targets, models=models, force=True, parallel=parallel,
+                           fingerprint_index=fingerprint_index, log_file=log_file,
+                           skip_silence=skip_silence, edit_timeout=10 if interactive else None)
+    if context is None:
+        return None
+    if search_index:
+        from search_index import update_index
+        postings = update_index(search_index, context.paths["final_json"])
+        logging.info(f"Added {postings} words to the search index {search_index}")
+    print(f"\nSuccess! Subtitled video created at: {context.paths['video']}")
+    return context.paths["video"]
 
-        # Save final processed data
-        with open(final_json_output, "w", encoding="utf-8") as f:
-            json.dump(result, f, ensure_ascii=False, indent=2)
-        logging.info(f"Final processed data with speaker info saved to {final_json_output}")
-
-        # --- 5. Generate Subtitle Files ---
-        logging.info("Generating .ass subtitle file...")
-        create_ass_from_json(final_json_output, ass_output)
-
-        logging.info("Generating word-level .srt subtitle file...")
-        create_srt_from_json(final_json_output, video_dir)
-
-        # --- 6. Burn Subtitles with FFmpeg ---
-        logging.info("Burning subtitles into video...")
-        
-        original_cwd = os.getcwd()
-        try:
-            # Change to the video's directory to avoid ffmpeg pathing issues on Windows
-            os.chdir(video_dir)
-            logging.info(f"Changed working directory to {video_dir} for ffmpeg processing.")
-
-            # Use relative paths for ffmpeg, which is more robust
-            relative_video_file = os.path.basename(video_file)
-            relative_ass_output = os.path.basename(ass_output)
-            relative_final_video_output = os.path.basename(final_video_output)
-
-            # Check if the input is an audio file to construct the correct ffmpeg command
-            file_extension = os.path.splitext(video_file)[1].lower()
-
-            if file_extension in AUDIO_EXTENSIONS:
-                # Input is audio: create a black video, add audio, and burn subtitles
-                logging.info("Input is an audio file. Creating a black video with subtitles.")
-                ffmpeg_command = [
-                    "ffmpeg",
-                    "-f", "lavfi", "-i", "color=c=black:s=1280x720:r=25",
-                    "-i", relative_video_file,
-                    "-vf", f"subtitles='{relative_ass_output}'",
-                    "-c:v", "libx264",
-                    "-c:a", "copy",
-                    "-shortest",
-                    "-y",
-                    relative_final_video_output
-                ]
-            else:
-                # Input is a video: burn subtitles onto the existing video
-                logging.info("Input is a video file. Burning subtitles into the existing video.")
-                ffmpeg_command = [
-                    "ffmpeg",
-                    "-i", relative_video_file,
-                    "-vf", f"subtitles='{relative_ass_output}'",
-                    "-c:a", "copy",
-                    "-y",
-                    relative_final_video_output
-                ]
-
-            run(ffmpeg_command, check=True, capture_output=True, text=True)
-            logging.info(f"Process complete! Subtitled video saved at {final_video_output}")
-            print(f"\nSuccess! Subtitled video created at: {final_video_output}")
-
-        finally:
-            # Always change back to the original directory
-            os.chdir(original_cwd)
-            logging.info(f"Restored original working directory: {original_cwd}")
-
-    except FileNotFoundError as e:
-        logging.error(f"A file was not found: {e}")
-        print(f"ERROR: A file was not found. Check the logs at {log_file}")
-    except CalledProcessError as e:
-        logging.error(f"FFmpeg failed with exit code {e.returncode}")
-        logging.error(f"FFmpeg stdout: {e.stdout}")
-        logging.error(f"FFmpeg stderr:\n{e.stderr}")
-        print(f"ERROR: FFmpeg failed. Check the logs at {log_file}")
-    except Exception as e:
-        logging.error(f"An unexpected error occurred: {e}", exc_info=True)
-        print(f"An unexpected error occurred. Check the logs at {log_file}")
-
-
-def main():
-    """
-    Main function to run the script.
+
+def select_media_file():
+    """
+    Asks for the source file with a Tk file dialog.
     """
+    import tkinter as tk
+    from tkinter import filedialog
+
     root = tk.Tk()
     root.withdraw()
 
@@ -195,7 +233,7 @@ def main():
     audio_types_str = ";".join([f"*{ext}" for ext in AUDIO_EXTENSIONS])
     media_types_str = f"{video_types_str};{audio_types_str}"
 
-    video_file = filedialog.askopenfilename(
+    return filedialog.askopenfilename(
         title="Select the Source Video or Audio File",
         filetypes=(
             ("Media Files", media_types_str),
@@ -204,8 +242,30 @@ def main():
             ("All Files", "*.*")
         )
     )
-    process_video_to_subtitles(video_file)
+
+
+def main(argv=None):
+    """
+    Main function to run the script. Without file arguments the source file
+    is picked with a file dialog.
+    """
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Transcribe media files and burn in subtitles.")
+    parser.add_argument("files", nargs="*", help="Media files (default: choose one in a file dialog)")
+    parser.add_argument("--no-edit", action="store_true", help="Skip the prompt to edit the initial transcript")
+    parser.add_argument("--keep-silence", action="store_true", help="Disable the speech pre-pass")
+    parser.add_argument("--binary-transcript", action="store_true", help="Also write the final transcript as .wxt")
+    parser.add_argument("--search-index", metavar="DB", help="Add the final transcripts to this search index")
+    parser.add_argument("--fingerprint-index", metavar="DB", help="Reuse transcripts of earlier copies found in this index")
+    args = parser.parse_args(argv)
+
+    video_files = args.files or [select_media_file()]
+    for video_file in video_files:
+        process_video_to_subtitles(video_file, interactive=not args.no_edit, skip_silence=not args.keep_silence,
+                                   binary_transcript=args.binary_transcript, search_index=args.search_index,
+                                   fingerprint_index=args.fingerprint_index)
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
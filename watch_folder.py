@@ -0,0 +1,378 @@
+"""
+Headless watch-folder daemon for the subtitle pipeline.
+
+Watches one or more inbox directories for new media files and runs
+`process_video_to_subtitles` on them with models that stay loaded between
+files. Every finished file ends up in its own directory in the outbox,
+together with all generated outputs and its process.log, and a
+`<name>.status.json` file next to it records the state of each job.
+
+Files are claimed by renaming them into `<inbox>/.processing/<name>/`, which
+is atomic on a single filesystem. The status file records the host and process
+that owns the claim; if that daemon dies mid-file, the claim is picked up again
+by the next daemon started on the same host.
+
+Usage:
+    python watch_folder.py --inbox D:/inbox --outbox D:/outbox
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import signal
+import socket
+import logging
+import argparse
+import threading
+from datetime import datetime
+
+from video_processor import MEDIA_EXTENSIONS, ModelCache, output_paths, process_video_to_subtitles
+from device_profile import detect_profile
+
+PROCESSING_DIR = ".processing"
+# Partially copied files often carry one of these suffixes until the copy is done
+PARTIAL_SUFFIXES = ('.part', '.tmp', '.crdownload', '.partial')
+
+
+def _now():
+    return datetime.now().isoformat(timespec="seconds")
+
+
+def write_status(outbox, job_name, **fields):
+    """
+    Merges `fields` into the status file of a job and rewrites it atomically.
+    """
+    status_path = os.path.join(outbox, f"{job_name}.status.json")
+    status = {}
+    if os.path.exists(status_path):
+        try:
+            with open(status_path, "r", encoding="utf-8") as f:
+                status = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            status = {}
+    status.update(fields)
+    status["updated"] = _now()
+
+    tmp_path = status_path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(status, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, status_path)
+    return status
+
+
+def _process_alive(pid):
+    """Whether a process with this id runs on this machine."""
+    try:
+        import psutil
+        return psutil.pid_exists(pid)
+    except ImportError:
+        pass
+    if os.name == "nt":
+        # os.kill would terminate the process on Windows; ask for a handle instead
+        import ctypes
+        handle = ctypes.windll.kernel32.OpenProcess(0x1000, False, pid)  # PROCESS_QUERY_LIMITED_INFORMATION
+        if not handle:
+            return False
+        exit_code = ctypes.c_ulong()
+        ctypes.windll.kernel32.GetExitCodeProcess(handle, ctypes.byref(exit_code))
+        ctypes.windll.kernel32.CloseHandle(handle)
+        return exit_code.value == 259  # STILL_ACTIVE
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass  # Exists, but belongs to another user
+    return True
+
+
+def read_status(outbox, job_name):
+    status_path = os.path.join(outbox, f"{job_name}.status.json")
+    try:
+        with open(status_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return {}
+
+
+class WatchFolderDaemon:
+    """
+    Polls the inboxes, claims settled media files and processes them one at
+    a time with a shared ModelCache.
+    """
+
+    def __init__(self, inboxes, outbox, models, poll_interval=5.0, settle_time=10.0, max_attempts=2, search_index=None,
+                 fingerprint_index=None):
+        self.inboxes = [os.path.abspath(inbox) for inbox in inboxes]
+        self.outbox = os.path.abspath(outbox)
+        self.models = models
+        self.poll_interval = poll_interval
+        self.settle_time = settle_time
+        self.max_attempts = max_attempts
+        self.search_index = search_index
+        self.fingerprint_index = fingerprint_index
+        self.stop_event = threading.Event()
+        # Written into every claim so other daemons on the same inboxes leave it alone
+        self.owner = {"host": socket.gethostname(), "pid": os.getpid()}
+        # path -> (size, mtime, first time this size/mtime was seen)
+        self._pending = {}
+
+        os.makedirs(self.outbox, exist_ok=True)
+        for inbox in self.inboxes:
+            os.makedirs(os.path.join(inbox, PROCESSING_DIR), exist_ok=True)
+
+    # --- Discovery and claiming ---
+
+    def _settled_files(self):
+        """
+        Returns inbox files whose size and mtime did not change for
+        `settle_time` seconds, oldest first.
+        """
+        now = time.monotonic()
+        seen = set()
+        ready = []
+        for inbox in self.inboxes:
+            try:
+                entries = list(os.scandir(inbox))
+            except OSError as e:
+                logging.error(f"Cannot scan inbox {inbox}: {e}")
+                continue
+            for entry in entries:
+                name = entry.name
+                if name.startswith('.') or name.lower().endswith(PARTIAL_SUFFIXES):
+                    continue
+                if os.path.splitext(name)[1].lower() not in MEDIA_EXTENSIONS or not entry.is_file():
+                    continue
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue  # Vanished between scandir and stat
+                seen.add(entry.path)
+                previous = self._pending.get(entry.path)
+                if previous is None or previous[:2] != (stat.st_size, stat.st_mtime):
+                    self._pending[entry.path] = (stat.st_size, stat.st_mtime, now)
+                elif now - previous[2] >= self.settle_time:
+                    ready.append((stat.st_mtime, entry.path, inbox))
+
+        # Forget files that disappeared from the inboxes
+        for path in list(self._pending):
+            if path not in seen:
+                del self._pending[path]
+        return [(path, inbox) for _, path, inbox in sorted(ready)]
+
+    def _unique_job_name(self, base_name):
+        job_name = base_name
+        counter = 1
+        while (os.path.exists(os.path.join(self.outbox, job_name))
+               or os.path.exists(os.path.join(self.outbox, f"{job_name}.status.json"))
+               or any(os.path.exists(os.path.join(inbox, PROCESSING_DIR, job_name)) for inbox in self.inboxes)):
+            counter += 1
+            job_name = f"{base_name}-{counter}"
+        return job_name
+
+    def claim(self, path, inbox):
+        """
+        Moves a media file into its own claim directory. Returns the claimed
+        path, or None if another process got to it first.
+        """
+        file_name = os.path.basename(path)
+        while True:
+            job_name = self._unique_job_name(os.path.splitext(file_name)[0])
+            claim_dir = os.path.join(inbox, PROCESSING_DIR, job_name)
+            try:
+                # Exclusive, so a failed claim below only ever cleans up its own directory
+                os.mkdir(claim_dir)
+                break
+            except FileExistsError:
+                # Another daemon on this inbox took the name just now; the next one is free
+                continue
+        claimed_path = os.path.join(claim_dir, file_name)
+        # Record the claim before the rename so a crash in between stays recoverable
+        write_status(self.outbox, job_name, state="queued", source=path, file=file_name, attempts=0, queued=_now(),
+                     owner=self.owner)
+        try:
+            os.rename(path, claimed_path)
+        except OSError as e:
+            logging.warning(f"Could not claim {path}: {e}")
+            os.rmdir(claim_dir)
+            os.remove(os.path.join(self.outbox, f"{job_name}.status.json"))
+            return None
+        self._pending.pop(path, None)
+        logging.info(f"Claimed {path} as job {job_name}")
+        return claimed_path
+
+    def _owner_alive(self, owner):
+        """
+        Whether the daemon that owns a claim may still be working on it.
+        Claims of other hosts cannot be checked and count as alive.
+        """
+        if not owner:
+            return False  # Claimed before owners were recorded
+        if owner.get("host") != self.owner["host"]:
+            return True
+        # Our own pid can only be a previous run's: this run has not claimed anything yet
+        return owner.get("pid") != self.owner["pid"] and _process_alive(owner["pid"])
+
+    def recover_claims(self):
+        """
+        Returns files left in the claim directories by a daemon on this host
+        that did not shut down cleanly. Claims of daemons that still run, or
+        run on another host, are left alone.
+        """
+        recovered = []
+        for inbox in self.inboxes:
+            processing_root = os.path.join(inbox, PROCESSING_DIR)
+            for job_name in sorted(os.listdir(processing_root)):
+                claim_dir = os.path.join(processing_root, job_name)
+                if not os.path.isdir(claim_dir):
+                    continue
+                status = read_status(self.outbox, job_name)
+                if self._owner_alive(status.get("owner")):
+                    logging.info(f"Skipping job {job_name}: claimed by {status['owner']['host']} "
+                                 f"(pid {status['owner']['pid']})")
+                    continue
+                file_name = status.get("file")
+                if file_name and os.path.exists(os.path.join(claim_dir, file_name)):
+                    recovered.append(os.path.join(claim_dir, file_name))
+                    logging.info(f"Recovered unfinished job {job_name}")
+                elif not os.listdir(claim_dir):
+                    # Crashed between creating the claim directory and the rename
+                    os.rmdir(claim_dir)
+                else:
+                    logging.warning(f"Cannot recover {claim_dir}: status file missing or incomplete")
+        return recovered
+
+    # --- Processing ---
+
+    def process(self, claimed_path):
+        claim_dir = os.path.dirname(claimed_path)
+        job_name = os.path.basename(claim_dir)
+        status = read_status(self.outbox, job_name)
+        attempts = status.get("attempts", 0) + 1
+
+        if attempts > self.max_attempts:
+            logging.error(f"Job {job_name} failed {self.max_attempts} times; giving up.")
+            self._finish(claim_dir, job_name, state="failed", error="Too many attempts (daemon crashed during processing)")
+            return
+
+        write_status(self.outbox, job_name, state="processing", attempts=attempts, started=_now(), owner=self.owner)
+
+        # Mirror the pipeline log into the job directory
+        log_handler = logging.FileHandler(output_paths(claimed_path)["log"], mode='w', encoding="utf-8")
+        log_handler.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(message)s'))
+        logging.getLogger().addHandler(log_handler)
+        started = time.monotonic()
+        try:
+            result = process_video_to_subtitles(claimed_path, models=self.models, interactive=False,
+                                                fingerprint_index=self.fingerprint_index)
+        except Exception as e:
+            logging.error(f"Job {job_name} crashed: {e}", exc_info=True)
+            result = None
+        finally:
+            logging.getLogger().removeHandler(log_handler)
+            log_handler.close()
+        elapsed = round(time.monotonic() - started, 2)
+
+        if result:
+            self._finish(claim_dir, job_name, state="done", seconds=elapsed)
+        else:
+            self._finish(claim_dir, job_name, state="failed", seconds=elapsed,
+                         error="Pipeline failed, see process.log")
+
+    def _finish(self, claim_dir, job_name, state, **fields):
+        destination = os.path.join(self.outbox, job_name)
+        shutil.move(claim_dir, destination)
+        outputs = sorted(os.listdir(destination))
+        write_status(self.outbox, job_name, state=state, finished=_now(), output_dir=destination, outputs=outputs, **fields)
+        logging.info(f"Job {job_name} {state}; outputs moved to {destination}")
+        if state == "done" and self.search_index:
+            self._index_outputs(destination)
+        if state == "done" and self.fingerprint_index:
+            self._move_fingerprint(claim_dir, destination, read_status(self.outbox, job_name).get("file"))
+
+    def _index_outputs(self, destination):
+        # Indexed after the move, so the index points at the outbox copies
+        from search_index import SearchIndex
+        try:
+            with SearchIndex(self.search_index) as index:
+                _, postings = index.update([destination])
+            logging.info(f"Indexed {postings} words from {destination}")
+        except Exception as e:
+            logging.error(f"Could not update the search index: {e}")
+
+    def _move_fingerprint(self, claim_dir, destination, file_name):
+        # The pipeline fingerprinted the claimed file; later copies must find the outbox copy and its transcripts
+        from fingerprint import FingerprintIndex
+        try:
+            with FingerprintIndex(self.fingerprint_index) as index:
+                index.rename(os.path.join(claim_dir, file_name), os.path.join(destination, file_name))
+        except Exception as e:
+            logging.error(f"Could not update the fingerprint index: {e}")
+
+    # --- Main loop ---
+
+    def run(self):
+        logging.info(f"Watching {', '.join(self.inboxes)} -> {self.outbox}")
+        queue = self.recover_claims()
+
+        while not self.stop_event.is_set():
+            if not queue:
+                for path, inbox in self._settled_files():
+                    claimed_path = self.claim(path, inbox)
+                    if claimed_path:
+                        queue.append(claimed_path)
+            if queue:
+                self.process(queue.pop(0))
+            else:
+                self.stop_event.wait(self.poll_interval)
+
+        # Claimed but unprocessed files stay in .processing and are recovered next start
+        logging.info("Watch-folder daemon stopped.")
+
+    def request_stop(self, signum=None, frame=None):
+        if self.stop_event.is_set():
+            # Second signal: stop immediately, the claim is recovered on restart
+            raise KeyboardInterrupt
+        logging.info("Shutdown requested; finishing the current file...")
+        self.stop_event.set()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Watch inbox folders and subtitle new media files.")
+    parser.add_argument("--inbox", action="append", required=True, help="Directory to watch (repeatable)")
+    parser.add_argument("--outbox", required=True, help="Directory that receives finished jobs")
+    parser.add_argument("--poll-interval", type=float, default=5.0, help="Seconds between inbox scans")
+    parser.add_argument("--settle-time", type=float, default=10.0,
+                        help="Seconds a file must stay unchanged before it is claimed")
+    parser.add_argument("--max-attempts", type=int, default=2, help="Attempts per file before it is marked failed")
+    parser.add_argument("--device", choices=["cuda", "cpu"], help="Default: CUDA if available, else CPU")
+    parser.add_argument("--compute-type", help="Default: float16 on CUDA, int8 on CPU")
+    parser.add_argument("--search-index", metavar="DB", help="Add finished transcripts to this search index")
+    parser.add_argument("--fingerprint-index", metavar="DB",
+                        help="Reuse transcripts of earlier copies of a recording found in this index")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(
+        stream=sys.stderr,
+        level=logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(message)s'
+    )
+
+    hf_token = os.environ.get("HF_TOKEN")
+    if not hf_token:
+        print("ERROR: Hugging Face token not found. Please set the HF_TOKEN environment variable.")
+        sys.exit(1)
+
+    models = ModelCache.from_profile(detect_profile(args.device, args.compute_type), hf_token)
+    daemon = WatchFolderDaemon(args.inbox, args.outbox, models, poll_interval=args.poll_interval,
+                               settle_time=args.settle_time, max_attempts=args.max_attempts,
+                               search_index=args.search_index, fingerprint_index=args.fingerprint_index)
+    signal.signal(signal.SIGINT, daemon.request_stop)
+    signal.signal(signal.SIGTERM, daemon.request_stop)
+    daemon.run()
+
+
+if __name__ == "__main__":
+    main()
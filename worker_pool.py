@@ -0,0 +1,246 @@
+"""
+Multi-process CPU worker pool for large batches of short media files.
+
+One process with one model instance keeps only a few cores busy on short
+clips. This runs `process_video_to_subtitles` in several worker processes
+instead. Each worker loads its own ModelCache and gets an equal, disjoint
+share of the cores (thread limits and, on Linux, CPU affinity), so the
+workers do not oversubscribe the machine. Files are handed out longest
+first by their ffprobe duration, which is the LPT (longest processing time)
+rule and keeps the workers finishing at about the same time.
+
+Usage:
+    python worker_pool.py D:/clips --workers 4
+    python worker_pool.py D:/clips --core-counts 4,8,16    # RTF per core count
+
+benchmarks/bench_worker_pool.py runs the core-count sweep with a CPU-bound
+stand-in for the pipeline.
+"""
+
+import os
+import sys
+import glob
+import time
+import heapq
+import logging
+import argparse
+from subprocess import run, CalledProcessError
+
+from video_processor import MEDIA_EXTENSIONS, AUDIO_EXTENSIONS, ModelCache, output_paths, process_video_to_subtitles
+from device_profile import CPU_BASE_GB, usable_cores, available_memory_gb, cpu_batch_size, detect_profile
+
+# Used when ffprobe cannot read the duration, in bytes per second of media
+AUDIO_BYTES_PER_SECOND = 128_000 / 8
+VIDEO_BYTES_PER_SECOND = 2_000_000 / 8
+# Outputs of earlier runs are media files too, and so are unfinished re-burns (reburn.py)
+OUTPUT_SUFFIXES = ("_subtitled.mp4", "_subtitled.reburn.mp4")
+
+# Set in each worker process by _init_worker
+_worker = {}
+
+
+def estimate_duration(path):
+    """Media duration in seconds from ffprobe, or a bitrate guess from the file size."""
+    try:
+        output = run(
+            ["ffprobe", "-v", "error", "-show_entries", "format=duration", "-of", "csv=p=0", path],
+            check=True, capture_output=True, text=True
+        ).stdout.strip()
+        return float(output)
+    except (OSError, CalledProcessError, ValueError):
+        is_audio = os.path.splitext(path)[1].lower() in AUDIO_EXTENSIONS
+        return os.path.getsize(path) / (AUDIO_BYTES_PER_SECOND if is_audio else VIDEO_BYTES_PER_SECOND)
+
+
+def find_media(inputs):
+    found = set()
+    for item in inputs:
+        if os.path.isdir(item):
+            for extension in MEDIA_EXTENSIONS:
+                found.update(glob.glob(os.path.join(item, "**", f"*{extension}"), recursive=True))
+        elif os.path.isfile(item):
+            found.add(item)
+    return sorted(os.path.abspath(path) for path in found if not path.endswith(OUTPUT_SUFFIXES))
+
+
+def lpt_order(durations):
+    """Paths sorted longest first; a shared queue in this order is LPT scheduling."""
+    return sorted(durations, key=durations.get, reverse=True)
+
+
+def lpt_makespan(durations, workers):
+    """Busiest worker's total duration under LPT, for comparing against the measured run."""
+    loads = [0.0] * workers
+    for path in lpt_order(durations):
+        heapq.heapreplace(loads, loads[0] + durations[path])
+    return max(loads)
+
+
+def default_workers(cores, memory_gb, threads_per_worker=2):
+    """As many workers as cores allow at `threads_per_worker`, limited by room for one model each."""
+    by_cores = max(1, cores // threads_per_worker)
+    by_memory = by_cores if memory_gb is None else max(1, int(memory_gb // (CPU_BASE_GB + 1.0)))
+    return min(by_cores, by_memory)
+
+
+def split_cores(cores, workers):
+    """Disjoint core sets, one per worker, from the cores this process may use."""
+    try:
+        available = sorted(os.sched_getaffinity(0))[:cores]
+    except AttributeError:  # No affinity control on Windows or macOS
+        available = list(range(cores))
+    share = max(1, len(available) // workers)
+    return [available[i * share:(i + 1) * share] or available[-share:] for i in range(workers)]
+
+
+# --- Worker process ---
+
+def _init_worker(core_sets, compute_type, batch_size, hf_token, model_name, process):
+    cores = core_sets.get()
+    try:
+        os.sched_setaffinity(0, cores)
+    except AttributeError:
+        pass
+    threads = len(cores)
+    # Must happen before torch or numpy are imported in this process
+    for variable in ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS"):
+        os.environ[variable] = str(threads)
+
+    # Warnings to the console; each file's INFO log goes to its own <name>.log
+    console = logging.StreamHandler(sys.stderr)
+    console.setLevel(logging.WARNING)
+    logging.basicConfig(level=logging.INFO, handlers=[console], format='%(asctime)s - %(levelname)s - %(message)s')
+
+    _worker["process"] = process or _transcribe_file
+    if process is None:
+        profile = detect_profile("cpu", compute_type, batch_size, threads)
+        _worker["models"] = ModelCache.from_profile(profile, hf_token, model_name)
+
+
+def _transcribe_file(path, duration):
+    """Runs the pipeline on one file with the worker's models. Returns True on success."""
+    # One log per media file: other workers may be processing files of the same directory
+    log_file = output_paths(path)["media_log"]
+    log_handler = logging.FileHandler(log_file, mode='w', encoding="utf-8")
+    log_handler.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(message)s'))
+    logging.getLogger().addHandler(log_handler)
+    try:
+        # Stages run one at a time: the worker's share of the cores is already all it may use
+        return process_video_to_subtitles(path, models=_worker["models"], interactive=False, parallel=False,
+                                          log_file=log_file) is not None
+    except Exception as e:
+        logging.error(f"{path} crashed: {e}", exc_info=True)
+        return False
+    finally:
+        logging.getLogger().removeHandler(log_handler)
+        log_handler.close()
+
+
+def _process_file(path, duration):
+    started = time.perf_counter()
+    ok = _worker["process"](path, duration)
+    return path, ok, time.perf_counter() - started, os.getpid()
+
+
+# --- Pool ---
+
+def run_pool(durations, workers, cores, compute_type=None, batch_size=None, model_name="large-v3", process=None):
+    """
+    Processes every file in `durations` (path -> seconds) with `workers`
+    processes sharing `cores` cores. Returns a summary dict. `process(path,
+    duration)` replaces the pipeline run per file (it must be importable by
+    the spawned workers and return True on success); no models are loaded
+    then.
+    """
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+
+    # Spawned workers start clean, so the thread limits apply before torch is loaded
+    context = multiprocessing.get_context("spawn")
+    core_sets = context.Queue()
+    for core_set in split_cores(cores, workers):
+        core_sets.put(core_set)
+    if batch_size is None:
+        memory_gb = available_memory_gb()
+        batch_size = cpu_batch_size(max(1, cores // workers), memory_gb / workers if memory_gb else None)
+
+    started = time.perf_counter()
+    failed, per_worker = [], {}
+    initargs = (core_sets, compute_type, batch_size, os.environ.get("HF_TOKEN"), model_name, process)
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context,
+                             initializer=_init_worker, initargs=initargs) as executor:
+        # The executor hands queued work to whichever worker is free, in submission order
+        futures = [executor.submit(_process_file, path, durations[path]) for path in lpt_order(durations)]
+        for future in as_completed(futures):
+            path, ok, seconds, pid = future.result()
+            per_worker[pid] = per_worker.get(pid, 0.0) + seconds
+            if not ok:
+                failed.append(path)
+            logging.info(f"{'done  ' if ok else 'FAILED'} {os.path.basename(path)} ({durations[path]:.0f}s media) in {seconds:.1f}s")
+
+    wall = time.perf_counter() - started
+    audio = sum(durations.values())
+    return {
+        "files": len(durations),
+        "failed": failed,
+        "workers": workers,
+        "cores": cores,
+        "audio_seconds": audio,
+        "wall_seconds": wall,
+        "rtf": wall / audio if audio else 0.0,
+        # Slowest worker's busy time over the mean: 1.0 is a perfect balance
+        "imbalance": max(per_worker.values()) / (sum(per_worker.values()) / len(per_worker)) if per_worker else 1.0,
+    }
+
+
+def print_summary(summary):
+    print(f"{summary['cores']:>3} cores, {summary['workers']:>2} workers: {summary['files']} files, "
+          f"{summary['audio_seconds'] / 60:.1f} min of media in {summary['wall_seconds']:.1f}s -> "
+          f"RTF {summary['rtf']:.3f} ({1 / summary['rtf'] if summary['rtf'] else 0:.1f}x real time), "
+          f"load imbalance {summary['imbalance']:.2f}, {len(summary['failed'])} failed")
+    for path in summary["failed"]:
+        print(f"FAILED {path}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Transcribe many media files with a pool of CPU workers.")
+    parser.add_argument("inputs", nargs="+", help="Media files or directories")
+    parser.add_argument("--workers", type=int, help="Worker processes (default: from cores and free memory)")
+    parser.add_argument("--threads-per-worker", type=int, default=2, help="Used to derive the default worker count")
+    parser.add_argument("--core-counts", help="Comma-separated core counts to benchmark, e.g. 4,8,16")
+    parser.add_argument("--compute-type", help="Default: int8")
+    parser.add_argument("--batch-size", type=int, help="Default: derived from each worker's cores and memory")
+    parser.add_argument("--model", default="large-v3")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(stream=sys.stderr, level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    if not os.environ.get("HF_TOKEN"):
+        print("ERROR: Hugging Face token not found. Please set the HF_TOKEN environment variable.")
+        return 1
+
+    paths = find_media(args.inputs)
+    if not paths:
+        print("No media files found.")
+        return 1
+    durations = {path: estimate_duration(path) for path in paths}
+
+    total_cores = usable_cores()
+    core_counts = [int(n) for n in args.core_counts.split(",")] if args.core_counts else [total_cores]
+    # Counts above what this process may use would only repeat the largest run
+    core_counts = sorted({min(cores, total_cores) for cores in core_counts})
+    summaries = []
+    for cores in core_counts:
+        workers = args.workers or default_workers(cores, available_memory_gb(), args.threads_per_worker)
+        workers = min(workers, cores, len(paths))
+        logging.info(f"Running {len(paths)} files on {cores} cores with {workers} workers "
+                     f"(LPT bound: {lpt_makespan(durations, workers):.0f}s of media on the busiest worker)")
+        summaries.append(run_pool(durations, workers, cores, args.compute_type, args.batch_size, args.model))
+
+    print()
+    for summary in summaries:
+        print_summary(summary)
+    return 1 if any(summary["failed"] for summary in summaries) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())